@@ -11,6 +11,7 @@ from .payload import (
     CanaryDiff,
     CanaryPayloadMapper,
     PayloadTooLargeError,
+    encode_payload,
 )
 from .session import SAFSessionError, SAFSessionManager
 
@@ -25,4 +26,5 @@ __all__ = [
     "PayloadTooLargeError",
     "SAFSessionManager",
     "SAFSessionError",
+    "encode_payload",
 ]
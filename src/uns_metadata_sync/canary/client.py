@@ -8,11 +8,16 @@ import threading
 import time
 from collections import deque
 from dataclasses import dataclass
-from typing import Callable, Deque, List, Mapping, Optional, Sequence
+from typing import Callable, Deque, Iterable, List, Mapping, Optional, Sequence
 
 import httpx
 
-from .payload import CanaryDiff, CanaryPayloadMapper, PayloadTooLargeError
+from .payload import (
+    CanaryDiff,
+    CanaryPayloadMapper,
+    PayloadTooLargeError,
+    encode_payload,
+)
 from .session import SAFSessionManager
 
 logger = logging.getLogger(__name__)
@@ -380,6 +385,45 @@ class CanaryClient:
             self._metrics.set_queue_depth(len(self._queue))
             self._queue_cond.notify()
 
+    def enqueue_many(
+        self, payloads: Iterable[Mapping[str, object] | CanaryDiff]
+    ) -> None:
+        """Queue several diffs under a single lock acquisition.
+
+        Diffs that fit are queued; the overflow is dropped (each counted and
+        offered to the backpressure handler) and ``CanaryQueueFull`` is raised.
+        """
+        diffs = [
+            (
+                payload
+                if isinstance(payload, CanaryDiff)
+                else CanaryDiff.from_mapping(payload)
+            )
+            for payload in payloads
+        ]
+        if not diffs:
+            return
+        with self._queue_cond:
+            free = max(0, self._settings.queue_capacity - len(self._queue))
+            self._queue.extend(diffs[:free])
+            self._metrics.set_queue_depth(len(self._queue))
+            if free:
+                self._queue_cond.notify()
+            dropped = diffs[free:]
+            if not dropped:
+                return
+            for diff in dropped:
+                self._metrics.inc_queue_dropped()
+                if self._backpressure_handler:
+                    try:
+                        self._backpressure_handler(diff)
+                    except Exception:  # noqa: BLE001 - logging only
+                        logger.exception("backpressure handler raised an error")
+            raise CanaryQueueFull(
+                f"canary queue at capacity ({self._settings.queue_capacity});"
+                f" dropped {len(dropped)} diffs"
+            )
+
     # ------------------------------------------------------------------ Internal loop
     def _run_loop(self) -> None:
         try:
@@ -468,7 +512,8 @@ class CanaryClient:
         assert self._http_client is not None
         response = self._http_client.post(
             self._endpoint,
-            json=payload,
+            # Send the bytes the mapper sized, not httpx's own JSON encoding.
+            content=encode_payload(payload),
             headers={"Content-Type": "application/json"},
         )
         response.raise_for_status()
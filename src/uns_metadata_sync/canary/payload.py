@@ -10,6 +10,22 @@ from typing import Callable, Dict, Mapping, Optional, Sequence
 from ..path_normalizer import metric_path_to_canary_id
 
 
+def _encode(value: object) -> bytes:
+    """Return the compact UTF-8 JSON encoding used for the request body.
+
+    Payload sizes are summed from these per-member encodings, so this must stay
+    the serializer :func:`encode_payload` uses for the whole body.
+    """
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+    ).encode("utf-8")
+
+
+def encode_payload(payload: Mapping[str, object]) -> bytes:
+    """Return the exact ``/storeData`` request body for ``payload``."""
+    return _encode(payload)
+
+
 class PayloadTooLargeError(ValueError):
     """Raised when the encoded Canary payload exceeds the configured limit."""
 
@@ -108,30 +124,43 @@ class CanaryPayloadMapper:
             raise ValueError("diffs must not be empty")
 
         timestamp = self._normalise_timestamp(self._timestamp_provider())
-        properties: Dict[str, list[list[object]]] = {}
-
-        for diff in diffs:
+        # Later diffs for the same Canary id replace earlier ones, so walk the
+        # batch backwards: the first entries seen per id are the ones kept and
+        # each kept entry is encoded once to keep an exact running size.
+        # Keys keep the position of their first occurrence, as a forward dict
+        # build would.
+        kept: Dict[str, list[list[object]]] = {}
+        first_seen: Dict[str, int] = {}
+        size = len(_encode(token)) + len('{"sessionToken":,"properties":{}}')
+
+        for index in range(len(diffs) - 1, -1, -1):
+            diff = diffs[index]
             entries = self._build_entries(diff.properties, timestamp)
             if not entries:
                 continue
             canary_id = metric_path_to_canary_id(diff.uns_path)
-            properties[canary_id] = entries
+            first_seen[canary_id] = index
+            if canary_id in kept:
+                continue
+            kept[canary_id] = entries
+            size += len(_encode(canary_id)) + 1 + len(_encode(entries))
+            size += 1 if len(kept) > 1 else 0
 
-        if not properties:
+        if not kept:
             raise ValueError("no diff entries yielded payload content")
 
-        payload = {"sessionToken": token, "properties": properties}
-        encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
-            "utf-8"
-        )
-
-        if len(encoded) > self._max_payload_bytes:
-            metrics = ", ".join(sorted(properties.keys()))
+        if size > self._max_payload_bytes:
+            metrics = ", ".join(sorted(kept.keys()))
             raise PayloadTooLargeError(
-                f"canary payload size {len(encoded)} bytes exceeds "
+                f"canary payload size {size} bytes exceeds "
                 f"limit {self._max_payload_bytes} (metrics: {metrics})"
             )
-        return payload
+
+        properties = {
+            canary_id: kept[canary_id]
+            for canary_id in sorted(kept, key=first_seen.__getitem__)
+        }
+        return {"sessionToken": token, "properties": properties}
 
     def _build_entries(
         self,
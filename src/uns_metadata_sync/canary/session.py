@@ -6,12 +6,14 @@ import logging
 import random
 import threading
 import time
-from typing import Callable, Iterable, Optional
+from typing import Callable, Iterable, Mapping, Optional
 
 import httpx
 
 logger = logging.getLogger(__name__)
 
+HttpCall = Callable[[str, Mapping[str, object]], object]
+
 
 class SAFSessionError(RuntimeError):
     """Raised when SAF session operations fail."""
@@ -31,8 +33,16 @@ class SAFSessionManager:
         keepalive_idle_seconds: int,
         keepalive_jitter_seconds: int,
         http_client: Optional[httpx.Client] = None,
+        http_call: Optional[HttpCall] = None,
         clock: Callable[[], float] = time.monotonic,
     ) -> None:
+        """Create a manager.
+
+        ``http_call(path, body)`` posts ``body`` to ``base_url + path`` and
+        returns the decoded JSON response, raising on HTTP errors. Only the
+        ``/getSessionToken`` response is read. It defaults to an httpx
+        implementation; tests inject a plain callable instead.
+        """
         if not base_url:
             raise ValueError("base_url must be provided")
         if not api_token:
@@ -46,9 +56,12 @@ class SAFSessionManager:
         self._keepalive_idle_seconds = max(1, keepalive_idle_seconds)
         self._keepalive_jitter_seconds = max(0, keepalive_jitter_seconds)
         self._clock = clock
-        self._client = http_client or httpx.Client(
-            timeout=self._session_timeout_ms / 1000 + 5
-        )
+        # Injected clients are owned (and closed) by the caller.
+        self._owns_client = http_client is None and http_call is None
+        self._client: Optional[httpx.Client] = http_client
+        if self._owns_client:
+            self._client = httpx.Client(timeout=self._session_timeout_ms / 1000 + 5)
+        self._http_call: HttpCall = http_call or self._post
 
         self._lock = threading.Lock()
         self._token: Optional[str] = None
@@ -81,17 +94,28 @@ class SAFSessionManager:
         if not token:
             return
         try:
-            self._client.post(
-                f"{self._base_url}/revokeSessionToken",
-                json={"sessionToken": token},
-            )
+            self._http_call("/revokeSessionToken", {"sessionToken": token})
         except Exception:  # noqa: BLE001
             logger.debug("Failed to revoke SAF session token", exc_info=True)
 
     def close(self) -> None:
-        self._client.close()
+        if self._owns_client and self._client is not None:
+            self._client.close()
 
     # ------------------------------------------------------------------ Internal helpers
+    def _post(self, path: str, body: Mapping[str, object]) -> object:
+        assert self._client is not None
+        response = self._client.post(
+            f"{self._base_url}{path}",
+            json=body,
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        # keepAlive and revoke bodies are never read and may be empty.
+        if path != "/getSessionToken":
+            return None
+        return response.json()
+
     def _ensure_token_locked(self) -> None:
         if self._token:
             return
@@ -102,15 +126,9 @@ class SAFSessionManager:
             "settings": {"clientTimeout": self._session_timeout_ms},
         }
         try:
-            response = self._client.post(
-                f"{self._base_url}/getSessionToken",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            )
-            response.raise_for_status()
+            data = self._http_call("/getSessionToken", payload)
         except Exception as exc:  # noqa: BLE001
             raise SAFSessionError("SAF getSessionToken request failed") from exc
-        data = response.json()
         token = data.get("sessionToken") if isinstance(data, dict) else None
         if not token:
             raise SAFSessionError("SAF getSessionToken response missing sessionToken")
@@ -130,10 +148,7 @@ class SAFSessionManager:
         if idle < self._keepalive_idle_seconds + jitter:
             return
         try:
-            self._client.post(
-                f"{self._base_url}/keepAlive",
-                json={"sessionToken": self._token},
-            ).raise_for_status()
+            self._http_call("/keepAlive", {"sessionToken": self._token})
             self._last_keepalive = now
             self._last_activity = now
             logger.debug("SAF keepAlive sent after %.2f seconds idle", idle)
@@ -56,6 +56,13 @@ class CanaryIdGenerator:
 
         return self._escapes_total
 
+    def reset_metrics(self) -> None:
+        """Zero the counters and forget previously generated ids."""
+
+        self._known_ids.clear()
+        self._collisions_total = 0
+        self._escapes_total = 0
+
     def generate(self, uns_path: str, *, include_checksum: bool = False) -> CanaryId:
         """Return the derived `CanaryId` for `uns_path`.
 
@@ -6,12 +6,16 @@ import json
 import logging
 import os
 import tempfile
+import time
 from pathlib import Path
 from threading import Lock, RLock
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# fdatasync skips the inode metadata flush; fall back where it is unavailable.
+_datasync = getattr(os, "fdatasync", os.fsync)
+
 
 class InMemoryCheckpointStore:
     """Volatile checkpoint store keeping slot positions in-memory."""
@@ -62,15 +66,38 @@ class InMemoryCheckpointStore:
             else:
                 self._positions[slot_name] = new_lsn
 
+    def flush(self) -> None:
+        """Nothing is buffered in memory-only mode."""
+
 
 class PersistentCheckpointStore:
-    """Durable checkpoint store that persists slot positions to disk atomically."""
+    """Durable checkpoint store that persists slot positions to disk atomically.
+
+    The in-memory positions are authoritative. By default every advancing
+    ``save`` rewrites the file; ``flush_every`` and ``flush_interval`` let
+    callers coalesce several LSN advances into one write (and one sync when
+    ``fsync`` is enabled). Buffered positions are written by ``flush``/``close``,
+    by the next ``save`` that crosses a threshold, and by any ``reset``.
+    """
 
-    def __init__(self, path: Path | str, *, fsync: bool = False) -> None:
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        fsync: bool = False,
+        flush_every: int = 1,
+        flush_interval: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self._path = Path(path)
         self._fsync = fsync
+        self._flush_every = max(1, flush_every)
+        self._flush_interval = max(0.0, flush_interval)
+        self._clock = clock
         self._lock = RLock()
         self._positions: Dict[str, int] = {}
+        self._pending_saves = 0
+        self._dirty_since: Optional[float] = None
         try:
             self._path.parent.mkdir(parents=True, exist_ok=True)
         except OSError as exc:  # pragma: no cover - only raised on permission issues
@@ -91,7 +118,25 @@ class PersistentCheckpointStore:
             if current is not None and lsn <= current:
                 return
             self._positions[slot_name] = lsn
-            self._write_locked()
+            self._pending_saves += 1
+            now = self._clock()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            interval_elapsed = (
+                self._flush_interval > 0
+                and now - self._dirty_since >= self._flush_interval
+            )
+            if self._pending_saves >= self._flush_every or interval_elapsed:
+                self._write_locked()
+
+    def flush(self) -> None:
+        """Write buffered positions to disk if any save is still pending."""
+        with self._lock:
+            if self._dirty_since is not None:
+                self._write_locked()
+
+    def close(self) -> None:
+        self.flush()
 
     def reset(
         self,
@@ -152,16 +197,18 @@ class PersistentCheckpointStore:
     def _write_locked(self) -> None:
         temp_fd: Optional[int] = None
         temp_path: Optional[str] = None
+        data = json.dumps(self._positions, sort_keys=True).encode("utf-8")
         try:
             temp_fd, temp_path = tempfile.mkstemp(
                 prefix=f".{self._path.name}.", dir=str(self._path.parent)
             )
-            with os.fdopen(temp_fd, "w", encoding="utf-8") as tmp:
-                temp_fd = None  # ownership transferred to file object
-                json.dump(self._positions, tmp, sort_keys=True)
-                tmp.flush()
-                if self._fsync:
-                    os.fsync(tmp.fileno())
+            view = memoryview(data)
+            while view:
+                view = view[os.write(temp_fd, view) :]
+            if self._fsync:
+                _datasync(temp_fd)
+            os.close(temp_fd)
+            temp_fd = None
             os.replace(temp_path, self._path)
             temp_path = None
             if self._fsync:
@@ -174,6 +221,8 @@ class PersistentCheckpointStore:
                         os.fsync(dir_fd)
                     finally:
                         os.close(dir_fd)
+            self._pending_saves = 0
+            self._dirty_since = None
         except OSError as exc:
             logger.error("failed to persist checkpoint file %s: %s", self._path, exc)
             raise
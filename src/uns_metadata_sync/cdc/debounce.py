@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+import heapq
 import logging
 import time
 from dataclasses import dataclass, field
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +62,13 @@ class DebounceEntry:
 
 
 class DebounceBuffer:
-    """Aggregates metric diffs within a configured time window."""
+    """Aggregates metric diffs within a configured time window.
+
+    Entries are scheduled on a min-heap of ``(last_update, ordinal, key)`` so
+    flushes and cap evictions only touch the entries they return. Updating an
+    entry pushes a fresh heap item and leaves the old one behind; stale items
+    are skipped when popped and compacted away once they outnumber live ones.
+    """
 
     def __init__(
         self,
@@ -80,7 +87,9 @@ class DebounceBuffer:
         self._clock = clock
         self._metrics = metrics or DebounceMetrics()
         self._entries: Dict[str, DebounceEntry] = {}
-        self._sequence: List[str] = []
+        self._ordinals: Dict[str, int] = {}
+        self._next_ordinal = 0
+        self._heap: List[Tuple[float, int, str]] = []
 
     @property
     def metrics(self) -> DebounceMetrics:
@@ -106,7 +115,8 @@ class DebounceBuffer:
                 last_update=now,
             )
             self._entries[metric_key] = entry
-            self._sequence.append(metric_key)
+            self._ordinals[metric_key] = self._next_ordinal
+            self._next_ordinal += 1
         entry.merge(
             diff,
             version=version,
@@ -115,21 +125,24 @@ class DebounceBuffer:
             timestamp=now,
             extras=extras,
         )
+        self._schedule(metric_key, entry)
         self._enforce_cap()
         self._metrics.set_gauge("buffer_depth", len(self._entries))
 
     def flush_due(self, *, now: Optional[float] = None) -> List[Dict[str, object]]:
         current = now if now is not None else self._clock()
-        ready_keys = [
-            key
-            for key, entry in self._entries.items()
-            if current - entry.last_update >= self.window_seconds
-        ]
-        ready_keys.sort(key=self._sequence.index)
+        heap = self._heap
+        ready: List[Tuple[int, str, DebounceEntry]] = []
+        while heap and current - heap[0][0] >= self.window_seconds:
+            item = heapq.heappop(heap)
+            if self._is_live(item):
+                key = item[2]
+                ready.append((item[1], key, self._entries.pop(key)))
+                del self._ordinals[key]
+        # Emit in arrival order, matching pending_keys().
+        ready.sort(key=lambda claimed: claimed[0])
         payloads: List[Dict[str, object]] = []
-        for key in ready_keys:
-            entry = self._entries.pop(key)
-            self._sequence.remove(key)
+        for _, key, entry in ready:
             payloads.append(
                 {
                     "metric": key,
@@ -142,22 +155,40 @@ class DebounceBuffer:
                     "extras": dict(entry.extras),
                 }
             )
-        if ready_keys:
+        if ready:
             self._metrics.set_gauge("buffer_depth", len(self._entries))
-            self._metrics.inc("emitted", len(ready_keys))
+            self._metrics.inc("emitted", len(ready))
         return payloads
 
     def pending_keys(self) -> List[str]:
-        return list(self._sequence)
+        return list(self._entries)
+
+    def _schedule(self, key: str, entry: DebounceEntry) -> None:
+        heapq.heappush(self._heap, (entry.last_update, self._ordinals[key], key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (item.last_update, self._ordinals[name], name)
+                for name, item in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def _is_live(self, item: Tuple[float, int, str]) -> bool:
+        timestamp, ordinal, key = item
+        entry = self._entries.get(key)
+        return (
+            entry is not None
+            and self._ordinals[key] == ordinal
+            and entry.last_update == timestamp
+        )
 
     def _enforce_cap(self) -> None:
         while len(self._entries) > self.max_entries:
-            oldest_key = min(
-                self._entries.values(),
-                key=lambda entry: entry.last_update,
-            ).metric_key
+            item = heapq.heappop(self._heap)
+            if not self._is_live(item):
+                continue
+            oldest_key = item[2]
             dropped = self._entries.pop(oldest_key)
-            self._sequence.remove(oldest_key)
+            del self._ordinals[oldest_key]
             self._metrics.inc("dropped")
             logger.warning(
                 "debounce buffer full - dropping metric %s with %d pending keys",
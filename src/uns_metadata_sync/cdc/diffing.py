@@ -2,14 +2,23 @@
 
 from __future__ import annotations
 
+import sys
+from bisect import insort
 from collections import OrderedDict
 from dataclasses import dataclass, field
+from operator import attrgetter
 from typing import Dict, Iterable, List, Optional, Set
 
+_event_version = attrgetter("version")
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class DiffEvent:
-    """Represents a single change emitted from replication."""
+    """Represents a single change emitted from replication.
+
+    ``uns_path`` is interned: a few thousand distinct paths repeat across
+    every buffered event, so each path is stored once.
+    """
 
     event_id: str
     uns_path: str
@@ -18,22 +27,26 @@ class DiffEvent:
     changes: Dict[str, object]
     timestamp: str
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "uns_path", sys.intern(self.uns_path))
+
 
-@dataclass
+@dataclass(slots=True)
 class AggregatedDiff:
     uns_path: str
+    # Kept sorted by version (stable for equal versions) as events arrive.
     events: List[DiffEvent] = field(default_factory=list)
     merged_changes: Dict[str, tuple[int, object]] = field(default_factory=dict)
 
     def append(self, event: DiffEvent) -> None:
-        self.events.append(event)
+        insort(self.events, event, key=_event_version)
         for key, value in event.changes.items():
             current = self.merged_changes.get(key)
             if current is None or event.version >= current[0]:
                 self.merged_changes[key] = (event.version, value)
 
     def to_snapshot(self) -> Dict[str, object]:
-        ordered_events = sorted(self.events, key=lambda ev: ev.version)
+        ordered_events = self.events
         versions = [ev.version for ev in ordered_events]
         actors = [ev.actor for ev in ordered_events]
         metadata = {
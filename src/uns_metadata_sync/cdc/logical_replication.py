@@ -13,7 +13,11 @@ from typing import Callable, Dict, Iterable, Optional, Protocol, Sequence
 
 
 class CheckpointStore(Protocol):
-    """Persistence backend used to store and retrieve replication slot positions."""
+    """Persistence backend used to store and retrieve replication slot positions.
+
+    Stores that buffer saves may also provide ``flush()``; the client calls it
+    once the stream is drained and on :meth:`LogicalReplicationClient.flush_checkpoint`.
+    """
 
     def load(self, slot_name: str) -> Optional[int]: ...
 
@@ -179,6 +183,7 @@ class LogicalReplicationClient:
                     self._persist_checkpoint(message.lsn)
             if self._last_seen_lsn is not None:
                 self._persist_checkpoint(self._last_seen_lsn)
+            self.flush_checkpoint()
             self._backoff.reset()
             self._last_error_delay = None
             return processed
@@ -186,6 +191,12 @@ class LogicalReplicationClient:
             self._last_error_delay = self._backoff.next_delay()
             raise exc
 
+    def flush_checkpoint(self) -> None:
+        """Ask the checkpoint store to write out any buffered position."""
+        flush = getattr(self._checkpoint_store, "flush", None)
+        if flush is not None:
+            flush()
+
     def _persist_checkpoint(self, lsn: int) -> None:
         if self._last_persisted_lsn is None or lsn > self._last_persisted_lsn:
             self._checkpoint_store.save(self.slot_name, lsn)
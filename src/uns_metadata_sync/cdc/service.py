@@ -395,6 +395,7 @@ class CDCListenerService:
     def stop(self) -> None:
         self._stop_event.set()
         self.force_flush()
+        self._client.flush_checkpoint()
 
     def reset_resume_position(
         self,
@@ -583,7 +584,10 @@ def build_cdc_listener(
     if store is None:
         if settings.cdc_checkpoint_backend == "file":
             store = PersistentCheckpointStore(
-                settings.cdc_resume_path, fsync=settings.cdc_resume_fsync
+                settings.cdc_resume_path,
+                fsync=settings.cdc_resume_fsync,
+                flush_every=settings.cdc_resume_flush_every,
+                flush_interval=settings.cdc_resume_flush_interval_seconds,
             )
         else:
             store = InMemoryCheckpointStore()
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import os
 from dataclasses import dataclass
 from pathlib import Path
@@ -71,6 +72,8 @@ class Settings:
     canary_keepalive_idle_seconds: int = 30
     canary_keepalive_jitter_seconds: int = 10
     cdc_replication_plugin: str = "wal2json"
+    cdc_resume_flush_every: int = 1
+    cdc_resume_flush_interval_seconds: float = 0.0
 
 
 def _as_bool(value: Optional[str], default: bool) -> bool:
@@ -105,9 +108,98 @@ def _split_csv(value: Optional[str]) -> Tuple[str, ...]:
     return tuple(entry.strip() for entry in value.split(",") if entry.strip())
 
 
+# Every variable ``_build_settings`` reads; the values form the cache key.
+_ENV_KEYS: Tuple[str, ...] = (
+    "MQTT_HOST",
+    "MQTT_PORT",
+    "MQTT_USER",
+    "MQTT_PASSWORD",
+    "MQTT_TOPIC_ALL",
+    "MQTT_TOPIC_NBIRTH_ALL",
+    "MQTT_TOPIC_DBIRTH_ALL",
+    "ALIAS_CACHE_PATH",
+    "WRITE_JSONL",
+    "JSONL_PATTERN",
+    "AUTO_REQUEST_REBIRTH_ON_MISS",
+    "REBIRTH_THROTTLE_SECONDS",
+    "MQTT_CLIENT_ID",
+    "MQTT_TLS_INSECURE",
+    "DB_MODE",
+    "PGHOST",
+    "PGPORT",
+    "PGDATABASE",
+    "PGUSER",
+    "PGPASSWORD",
+    "PGSCHEMA",
+    "CDC_ENABLED",
+    "PGREPL_SLOT",
+    "PGREPL_PUBLICATION",
+    "CDC_DEBOUNCE_SECONDS",
+    "CDC_FLUSH_INTERVAL_SECONDS",
+    "CDC_BUFFER_CAP",
+    "CDC_IDLE_SLEEP_SECONDS",
+    "CDC_MAX_BATCH_MESSAGES",
+    "CDC_CHECKPOINT_BACKEND",
+    "CDC_RESUME_PATH",
+    "CDC_RESUME_FSYNC",
+    "CDC_RESUME_FLUSH_EVERY",
+    "CDC_RESUME_FLUSH_INTERVAL_SECONDS",
+    "CDC_REPLICATION_PLUGIN",
+    "PGREPLUSER",
+    "PGREPLPASSWORD",
+    "PGREPLHOST",
+    "PGREPLPORT",
+    "PGREPLDATABASE",
+    "PGREPLSSLMODE",
+    "PGSSLMODE",
+    "CANARY_SAF_BASE_URL",
+    "CANARY_API_TOKEN",
+    "CANARY_CLIENT_ID",
+    "CANARY_HISTORIANS",
+    "CANARY_WRITER_ENABLED",
+    "CANARY_RATE_LIMIT_RPS",
+    "CANARY_QUEUE_CAPACITY",
+    "CANARY_MAX_BATCH_TAGS",
+    "CANARY_MAX_PAYLOAD_BYTES",
+    "CANARY_REQUEST_TIMEOUT_SECONDS",
+    "CANARY_RETRY_ATTEMPTS",
+    "CANARY_RETRY_BASE_DELAY_SECONDS",
+    "CANARY_RETRY_MAX_DELAY_SECONDS",
+    "CANARY_CIRCUIT_CONSECUTIVE_FAILURES",
+    "CANARY_CIRCUIT_RESET_SECONDS",
+    "CANARY_SESSION_TIMEOUT_MS",
+    "CANARY_KEEPALIVE_IDLE_SECONDS",
+    "CANARY_KEEPALIVE_JITTER_SECONDS",
+)
+
+
 def load_settings() -> Settings:
-    """Load configuration from the environment (and `.env`)."""
+    """Load configuration from the environment (and `.env`).
+
+    `.env` is read once per process and the parsed ``Settings`` are cached
+    against the current values of ``_ENV_KEYS``, so repeated calls only re-parse
+    when one of those variables changed. ``load_settings.cache_clear()`` drops
+    both caches.
+    """
+    _load_dotenv_once()
+    return _build_settings(tuple(os.environ.get(key) for key in _ENV_KEYS))
+
+
+@functools.lru_cache(maxsize=1)
+def _load_dotenv_once() -> None:
     load_dotenv()
+
+
+def _clear_settings_cache() -> None:
+    _load_dotenv_once.cache_clear()
+    _build_settings.cache_clear()
+
+
+load_settings.cache_clear = _clear_settings_cache  # type: ignore[attr-defined]
+
+
+@functools.lru_cache(maxsize=1)
+def _build_settings(_env: Tuple[Optional[str], ...]) -> Settings:
     broker = os.getenv("MQTT_HOST", "")
     port = int(os.getenv("MQTT_PORT", "1883"))
     username = os.getenv("MQTT_USER", "")
@@ -146,6 +238,10 @@ def load_settings() -> Settings:
     )
     cdc_resume_path = Path(os.getenv("CDC_RESUME_PATH", "cdc_resume_tokens.json"))
     cdc_resume_fsync = _as_bool(os.getenv("CDC_RESUME_FSYNC"), False)
+    cdc_resume_flush_every = int(os.getenv("CDC_RESUME_FLUSH_EVERY", "1"))
+    cdc_resume_flush_interval_seconds = float(
+        os.getenv("CDC_RESUME_FLUSH_INTERVAL_SECONDS", "0")
+    )
     cdc_replication_plugin = os.getenv("CDC_REPLICATION_PLUGIN", "wal2json").strip()
     pg_replication_user = os.getenv("PGREPLUSER", db_user)
     pg_replication_password = os.getenv("PGREPLPASSWORD", db_password)
@@ -229,6 +325,8 @@ def load_settings() -> Settings:
         cdc_resume_path=cdc_resume_path,
         cdc_resume_fsync=cdc_resume_fsync,
         cdc_replication_plugin=cdc_replication_plugin or "wal2json",
+        cdc_resume_flush_every=cdc_resume_flush_every,
+        cdc_resume_flush_interval_seconds=cdc_resume_flush_interval_seconds,
         pg_replication_user=pg_replication_user,
         pg_replication_password=pg_replication_password,
         pg_replication_host=pg_replication_host,
@@ -110,23 +110,72 @@ class _EmptyResult:
 
 
 class _Transaction:
+    """psycopg3-style transaction block for the psycopg2 connection.
+
+    The outermost block suspends autocommit so every statement inside it is
+    committed (and flushed to WAL) once on exit; nested blocks use savepoints.
+    In autocommit mode an open transaction on entry can only be the one
+    :meth:`Connection.execute` leaves behind after a row-returning statement,
+    and it is committed just as the next ``execute`` would. With autocommit
+    off the pending work belongs to the caller, so entry raises
+    ``ProgrammingError`` instead of committing it.
+    """
+
     def __init__(self, connection: "Connection"):
         self._connection = connection
+        self._savepoint: Optional[str] = None
+        self._restore_autocommit = False
 
     def __enter__(self) -> None:
+        connection = self._connection
+        depth = connection._transaction_depth
+        if depth:
+            self._savepoint = f"_tx_sp_{depth}"
+            with connection.cursor(row_factory=None) as cur:
+                cur.execute(f"SAVEPOINT {self._savepoint}")
+        else:
+            if (
+                connection.info.transaction_status
+                != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+            ):
+                if not connection.autocommit:
+                    raise psycopg2.ProgrammingError(
+                        "cannot start a transaction block: the connection "
+                        "already has an open transaction"
+                    )
+                connection.commit()
+            self._restore_autocommit = connection.autocommit
+            connection.autocommit = False
+        connection._transaction_depth = depth + 1
         return None
 
     def __exit__(self, exc_type, exc, tb) -> bool:
-        if exc_type is None:
-            try:
-                self._connection.commit()
-            except psycopg2.ProgrammingError:
-                pass
-        else:
-            try:
-                self._connection.rollback()
-            except psycopg2.ProgrammingError:
-                pass
+        connection = self._connection
+        connection._transaction_depth -= 1
+        if self._savepoint is not None:
+            if connection.closed:
+                return False
+            statement = (
+                f"RELEASE SAVEPOINT {self._savepoint}"
+                if exc_type is None
+                else f"ROLLBACK TO SAVEPOINT {self._savepoint}"
+            )
+            with connection.cursor(row_factory=None) as cur:
+                cur.execute(statement)
+            return False
+        try:
+            if exc_type is None:
+                connection.commit()
+            else:
+                try:
+                    connection.rollback()
+                except psycopg2.InterfaceError:
+                    # The connection is already gone; let the original
+                    # exception propagate instead of this secondary one.
+                    pass
+        finally:
+            if not connection.closed:
+                connection.autocommit = self._restore_autocommit
         return False
 
 
@@ -137,6 +186,20 @@ class Connection(psycopg2.extensions.connection):
         super().__init__(*args, **kwargs)
         self.autocommit = True
         self._row_factory = None
+        self._in_with_block = False
+        self._transaction_depth = 0
+
+    def __enter__(self):
+        # psycopg2 >= 2.9 opens a transaction inside ``with conn`` even when
+        # autocommit is on, so database DDL must not run on this connection.
+        self._in_with_block = True
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            self._in_with_block = False
 
     def transaction(self) -> _Transaction:
         return _Transaction(self)
@@ -165,6 +228,10 @@ class Connection(psycopg2.extensions.connection):
         if text.lstrip().startswith("DROP DATABASE") or text.lstrip().startswith(
             "CREATE DATABASE"
         ):
+            if self.autocommit and not self._in_with_block:
+                with super().cursor() as cur:
+                    cur.execute(query, params)
+                return _EmptyResult()
             raw_conn = psycopg2.connect(self.dsn)
             raw_conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
             try:
@@ -18,6 +18,49 @@ class _NullCounter:
         return None
 
 
+_VERSION_SQL = """
+INSERT INTO uns_meta.metric_versions (
+    metric_id,
+    changed_by,
+    diff
+) VALUES (%s, %s, %s)
+"""
+
+_LINEAGE_SQL = """
+INSERT INTO uns_meta.metric_path_lineage (
+    metric_id,
+    old_uns_path,
+    new_uns_path
+) VALUES (%s, %s, %s)
+ON CONFLICT (metric_id, old_uns_path, new_uns_path) DO NOTHING
+RETURNING lineage_id
+"""
+
+# Both inserts in one round-trip; lineage_id is NULL when the lineage row
+# already existed.
+_VERSION_AND_LINEAGE_SQL = """
+WITH version_row AS (
+    INSERT INTO uns_meta.metric_versions (
+        metric_id,
+        changed_by,
+        diff
+    ) VALUES (%s, %s, %s)
+    RETURNING version_id
+), lineage_row AS (
+    INSERT INTO uns_meta.metric_path_lineage (
+        metric_id,
+        old_uns_path,
+        new_uns_path
+    ) VALUES (%s, %s, %s)
+    ON CONFLICT (metric_id, old_uns_path, new_uns_path) DO NOTHING
+    RETURNING lineage_id
+)
+SELECT
+    (SELECT version_id FROM version_row) AS version_id,
+    (SELECT lineage_id FROM lineage_row) AS lineage_id
+"""
+
+
 class LineageVersionWriter:
     """Append-only writers for metric lineage and version history tables."""
 
@@ -42,37 +85,39 @@ class LineageVersionWriter:
         """Persist version history and optional lineage entry for a metric."""
 
         diff_payload: Mapping[str, Any] = diff or {}
+        record_lineage = bool(
+            previous_uns_path
+            and previous_uns_path != new_uns_path
+            and previous_uns_path.strip()
+        )
         lineage_inserted = False
 
         with self.conn.transaction():
-            if diff_payload:
-                self.conn.execute(
-                    """
-                    INSERT INTO uns_meta.metric_versions (
+            if diff_payload and record_lineage:
+                cursor = self.conn.execute(
+                    _VERSION_AND_LINEAGE_SQL,
+                    (
                         metric_id,
                         changed_by,
-                        diff
-                    ) VALUES (%s, %s, %s)
-                    """,
-                    (metric_id, changed_by, Json(diff_payload)),
+                        Json(diff_payload),
+                        metric_id,
+                        previous_uns_path,
+                        new_uns_path,
+                    ),
                 )
-
-            if (
-                previous_uns_path
-                and previous_uns_path != new_uns_path
-                and previous_uns_path.strip()
-            ):
+                row = cursor.fetchone()
+                if row is not None:
+                    lineage_id = (
+                        row["lineage_id"] if isinstance(row, Mapping) else row[1]
+                    )
+                    lineage_inserted = lineage_id is not None
+            elif diff_payload:
+                self.conn.execute(
+                    _VERSION_SQL, (metric_id, changed_by, Json(diff_payload))
+                )
+            elif record_lineage:
                 cursor = self.conn.execute(
-                    """
-                    INSERT INTO uns_meta.metric_path_lineage (
-                        metric_id,
-                        old_uns_path,
-                        new_uns_path
-                    ) VALUES (%s, %s, %s)
-                    ON CONFLICT (metric_id, old_uns_path, new_uns_path) DO NOTHING
-                    RETURNING lineage_id
-                    """,
-                    (metric_id, previous_uns_path, new_uns_path),
+                    _LINEAGE_SQL, (metric_id, previous_uns_path, new_uns_path)
                 )
                 lineage_inserted = cursor.fetchone() is not None
 
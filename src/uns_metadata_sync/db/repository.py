@@ -2,20 +2,53 @@
 
 from __future__ import annotations
 
+import io
 from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Sequence
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence
 
 from psycopg2 import Error
 
 from . import Connection, dict_row
 
+_PROPERTY_COLUMNS = (
+    "metric_id, key, type, value_int, value_long, value_float, "
+    "value_double, value_string, value_bool"
+)
+
+_PROPERTY_CONFLICT_CLAUSE = (
+    "ON CONFLICT (metric_id, key) DO UPDATE SET "
+    "type = EXCLUDED.type, "
+    "value_int = EXCLUDED.value_int, "
+    "value_long = EXCLUDED.value_long, "
+    "value_float = EXCLUDED.value_float, "
+    "value_double = EXCLUDED.value_double, "
+    "value_string = EXCLUDED.value_string, "
+    "value_bool = EXCLUDED.value_bool "
+    "WHERE mp.type IS DISTINCT FROM EXCLUDED.type "
+    "OR mp.value_int IS DISTINCT FROM EXCLUDED.value_int "
+    "OR mp.value_long IS DISTINCT FROM EXCLUDED.value_long "
+    "OR mp.value_float IS DISTINCT FROM EXCLUDED.value_float "
+    "OR mp.value_double IS DISTINCT FROM EXCLUDED.value_double "
+    "OR mp.value_string IS DISTINCT FROM EXCLUDED.value_string "
+    "OR mp.value_bool IS DISTINCT FROM EXCLUDED.value_bool"
+)
+
+_METRICS_UNNEST_UPSERT = (
+    "INSERT INTO uns_meta.metrics (device_id, name, uns_path, datatype) "
+    "SELECT * FROM UNNEST(%s::bigint[], %s::text[], %s::text[], %s::text[]) "
+    "ON CONFLICT (device_id, name) DO UPDATE SET "
+    "uns_path = EXCLUDED.uns_path, "
+    "datatype = EXCLUDED.datatype "
+    "RETURNING name, metric_id"
+)
+
 
 class RepositoryError(Exception):
     """Raised when repository operations fail."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DevicePayload:
     group_id: str
     country: str
@@ -26,7 +59,7 @@ class DevicePayload:
     uns_path: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MetricPayload:
     device_id: int
     name: str
@@ -34,8 +67,7 @@ class MetricPayload:
     datatype: str
 
 
-@dataclass(frozen=True)
-class MetricPropertyPayload:
+class MetricPropertyPayload(NamedTuple):
     metric_id: int
     key: str
     type: str
@@ -313,43 +345,34 @@ class MetadataRepository:
         *,
         batch_size: int = 1000,
     ) -> Dict[str, int]:
+        """Upsert metrics of one device and return their ids keyed by name.
+
+        Metric names are only unique per device, so every payload must carry
+        the same ``device_id``.
+        """
         if batch_size <= 0:
             raise ValueError("batch_size must be positive")
         items = list(payloads)
         if not items:
             return {}
+        if len({p.device_id for p in items}) > 1:
+            raise ValueError("upsert_metrics_bulk payloads must share one device_id")
 
         try:
             id_map: Dict[str, int] = {}
             for i in range(0, len(items), batch_size):
                 batch_items = items[i : i + batch_size]
-                rows = [
-                    (p.device_id, p.name, p.uns_path, p.datatype) for p in batch_items
-                ]
-                if not rows:
-                    continue
-
-                values_clause = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
-                params: List[Any] = [value for row in rows for value in row]
-                statement = (
-                    "INSERT INTO uns_meta.metrics (device_id, name, uns_path, datatype) "
-                    f"VALUES {values_clause} "
-                    "ON CONFLICT (device_id, name) DO UPDATE SET "
-                    "uns_path = EXCLUDED.uns_path, "
-                    "datatype = EXCLUDED.datatype"
+                # One array per column keeps the statement text constant
+                # regardless of batch length.
+                params = (
+                    [p.device_id for p in batch_items],
+                    [p.name for p in batch_items],
+                    [p.uns_path for p in batch_items],
+                    [p.datatype for p in batch_items],
                 )
 
                 with self.conn.cursor() as cur:
-                    cur.execute(statement, params)
-
-                    placeholder = ", ".join(["%s"] * len(batch_items))
-                    names = [p.name for p in batch_items]
-                    device_id = batch_items[0].device_id
-                    cur.execute(
-                        "SELECT name, metric_id FROM uns_meta.metrics "
-                        f"WHERE device_id = %s AND name IN ({placeholder})",
-                        [device_id] + names,
-                    )
+                    cur.execute(_METRICS_UNNEST_UPSERT, params)
                     for row in cur.fetchall():
                         id_map[row["name"]] = row["metric_id"]
 
@@ -477,32 +500,11 @@ class MetadataRepository:
         if not items:
             return 0
 
-        grouped: Dict[int, Dict[str, MetricPropertyPayload]] = {}
-        for payload in items:
-            grouped.setdefault(payload.metric_id, {})[payload.key] = payload
-
         context = self.conn.transaction if manage_transaction else nullcontext
 
         try:
             with context():
-                rows: List[tuple[Any, ...]] = []
-                for metric_payloads in grouped.values():
-                    for payload in metric_payloads.values():
-                        columns = self._property_column_values(payload)
-                        rows.append(
-                            (
-                                payload.metric_id,
-                                payload.key,
-                                payload.type,
-                                columns["value_int"],
-                                columns["value_long"],
-                                columns["value_float"],
-                                columns["value_double"],
-                                columns["value_string"],
-                                columns["value_bool"],
-                            )
-                        )
-
+                rows = self._property_rows(items)
                 if not rows:
                     return 0
 
@@ -515,25 +517,10 @@ class MetadataRepository:
                     params: List[Any] = [value for row in batch for value in row]
                     statement = (
                         "INSERT INTO uns_meta.metric_properties AS mp ("
-                        "metric_id, key, type, value_int, value_long, value_float, "
-                        "value_double, value_string, value_bool"
+                        f"{_PROPERTY_COLUMNS}"
                         ") VALUES "
                         f"{values_clause} "
-                        "ON CONFLICT (metric_id, key) DO UPDATE SET "
-                        "type = EXCLUDED.type, "
-                        "value_int = EXCLUDED.value_int, "
-                        "value_long = EXCLUDED.value_long, "
-                        "value_float = EXCLUDED.value_float, "
-                        "value_double = EXCLUDED.value_double, "
-                        "value_string = EXCLUDED.value_string, "
-                        "value_bool = EXCLUDED.value_bool "
-                        "WHERE mp.type IS DISTINCT FROM EXCLUDED.type "
-                        "OR mp.value_int IS DISTINCT FROM EXCLUDED.value_int "
-                        "OR mp.value_long IS DISTINCT FROM EXCLUDED.value_long "
-                        "OR mp.value_float IS DISTINCT FROM EXCLUDED.value_float "
-                        "OR mp.value_double IS DISTINCT FROM EXCLUDED.value_double "
-                        "OR mp.value_string IS DISTINCT FROM EXCLUDED.value_string "
-                        "OR mp.value_bool IS DISTINCT FROM EXCLUDED.value_bool"
+                        f"{_PROPERTY_CONFLICT_CLAUSE}"
                     )
                     with self.conn.cursor(row_factory=None) as cur:
                         cur.execute(statement, params)
@@ -542,6 +529,62 @@ class MetadataRepository:
         except Error as exc:  # noqa: BLE001
             raise RepositoryError(f"metric property bulk upsert failed: {exc}") from exc
 
+    def copy_metric_properties(
+        self,
+        payloads: Iterable[MetricPropertyPayload],
+        *,
+        manage_transaction: bool = True,
+    ) -> int:
+        """Stage property rows with ``COPY FROM STDIN`` and merge them in one pass.
+
+        Rows are streamed into a session-local temp table and applied with a
+        single ``INSERT ... SELECT ... ON CONFLICT`` so large DBIRTH payloads
+        cost a fixed number of round-trips regardless of the property count.
+        Unchanged rows are skipped exactly as in ``upsert_metric_properties_bulk``.
+        """
+
+        items = list(payloads)
+        if not items:
+            return 0
+
+        context = self.conn.transaction if manage_transaction else nullcontext
+
+        try:
+            with context():
+                rows = self._property_rows(items)
+                if not rows:
+                    return 0
+
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write("\t".join(map(self._copy_text_value, row)))
+                    buffer.write("\n")
+                buffer.seek(0)
+
+                with self.conn.cursor(row_factory=None) as cur:
+                    cur.execute(
+                        "CREATE TEMP TABLE IF NOT EXISTS metric_properties_stage "
+                        "(LIKE uns_meta.metric_properties INCLUDING DEFAULTS); "
+                        "TRUNCATE metric_properties_stage"
+                    )
+                    cur.copy_expert(
+                        "COPY metric_properties_stage ("
+                        f"{_PROPERTY_COLUMNS}"
+                        ") FROM STDIN",
+                        buffer,
+                    )
+                    cur.execute(
+                        "INSERT INTO uns_meta.metric_properties AS mp ("
+                        f"{_PROPERTY_COLUMNS}"
+                        ") SELECT "
+                        f"{_PROPERTY_COLUMNS} "
+                        "FROM metric_properties_stage "
+                        f"{_PROPERTY_CONFLICT_CLAUSE}"
+                    )
+                    return cur.rowcount
+        except Error as exc:  # noqa: BLE001
+            raise RepositoryError(f"metric property copy upsert failed: {exc}") from exc
+
     # ------------------------------------------------------------------
     @staticmethod
     def _device_rows_equal(existing: Dict[str, Any], payload: DevicePayload) -> bool:
@@ -580,6 +623,48 @@ class MetadataRepository:
             and existing["value_bool"] == columns["value_bool"]
         )
 
+    def _property_rows(
+        self, items: Sequence[MetricPropertyPayload]
+    ) -> List[tuple[Any, ...]]:
+        grouped: Dict[int, Dict[str, MetricPropertyPayload]] = {}
+        for payload in items:
+            grouped.setdefault(payload.metric_id, {})[payload.key] = payload
+
+        rows: List[tuple[Any, ...]] = []
+        for metric_payloads in grouped.values():
+            for payload in metric_payloads.values():
+                columns = self._property_column_values(payload)
+                rows.append(
+                    (
+                        payload.metric_id,
+                        payload.key,
+                        payload.type,
+                        columns["value_int"],
+                        columns["value_long"],
+                        columns["value_float"],
+                        columns["value_double"],
+                        columns["value_string"],
+                        columns["value_bool"],
+                    )
+                )
+        return rows
+
+    @staticmethod
+    def _copy_text_value(value: Any) -> str:
+        """Render a value for PostgreSQL's COPY text format."""
+
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        return (
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+
     @staticmethod
     def _property_column_values(payload: MetricPropertyPayload) -> Dict[str, Any]:
         allowed = {"int", "long", "float", "double", "string", "boolean"}
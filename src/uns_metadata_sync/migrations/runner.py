@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+import functools
 import hashlib
 from dataclasses import dataclass
 from importlib.resources import files
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from uns_metadata_sync.db import Connection, connect
 
@@ -45,8 +46,17 @@ class AppliedMigration:
 
 
 def load_migrations() -> List[Migration]:
-    """Load migrations from the packaged `sql` directory sorted by version."""
+    """Load migrations from the packaged `sql` directory sorted by version.
 
+    The packaged scripts are read and checksummed once per process; call
+    ``load_migrations.cache_clear()`` after changing them in place.
+    """
+
+    return list(_read_migrations())
+
+
+@functools.lru_cache(maxsize=1)
+def _read_migrations() -> Tuple[Migration, ...]:
     base = files(MIGRATION_PACKAGE)
     migrations: List[Migration] = []
     for entry in base.iterdir():
@@ -79,7 +89,10 @@ def load_migrations() -> List[Migration]:
         )
 
     migrations.sort(key=lambda m: int(m.version))
-    return migrations
+    return tuple(migrations)
+
+
+load_migrations.cache_clear = _read_migrations.cache_clear  # type: ignore[attr-defined]
 
 
 def _get_connection(
@@ -128,13 +141,18 @@ def apply_migrations(
     conninfo: Optional[str] = None,
     target_version: Optional[str] = None,
     dry_run: bool = False,
+    migrations: Optional[Sequence[Migration]] = None,
 ) -> List[Migration]:
     """Apply outstanding migrations up to the optional target version.
 
+    ``migrations`` defaults to :func:`load_migrations`; pass a preloaded list to
+    skip reading the packaged scripts.
+
     Returns the list of migrations that were executed (or would be executed in dry-run).
     """
 
-    migrations = load_migrations()
+    if migrations is None:
+        migrations = load_migrations()
     connection, should_close = _get_connection(conn, conninfo)
     executed: List[Migration] = []
 
@@ -174,10 +192,13 @@ def rollback_last(
     conn: Optional[Connection] = None,
     conninfo: Optional[str] = None,
     dry_run: bool = False,
+    migrations: Optional[Sequence[Migration]] = None,
 ) -> Optional[Migration]:
     """Rollback the most recently applied migration using its down script."""
 
-    migrations = {migration.version: migration for migration in load_migrations()}
+    if migrations is None:
+        migrations = load_migrations()
+    by_version = {migration.version: migration for migration in migrations}
     connection, should_close = _get_connection(conn, conninfo)
 
     try:
@@ -192,7 +213,7 @@ def rollback_last(
             return None
 
         version, checksum = row
-        migration = migrations.get(version)
+        migration = by_version.get(version)
         if migration is None:
             raise MigrationNotFound(f"No migration files found for version {version}")
         if migration.checksum != checksum:
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import logging.handlers
+import queue
 import threading
 import time
 from dataclasses import dataclass, field
@@ -12,6 +15,11 @@ from typing import Dict, List, Optional, Tuple
 
 import paho.mqtt.client as mqtt
 
+try:  # Optional accelerator; blake2b keeps deduplication working without it
+    import xxhash
+except ImportError:  # pragma: no cover - exercised when xxhash is absent
+    xxhash = None  # type: ignore[assignment]
+
 from .alias_cache import AliasKey, AliasMap, load_alias_cache, save_alias_cache
 from .config import Settings, load_settings
 from .db import connect_from_settings
@@ -41,6 +49,16 @@ from .canary import (
 
 logger = logging.getLogger(__name__)
 
+_REQUIRED_DIMENSIONS = ("country", "business_unit", "plant")
+_BIRTH_TYPES = frozenset({"NBIRTH", "DBIRTH"})
+
+
+def _payload_digest(payload: bytes) -> int:
+    """Return a 64-bit digest used to recognise republished birth payloads."""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(payload)
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "big")
+
 
 @dataclass
 class SparkplugSubscriber:
@@ -51,19 +69,29 @@ class SparkplugSubscriber:
     repository: Optional[MetadataRepository] = None
     _last_rebirth_request: Dict[AliasKey, float] = field(default_factory=dict)
     _db_connection: Optional[object] = field(default=None, init=False, repr=False)
+    _birth_digests: Dict[AliasKey, int] = field(
+        default_factory=dict, init=False, repr=False
+    )
 
     def __post_init__(self) -> None:
+        # Settings are frozen, so per-message lookups can use cached copies.
+        self._jsonl_enabled = self.settings.write_jsonl
+        self._jsonl_pattern = self.settings.jsonl_pattern
+        self._jsonl_paths: Dict[str, Path] = {}
+        self._db_mode_local = self.settings.db_mode == "local"
+        self._auto_rebirth = self.settings.auto_request_rebirth
+        self._rebirth_throttle = self.settings.rebirth_throttle_seconds
         self.alias_maps = load_alias_cache(self.settings.alias_cache_path)
         self.client = self._build_client()
         self._db_connection = None
-        if self.repository is None and self.settings.db_mode == "local":
+        if self.repository is None and self._db_mode_local:
             self._initialise_repository()
 
     def _initialise_repository(self) -> None:
         try:
             conn = connect_from_settings(self.settings)
         except Exception as exc:
-            print(f"[db] connection failed: {exc}")
+            logger.warning("[db] connection failed: %s", exc)
             return
         self._db_connection = conn
         self.repository = MetadataRepository(conn)
@@ -115,13 +143,13 @@ class SparkplugSubscriber:
                 (self.settings.topic_nbirth_all, 0),
                 (self.settings.topic_dbirth_all, 0),
             ]
-            print(
-                "connected - subscribing to:",
+            logger.info(
+                "connected - subscribing to: %s",
                 ", ".join(topic for topic, _ in subscriptions),
             )
             client.subscribe(subscriptions)
         else:
-            print("connect failed - rc:", rc, "(", reason_code, ")")
+            logger.warning("connect failed - rc: %s (%s)", rc, reason_code)
 
     def on_disconnect(
         self,
@@ -136,9 +164,12 @@ class SparkplugSubscriber:
         reason_string = (
             getattr(properties, "ReasonString", None) if properties else None
         )
-        detail = f", reason={reason_string}" if reason_string else ""
-        print(
-            f"disconnected: rc={rc} ({reason_code}){detail}, flags={disconnect_flags}"
+        logger.info(
+            "disconnected: rc=%s (%s)%s, flags=%s",
+            rc,
+            reason_code,
+            f", reason={reason_string}" if reason_string else "",
+            disconnect_flags,
         )
 
     def on_message(self, client: mqtt.Client, userdata, msg) -> None:
@@ -148,10 +179,21 @@ class SparkplugSubscriber:
             return
         group, msg_type, edge_node, device = parts
 
+        birth_key: Optional[AliasKey] = None
+        birth_digest = 0
+        if msg_type in _BIRTH_TYPES:
+            birth_key = self._key(
+                group, edge_node, device if msg_type == "DBIRTH" else None
+            )
+            birth_digest = _payload_digest(msg.payload)
+            if self._birth_digests.get(birth_key) == birth_digest:
+                logger.debug("skipping unchanged %s on topic %s", msg_type, msg.topic)
+                return
+
         try:
             payload = decode_sparkplug_payload(msg.payload)
         except Exception as exc:  # noqa: BLE001 - log and continue consuming
-            print("decode error:", exc)
+            logger.warning("decode error on topic %s: %s", msg.topic, exc)
             return
 
         device_uns_path = None
@@ -162,35 +204,26 @@ class SparkplugSubscriber:
                 device=device,
             )
         except ValueError as exc:
-            print(f"uns path device error for topic {msg.topic}: {exc}")
+            logger.warning("uns path device error for topic %s: %s", msg.topic, exc)
 
         if msg_type == "NBIRTH":
             self._ingest_birth(group, edge_node, None, payload)
         elif msg_type == "DBIRTH":
             self._ingest_birth(group, edge_node, device, payload)
 
-        metrics = []
         device_for_alias = device if msg_type.startswith("D") else None
-        for metric in payload.metrics:
-            metrics.append(
-                {
-                    "name": self._resolve_name(
-                        client, group, edge_node, device_for_alias, metric
-                    ),
-                    "value": self._metric_value(metric),
-                    "datatype": int(getattr(metric, "datatype", 0)),
-                    "ts": (
-                        int(getattr(metric, "timestamp", 0))
-                        if hasattr(metric, "timestamp")
-                        else None
-                    ),
-                    "props": (
-                        self._props_to_dict(metric.properties)
-                        if hasattr(metric, "properties")
-                        else {}
-                    ),
-                }
-            )
+        metrics: List[Dict[str, object]] = [
+            {
+                "name": self._resolve_name(
+                    client, group, edge_node, device_for_alias, metric
+                ),
+                "value": self._metric_value(metric),
+                "datatype": int(metric.datatype),
+                "ts": int(metric.timestamp),
+                "props": self._props_to_dict(metric.properties),
+            }
+            for metric in payload.metrics
+        ]
 
         for metric in metrics:
             metric_name = metric.get("name", "")
@@ -204,12 +237,10 @@ class SparkplugSubscriber:
                 metric["uns_path"] = metric_uns_path
                 metric["canary_id"] = metric_path_to_canary_id(metric_uns_path)
             except ValueError as exc:
-                print(
-                    "uns path metric error for",  # noqa: T201 - debug log
+                logger.warning(
+                    "uns path metric error for %s on topic %s: %s",
                     metric_name,
-                    "on topic",
                     msg.topic,
-                    ":",
                     exc,
                 )
 
@@ -218,8 +249,12 @@ class SparkplugSubscriber:
             "device_uns_path": device_uns_path,
             "metrics": metrics,
         }
-        self._persist_frame(group, edge_node, device, frame)
-        self._write_jsonl(msg.topic, frame)
+        persisted = self._persist_frame(group, edge_node, device, frame)
+        written = self._write_jsonl(msg.topic, frame)
+        if birth_key is not None and persisted and written:
+            # Only a fully handled birth may suppress identical redeliveries;
+            # after a failed write the next rebirth must be processed again.
+            self._birth_digests[birth_key] = birth_digest
 
     # Helpers ------------------------------------------------------------
     @staticmethod
@@ -250,71 +285,68 @@ class SparkplugSubscriber:
             return {"columns": list(dataset.columns), "rows": rows}
         return getattr(metric, value_kind) if value_kind else None
 
-    def _props_to_dict(self, props_set) -> Dict[str, object]:
+    @staticmethod
+    def _props_to_dict(props_set) -> Dict[str, object]:
         result: Dict[str, object] = {}
-        if not hasattr(props_set, "keys"):
+        if props_set is None or not props_set.keys:
             return result
         try:
-            for key, value in zip(props_set.keys, props_set.values):
-                kind = value.WhichOneof("value")
-                if kind == "propertyset_value":
-                    result[key] = self._props_to_dict(getattr(value, kind))
-                elif kind == "propertysets_value":
-                    result[key] = [
-                        self._props_to_dict(item)
-                        for item in getattr(value, kind).propertyset
-                    ]
-                else:
-                    result[key] = getattr(value, kind) if kind else None
-        except Exception as exc:  # noqa: BLE001 - noisy data should not break ingestion
-            print(f"[props] failed to parse properties: {exc}")
+            for key, value in zip(props_set.keys, props_set.values, strict=True):
+                try:
+                    result[key] = SparkplugSubscriber._property_value(value)
+                except Exception as exc:  # noqa: BLE001 - skip only the bad property
+                    logger.warning("[props] failed to parse property %s: %s", key, exc)
+        except ValueError:
+            logger.warning(
+                "[props] property set has %d keys but %d values",
+                len(props_set.keys),
+                len(props_set.values),
+            )
         return result
 
+    @staticmethod
+    def _property_value(value) -> object:
+        kind = value.WhichOneof("value")
+        if kind == "propertyset_value":
+            return SparkplugSubscriber._props_to_dict(value.propertyset_value)
+        if kind == "propertysets_value":
+            return [
+                SparkplugSubscriber._props_to_dict(item)
+                for item in value.propertysets_value.propertyset
+            ]
+        return getattr(value, kind) if kind else None
+
     def _persist_frame(
         self,
         group: str,
         edge_node: str,
         device: Optional[str],
         frame: Dict[str, object],
-    ) -> None:
-        if self.repository is None or self.settings.db_mode != "local":
-            return
+    ) -> bool:
+        """Write the frame's device, metrics and properties to the repository.
+
+        Returns ``False`` when the frame should have been persisted but was
+        not (no repository, missing dimensions or a repository error), so the
+        caller can process an identical redelivery again.
+        """
+        if not self._db_mode_local:
+            return True
+        if self.repository is None:
+            return False
         device_uns_path = frame.get("device_uns_path")
         metrics = frame.get("metrics") or []
         if not device or not device_uns_path:
-            return
+            return True
 
-        try:
-            country = self._extract_dimension(metrics, "country", default="").strip()
-            if not country:
-                raise ValueError("missing required 'country' dimension")
-        except Exception as exc:
-            print(f"[db] {exc}; skipping persistence for this frame")
-            return
-
-        try:
-            business_unit = self._extract_dimension(
-                metrics, "business_unit", default=""
-            ).strip()
-            if not business_unit:
-                raise ValueError("missing required 'business_unit' dimension")
-        except Exception as exc:
-            print(f"[db] {exc}; skipping persistence for this frame")
-            return
-
-        try:
-            plant = self._extract_dimension(metrics, "plant", default="").strip()
-            if not plant:
-                raise ValueError("missing required 'plant' dimension")
-        except Exception as exc:
-            print(f"[db] {exc}; skipping persistence for this frame")
-            return
+        dims = self._extract_required_dims(metrics, _REQUIRED_DIMENSIONS)
+        if dims is None:
+            return False
 
         device_payload = DevicePayload(
             group_id=group,
-            country=country,
-            business_unit=business_unit,
-            plant=plant,
+            country=dims["country"],
+            business_unit=dims["business_unit"],
+            plant=dims["plant"],
             edge=edge_node,
             device=device,
             uns_path=device_uns_path,
@@ -325,7 +357,7 @@ class SparkplugSubscriber:
                 device_record = device_result.record
                 device_id = device_record.get("device_id")
                 if not device_id:
-                    return
+                    return False
 
                 metric_payloads = []
                 for metric in metrics:
@@ -337,7 +369,7 @@ class SparkplugSubscriber:
                     try:
                         metric_datatype = self._metric_datatype(metric.get("datatype"))
                     except Exception as exc:
-                        print(f"[db] {exc}; skipping metric {metric_name}")
+                        logger.warning("[db] %s; skipping metric %s", exc, metric_name)
                         continue
 
                     metric_payloads.append(
@@ -350,7 +382,7 @@ class SparkplugSubscriber:
                     )
 
                 if not metric_payloads:
-                    return
+                    return True
 
                 metric_id_map = self.repository.upsert_metrics_bulk(metric_payloads)
 
@@ -371,14 +403,18 @@ class SparkplugSubscriber:
                         property_payloads.append(prop_payload)
 
                 if property_payloads:
-                    self.repository.upsert_metric_properties_bulk(
+                    self.repository.copy_metric_properties(
                         property_payloads, manage_transaction=False
                     )
 
         except RepositoryError as exc:
-            print(
-                f"[db] persistence failed for frame on topic {frame.get('topic')}: {exc}"
+            logger.warning(
+                "[db] persistence failed for frame on topic %s: %s",
+                frame.get("topic"),
+                exc,
             )
+            return False
+        return True
 
     @staticmethod
     def _metric_datatype(raw: object) -> str:
@@ -393,21 +429,34 @@ class SparkplugSubscriber:
         raise ValueError("missing or invalid 'datatype' for metric")
 
     @staticmethod
-    def _extract_dimension(
-        metrics: List[Dict[str, object]], key: str, default: str
-    ) -> str:
-        target = key.lower()
+    def _extract_required_dims(
+        metrics: List[Dict[str, object]], keys: Tuple[str, ...]
+    ) -> Optional[Dict[str, str]]:
+        """Collect the required device dimensions in a single pass over metrics.
+
+        The first non-empty value for each key wins. Returns ``None`` when any
+        key is missing so callers can skip persistence without raising.
+        """
+        dims: Dict[str, str] = {}
         for metric in metrics:
             name = str(metric.get("name", "")).lower()
-            if name == target:
-                value = metric.get("value")
-                if isinstance(value, str):
-                    stripped = value.strip()
-                    if stripped:
-                        return stripped
-                elif value is not None:
-                    return str(value)
-        return default
+            if name not in keys or name in dims:
+                continue
+            value = metric.get("value")
+            if value is None:
+                continue
+            text = str(value).strip()
+            if text:
+                dims[name] = text
+        for key in keys:
+            if key not in dims:
+                logger.debug(
+                    "[db] missing required '%s' dimension; skipping persistence "
+                    "for this frame",
+                    key,
+                )
+                return None
+        return dims
 
     @staticmethod
     def _build_property_payload(
@@ -437,16 +486,21 @@ class SparkplugSubscriber:
             )
         return None
 
-    def _write_jsonl(self, topic: str, frame: Dict[str, object]) -> None:
-        if not self.settings.write_jsonl:
-            return
-        topic_slug = topic.replace("/", "_")
-        path = Path(self.settings.jsonl_pattern.format(topic=topic_slug))
+    def _write_jsonl(self, topic: str, frame: Dict[str, object]) -> bool:
+        if not self._jsonl_enabled:
+            return True
+        path = self._jsonl_paths.get(topic)
+        if path is None:
+            topic_slug = topic.replace("/", "_")
+            path = Path(self._jsonl_pattern.format(topic=topic_slug))
+            self._jsonl_paths[topic] = path
         try:
             with path.open("a", encoding="utf-8") as handle:
                 handle.write(json.dumps(frame, ensure_ascii=False) + "\n")
         except Exception as exc:  # noqa: BLE001 - best effort logging only
-            print(f"[jsonl] write failed: {exc}")
+            logger.warning("[jsonl] write failed: %s", exc)
+            return False
+        return True
 
     def _key(self, group: str, edge_node: str, device: Optional[str]) -> AliasKey:
         return group, edge_node, device
@@ -462,15 +516,15 @@ class SparkplugSubscriber:
     def _may_request_rebirth(
         self, client: mqtt.Client, group: str, edge_node: str, device: Optional[str]
     ) -> None:
-        if not self.settings.auto_request_rebirth:
+        if not self._auto_rebirth:
             return
         now = time.time()
         throttle_key = self._key(group, edge_node, device)
         last_request = self._last_rebirth_request.get(throttle_key, 0)
-        if now - last_request < self.settings.rebirth_throttle_seconds:
+        if now - last_request < self._rebirth_throttle:
             return
         topic = f"spBv1.0/{group}/{edge_node}/command/rebirth"
-        print(f"requesting rebirth for {group}/{edge_node}/{device or '*'}")
+        logger.info("requesting rebirth for %s/%s/%s", group, edge_node, device or "*")
         client.publish(topic, payload=b"")
         self._last_rebirth_request[throttle_key] = now
 
@@ -483,18 +537,14 @@ class SparkplugSubscriber:
     ) -> None:
         alias_map = self._ensure_map(group, edge_node, device)
         for metric in payload.metrics:
-            alias = int(getattr(metric, "alias", 0))
-            name = getattr(metric, "name", "")
+            alias = int(metric.alias)
+            name = metric.name
             if alias <= 0 or not name:
                 continue
             alias_map[alias] = {
                 "name": name,
-                "datatype": int(getattr(metric, "datatype", 0)),
-                "props": (
-                    self._props_to_dict(getattr(metric, "properties", None))
-                    if hasattr(metric, "properties")
-                    else {}
-                ),
+                "datatype": int(metric.datatype),
+                "props": self._props_to_dict(metric.properties),
             }
 
     def _resolve_name(
@@ -517,7 +567,7 @@ class SparkplugSubscriber:
         ):
             alias_map = self.alias_maps.get(lookup)
             if alias_map and alias in alias_map:
-                return alias_map[alias]["name"]
+                return str(alias_map[alias]["name"])
         self._may_request_rebirth(client, group, edge_node, device)
         return f"alias:{alias}"
 
@@ -683,13 +733,36 @@ class ServiceRuntime:
         )
 
 
+def _configure_logging() -> Optional[logging.handlers.QueueListener]:
+    """Route root logging through a queue so handler I/O runs off the ingest thread.
+
+    Returns the started listener, or ``None`` when logging was already
+    configured by the embedding application.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s - %(message)s")
+    )
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
 def main() -> None:
     """Entrypoint used by both python -m and the console script hook."""
-    if not logging.getLogger().handlers:
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s %(levelname)s %(name)s - %(message)s",
-        )
-    settings = load_settings()
-    runtime = ServiceRuntime(settings)
-    runtime.run()
+    listener = _configure_logging()
+    try:
+        settings = load_settings()
+        runtime = ServiceRuntime(settings)
+        runtime.run()
+    finally:
+        if listener is not None:
+            listener.stop()
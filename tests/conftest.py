@@ -7,6 +7,10 @@ developer to export them manually in the shell.
 
 from __future__ import annotations
 
+import sys
+import types
+from pathlib import Path
+
 import pytest
 
 
@@ -17,6 +21,22 @@ except Exception:  # pragma: no cover - fallback when dotenv is missing
     def load_dotenv(*_args, **_kwargs):  # type: ignore[no-redef]
         return False
 
+    # ``uns_metadata_sync.config`` imports dotenv at module level; register the
+    # no-op once here instead of shimming it in individual test modules.
+    sys.modules.setdefault("dotenv", types.SimpleNamespace(load_dotenv=load_dotenv))
+
+_UNIT_DIR = Path(__file__).parent / "unit"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items) -> None:
+    # Everything under tests/unit is a unit test; mark it here so ``-m unit``
+    # selection does not depend on per-function decorators.
+    unit = pytest.mark.unit
+    for item in items:
+        if _UNIT_DIR in item.path.parents:
+            item.add_marker(unit)
+
 
 @pytest.fixture(scope="session", autouse=True)
 def _load_dotenv_for_tests() -> None:
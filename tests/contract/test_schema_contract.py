@@ -1,5 +1,6 @@
 import json
 import re
+from functools import lru_cache
 from importlib.resources import files
 from pathlib import Path
 
@@ -7,39 +8,40 @@ import pytest
 
 CONTRACT_PATH = Path("docs/contracts/postgres_schema.json")
 
+_SCHEMA_OBJECT_RE = re.compile(
+    r"CREATE (?:"
+    r"TABLE IF NOT EXISTS (?P<tables>[\w\.]+)"
+    r"|INDEX IF NOT EXISTS (?P<indexes>\w+)"
+    r"|TRIGGER (?P<triggers>\w+)"
+    r"|TYPE (?P<types>[\w\.]+) AS ENUM"
+    r"|PUBLICATION (?P<publications>\w+)"
+    r")"
+)
+
+_MIGRATION_FILES = ("000_schema_migrations.up.sql", "001_release_1_1_schema.up.sql")
+
+
+@lru_cache(maxsize=None)
+def _load_contract():
+    return json.loads(CONTRACT_PATH.read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=None)
+def _load_migration_sql():
+    package = files("uns_metadata_sync.migrations.sql")
+    return "\n".join((package / name).read_text() for name in _MIGRATION_FILES)
+
 
 @pytest.mark.contract
 def test_schema_contract_matches_migration_sql():
-    contract = json.loads(CONTRACT_PATH.read_text(encoding="utf-8"))
-
-    ledger_sql = (
-        files("uns_metadata_sync.migrations.sql") / "000_schema_migrations.up.sql"
-    ).read_text()
-    schema_sql = (
-        files("uns_metadata_sync.migrations.sql") / "001_release_1_1_schema.up.sql"
-    ).read_text()
-    combined_sql = "\n".join([ledger_sql, schema_sql])
-
-    def extract(pattern):
-        return sorted(set(re.findall(pattern, combined_sql)))
-
-    tables = sorted(
-        {
-            *extract(r"CREATE TABLE IF NOT EXISTS ([\w\.]+)"),
-        }
-    )
-    indexes = extract(r"CREATE INDEX IF NOT EXISTS (\w+)")
-    triggers = extract(r"CREATE TRIGGER (\w+)")
-    types = extract(r"CREATE TYPE ([\w\.]+) AS ENUM")
-    publications = extract(r"CREATE PUBLICATION (\w+)")
-
-    expected = {
-        "tables": tables,
-        "indexes": indexes,
-        "triggers": triggers,
-        "types": types,
-        "publications": publications,
-    }
+    contract = _load_contract()
+    combined_sql = _load_migration_sql()
+
+    buckets = {name: set() for name in _SCHEMA_OBJECT_RE.groupindex}
+    for match in _SCHEMA_OBJECT_RE.finditer(combined_sql):
+        buckets[match.lastgroup].add(match.group(match.lastgroup))
+
+    expected = {key: sorted(names) for key, names in buckets.items()}
 
     for key, parsed in expected.items():
         assert contract[key] == parsed, f"Schema contract mismatch for {key}: {parsed}"
@@ -0,0 +1,199 @@
+"""Shared fixtures for the live-Postgres integration tests."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+import pytest
+
+try:
+    from uns_metadata_sync.db import Connection, connect, sql
+except ImportError:  # pragma: no cover - optional dependency
+    Connection = None
+    connect = None
+    sql = None
+
+from uns_metadata_sync.migrations.runner import apply_migrations
+
+# The run id keeps concurrent non-xdist runs against one server from sharing,
+# and dropping, each other's template.
+TEMPLATE_DB = (
+    f"uns_meta_template_{os.getenv('PYTEST_XDIST_WORKER', 'main')}"
+    f"_{uuid.uuid4().hex[:8]}"
+)
+
+# Durability is irrelevant for throw-away test data; logical WAL keeps the CDC
+# tests runnable against the ephemeral cluster.
+_EPHEMERAL_SERVER_SETTINGS = {
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+    "wal_level": "logical",
+    "listen_addresses": "localhost",
+}
+
+
+def _drop_template(admin_conn) -> None:
+    identifier = sql.Identifier(TEMPLATE_DB)
+    exists = admin_conn.execute(
+        "SELECT 1 FROM pg_database WHERE datname = %s", (TEMPLATE_DB,)
+    ).fetchone()
+    if not exists:
+        return
+    admin_conn.execute(
+        sql.SQL("ALTER DATABASE {} IS_TEMPLATE = false").format(identifier)
+    )
+    admin_conn.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(identifier))
+
+
+def _pg_binary(name: str) -> Optional[str]:
+    return shutil.which(name, path=os.getenv("PG_BINDIR")) or shutil.which(name)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _ephemeral_postgres() -> Iterator[None]:
+    """Boot a throw-away cluster on tmpfs when ``PG_EPHEMERAL_CLUSTER=1``.
+
+    The cluster runs with fsync and synchronous commit disabled and the
+    ``PG*``/``DB_MODE`` variables are pointed at it for the whole session.
+    Without the flag the suite uses whatever Postgres the environment names.
+    """
+    if os.getenv("PG_EPHEMERAL_CLUSTER", "").lower() not in {"1", "true", "yes"}:
+        yield
+        return
+
+    initdb = _pg_binary("initdb")
+    pg_ctl = _pg_binary("pg_ctl")
+    if initdb is None or pg_ctl is None:
+        raise RuntimeError(
+            "PG_EPHEMERAL_CLUSTER needs initdb and pg_ctl on PATH or in PG_BINDIR"
+        )
+
+    shm = Path("/dev/shm")
+    base_dir = shm if shm.is_dir() and os.access(shm, os.W_OK) else None
+    data_dir = Path(tempfile.mkdtemp(prefix="uns_meta_pg_", dir=base_dir))
+    port = _free_port()
+    settings = {
+        **_EPHEMERAL_SERVER_SETTINGS,
+        "port": str(port),
+        "unix_socket_directories": str(data_dir),
+    }
+    options = " ".join(f"-c {key}={value}" for key, value in settings.items())
+
+    try:
+        subprocess.run(
+            [initdb, "-D", str(data_dir), "-U", "postgres", "-A", "trust"]
+            + ["-E", "UTF8", "--no-sync"],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [pg_ctl, "-D", str(data_dir), "-o", options, "-w", "start"]
+            + ["-l", str(data_dir / "server.log")],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            with pytest.MonkeyPatch.context() as env:
+                env.setenv("DB_MODE", "local")
+                env.setenv("PGHOST", "localhost")
+                env.setenv("PGPORT", str(port))
+                env.setenv("PGUSER", "postgres")
+                env.setenv("PGPASSWORD", "postgres")
+                env.setenv("PGDATABASE", "uns_metadata")
+                bootstrap = connect(
+                    host="localhost", port=port, user="postgres", dbname="postgres"
+                )
+                try:
+                    bootstrap.execute("CREATE DATABASE uns_metadata")
+                finally:
+                    bootstrap.close()
+                yield
+        finally:
+            subprocess.run(
+                [pg_ctl, "-D", str(data_dir), "-m", "immediate", "stop"],
+                check=False,
+                capture_output=True,
+            )
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def admin_conn() -> Iterator[Callable[..., Connection]]:
+    """Return a factory for one shared autocommit connection to ``postgres``.
+
+    Tests call it after their own environment checks; the connection is opened
+    on first use and reused for every CREATE/DROP DATABASE in the session.
+    """
+    state: Dict[str, Connection] = {}
+
+    def _admin_conn(*, host: str, port: int, user: str, password: str) -> Connection:
+        conn = state.get("conn")
+        if conn is None or conn.closed:
+            conn = connect(
+                host=host, port=port, user=user, password=password, dbname="postgres"
+            )
+            conn.autocommit = True
+            state["conn"] = conn
+        return conn
+
+    yield _admin_conn
+
+    conn = state.get("conn")
+    if conn is not None and not conn.closed:
+        conn.close()
+
+
+@pytest.fixture(scope="session")
+def migrated_template(admin_conn) -> Iterator[Callable[..., str]]:
+    """Return a factory for a migrated template database.
+
+    The template is built on first use with ``apply_migrations`` so tests can
+    ``CREATE DATABASE ... TEMPLATE`` it, which Postgres does by copying files
+    instead of replaying the schema. Building lazily keeps tests that skip on
+    their own environment checks from touching Postgres at all.
+    """
+    admin: Dict[str, Connection] = {}
+
+    def _template(*, host: str, port: int, user: str, password: str) -> str:
+        if admin:
+            return TEMPLATE_DB
+        conn_kwargs = {"host": host, "port": port, "user": user, "password": password}
+        admin_connection = admin_conn(**conn_kwargs)
+        admin_connection.execute(
+            sql.SQL("CREATE DATABASE {} OWNER {}").format(
+                sql.Identifier(TEMPLATE_DB), sql.Identifier(user)
+            )
+        )
+        with connect(dbname=TEMPLATE_DB, **conn_kwargs) as conn:
+            apply_migrations(conn=conn)
+        # The migration connection must be gone before the database can be
+        # used as a template.
+        conn.close()
+        admin_connection.execute(
+            sql.SQL("ALTER DATABASE {} IS_TEMPLATE = true").format(
+                sql.Identifier(TEMPLATE_DB)
+            )
+        )
+        admin["conn"] = admin_connection
+        return TEMPLATE_DB
+
+    yield _template
+
+    admin_connection = admin.get("conn")
+    if admin_connection is not None and not admin_connection.closed:
+        _drop_template(admin_connection)
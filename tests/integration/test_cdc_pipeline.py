@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import itertools
 import json
+import logging
 import os
+import re
 import time
 import uuid
-from dataclasses import dataclass
-from typing import Dict, Iterable, Iterator, List, Optional
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
 
 import pytest
 
+try:  # Optional faster parser; orjson.JSONDecodeError subclasses json's
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None  # type: ignore[assignment]
+
 try:
     from uns_metadata_sync.db import (
         Error,
@@ -47,9 +56,39 @@ from uns_metadata_sync.db.repository import (
 )
 from uns_metadata_sync.migrations.runner import apply_migrations
 
-
 pytestmark = pytest.mark.integration
 
+logger = logging.getLogger(__name__)
+
+_WORKER = os.getenv("PYTEST_XDIST_WORKER", "main")
+_DB_PREFIX = f"uns_meta_cdc_{_WORKER}_"
+_SLOT_PREFIX = f"uns_meta_slot_{_WORKER}_"
+# Runs outside xdist all share the "main" worker name; the run id keeps their
+# databases and slots apart while the sweep still matches on the prefix.
+_RUN_ID = uuid.uuid4().hex[:8]
+_name_counter = itertools.count()
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# format-version 2 writes "action" first, so B/C frames are recognised
+# without parsing the rest of the row.
+_WAL2JSON_ACTION_RE = re.compile(r'\s*\{\s*"action"\s*:\s*"(\w)"')
+
+# wal2json carries no per-column flags; every column shares this read-only map.
+_EMPTY_FLAGS = MappingProxyType({})
+
+_WAL2JSON_KINDS = {"I": "insert", "U": "update", "D": "delete"}
+
+
+@dataclass
+class _CDCDatabase:
+    conn_params: Dict[str, object]
+    dsn: str
+    host: str
+    port: int
+    db_name: str
+    db_user: str
+    db_password: str
+
 
 @dataclass
 class _CDCEnv:
@@ -63,37 +102,91 @@ class _CDCEnv:
     db_password: str
 
 
-@pytest.fixture()
-def cdc_environment() -> Iterable[_CDCEnv]:
+def _admin_conn_kwargs() -> Optional[Dict[str, object]]:
+    admin_user = os.getenv("PGUSER")
+    admin_password = os.getenv("PGPASSWORD")
+    if not admin_user or admin_password is None:
+        return None
+    return {
+        "host": os.getenv("PGHOST", "localhost"),
+        "port": int(os.getenv("PGPORT", "5432")),
+        "user": admin_user,
+        "password": admin_password,
+    }
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _sweep_orphaned_cdc_objects() -> None:
+    """Drop slots and databases leaked by crashed runs of this worker.
+
+    Only inactive slots on databases without sessions, and databases without
+    sessions, are dropped; names carry a per-run id, so a concurrent run
+    against the same server never reuses a swept name.
+    """
+    conn_kwargs = _admin_conn_kwargs()
+    if connect is None or conn_kwargs is None:
+        return
+
+    try:
+        admin_conn = connect(dbname="postgres", **conn_kwargs)
+    except Error as exc:
+        logger.warning("skipping CDC orphan sweep: %s", exc)
+        return
+    admin_conn.autocommit = True
+    try:
+        cursor = admin_conn.execute(
+            "SELECT s.slot_name FROM pg_replication_slots s "
+            "WHERE NOT s.active AND starts_with(s.slot_name, %s) AND NOT EXISTS ("
+            "SELECT 1 FROM pg_stat_activity a WHERE a.datname = s.database)",
+            (_SLOT_PREFIX,),
+        )
+        for (slot_name,) in cursor.fetchall():
+            try:
+                admin_conn.execute("SELECT pg_drop_replication_slot(%s)", (slot_name,))
+            except Error as exc:
+                logger.warning("could not drop orphaned slot %s: %s", slot_name, exc)
+
+        cursor = admin_conn.execute(
+            "SELECT d.datname FROM pg_database d "
+            "WHERE starts_with(d.datname, %s) AND NOT EXISTS ("
+            "SELECT 1 FROM pg_stat_activity a WHERE a.datname = d.datname)",
+            (_DB_PREFIX,),
+        )
+        for (db_name,) in cursor.fetchall():
+            # No FORCE: a session that connected since the check keeps it.
+            try:
+                admin_conn.execute(
+                    sql.SQL("DROP DATABASE IF EXISTS {}").format(
+                        sql.Identifier(db_name)
+                    )
+                )
+            except Error as exc:
+                logger.warning("could not drop orphaned database %s: %s", db_name, exc)
+    finally:
+        admin_conn.close()
+
+
+@pytest.fixture(scope="session")
+def cdc_database() -> Iterable[_CDCDatabase]:
+    """Create and migrate one throw-away database shared by the CDC tests."""
     if connect is None or LogicalReplicationConnection is None:
         pytest.skip(
             "psycopg with replication extras is required for CDC integration test"
         )
 
-    host = os.getenv("PGHOST", "localhost")
-    port = int(os.getenv("PGPORT", "5432"))
-    admin_user = os.getenv("PGUSER")
-    admin_password = os.getenv("PGPASSWORD")
-
-    if not admin_user or admin_password is None:
+    base_conn_kwargs = _admin_conn_kwargs()
+    if base_conn_kwargs is None:
         pytest.skip("PGUSER and PGPASSWORD must be configured for CDC integration test")
 
-    db_name = f"uns_meta_cdc_{uuid.uuid4().hex[:8]}"
-    slot_name = f"uns_meta_slot_{uuid.uuid4().hex[:8]}"
-    base_conn_kwargs = {
-        "host": host,
-        "port": port,
-        "user": admin_user,
-        "password": admin_password,
-    }
+    host = base_conn_kwargs["host"]
+    port = base_conn_kwargs["port"]
+    admin_user = base_conn_kwargs["user"]
+    admin_password = base_conn_kwargs["password"]
+    db_name = f"{_DB_PREFIX}{_RUN_ID}_{next(_name_counter)}"
 
     admin_conn = connect(dbname="uns_metadata", **base_conn_kwargs)
     admin_conn.autocommit = True
     try:
-        admin_conn.execute(
-            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-            (db_name,),
-        )
         admin_conn.execute(
             sql.SQL("CREATE DATABASE {} OWNER {}").format(
                 sql.Identifier(db_name),
@@ -103,29 +196,12 @@ def cdc_environment() -> Iterable[_CDCEnv]:
     finally:
         admin_conn.close()
 
-    slot_created = False
     try:
         with connect(dbname=db_name, **base_conn_kwargs) as conn:
             apply_migrations(conn=conn)
 
-        with connect(dbname=db_name, **base_conn_kwargs) as repl_conn:
-            repl_conn.autocommit = True
-            try:
-                repl_conn.execute(
-                    "SELECT slot_name FROM pg_create_logical_replication_slot(%s, 'wal2json')",
-                    (slot_name,),
-                )
-                slot_created = True
-            except errors.UndefinedFile:
-                pytest.skip(
-                    "wal2json output plugin is not installed in the Postgres instance"
-                )
-            except Error as exc:
-                pytest.skip(f"unable to create wal2json replication slot: {exc}")
-
-        yield _CDCEnv(
+        yield _CDCDatabase(
             conn_params={**base_conn_kwargs, "dbname": db_name},
-            slot_name=slot_name,
             dsn=(
                 f"host={host} port={port} dbname={db_name} "
                 f"user={admin_user} password={admin_password}"
@@ -137,31 +213,77 @@ def cdc_environment() -> Iterable[_CDCEnv]:
             db_password=admin_password,
         )
     finally:
-        if connect is not None:
-            if slot_created:
-                with connect(dbname=db_name, **base_conn_kwargs) as conn:
-                    conn.autocommit = True
-                    try:
-                        conn.execute(
-                            "SELECT pg_drop_replication_slot(%s)",
-                            (slot_name,),
-                        )
-                    except Error:
-                        conn.rollback()
-            with connect(dbname="postgres", **base_conn_kwargs) as cleanup:
-                cleanup.autocommit = True
-                cleanup.execute(
-                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-                    (db_name,),
-                )
-                cleanup.execute(
-                    sql.SQL("DROP DATABASE IF EXISTS {}").format(
-                        sql.Identifier(db_name)
-                    )
+        with connect(dbname="postgres", **base_conn_kwargs) as cleanup:
+            cleanup.autocommit = True
+            # WITH (FORCE) terminates lingering sessions in the same statement.
+            cleanup.execute(
+                sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(
+                    sql.Identifier(db_name)
                 )
+            )
+
+
+@pytest.fixture()
+def cdc_environment(cdc_database: _CDCDatabase) -> Iterable[_CDCEnv]:
+    """Provide a fresh wal2json replication slot on the shared CDC database."""
+    slot_name = f"{_SLOT_PREFIX}{_RUN_ID}_{next(_name_counter)}"
+
+    with connect(**cdc_database.conn_params) as repl_conn:
+        repl_conn.autocommit = True
+        try:
+            repl_conn.execute(
+                "SELECT slot_name FROM pg_create_logical_replication_slot(%s, 'wal2json')",
+                (slot_name,),
+            )
+        except errors.UndefinedFile:
+            pytest.skip(
+                "wal2json output plugin is not installed in the Postgres instance"
+            )
+        except Error as exc:
+            pytest.skip(f"unable to create wal2json replication slot: {exc}")
+
+    try:
+        yield _CDCEnv(
+            conn_params=cdc_database.conn_params,
+            slot_name=slot_name,
+            dsn=cdc_database.dsn,
+            host=cdc_database.host,
+            port=cdc_database.port,
+            db_name=cdc_database.db_name,
+            db_user=cdc_database.db_user,
+            db_password=cdc_database.db_password,
+        )
+    finally:
+        with connect(**cdc_database.conn_params) as conn:
+            conn.autocommit = True
+            try:
+                conn.execute("SELECT pg_drop_replication_slot(%s)", (slot_name,))
+            except Error:
+                conn.rollback()
+
+
+@pytest.fixture(scope="session")
+def metadata_provider(
+    cdc_database: _CDCDatabase,
+) -> Iterable[PostgresMetadataProvider]:
+    """Share one metadata provider connection across the CDC tests."""
+    provider = PostgresMetadataProvider(
+        host=cdc_database.host,
+        port=cdc_database.port,
+        user=cdc_database.db_user,
+        password=cdc_database.db_password,
+        database=cdc_database.db_name,
+        schema="uns_meta",
+    )
+    try:
+        yield provider
+    finally:
+        provider.close()
 
 
 class ManualClock:
+    __slots__ = ("_current",)
+
     def __init__(self, start: Optional[float] = None) -> None:
         self._current = start if start is not None else time.monotonic()
 
@@ -174,40 +296,37 @@ class ManualClock:
 
 
 def _lsn_to_int(value: str) -> int:
-    upper, lower = value.split("/")
-    return (int(upper, 16) << 32) + int(lower, 16)
+    # Postgres prints the low word without zero padding (e.g. "0/16B3748").
+    upper, _, lower = value.partition("/")
+    return int(upper + lower.zfill(8), 16)
 
 
-def _normalize_wal2json_action(entry: Dict[str, object]) -> Optional[Dict[str, object]]:
-    action = entry.get("action")
-    kind_map = {"I": "insert", "U": "update", "D": "delete"}
-    kind = kind_map.get(action)
-    if kind is None:
-        return None
-    columns = entry.get("columns") or []
-    column_names: List[str] = []
-    column_values: List[object] = []
-    for column in columns:
+def _normalize_wal2json_action(entry: Dict[str, object], kind: str) -> ChangeRecord:
+    """Build a change record from a format-version 2 I/U/D row.
+
+    ``lsn`` and ``commit_timestamp`` are stamped once the commit row arrives.
+    """
+    columns: List[ChangeColumn] = []
+    for column in entry.get("columns") or []:
         if not isinstance(column, dict):
             continue
         name = column.get("name")
         if name is None:
             continue
-        column_names.append(name)
-        column_values.append(column.get("value"))
-    change: Dict[str, object] = {
-        "kind": kind,
-        "schema": entry.get("schema"),
-        "table": entry.get("table"),
-        "columnnames": column_names,
-        "columnvalues": column_values,
-    }
+        columns.append(
+            ChangeColumn(
+                name=name, value=column.get("value"), type_oid=0, flags=_EMPTY_FLAGS
+            )
+        )
     key_source = entry.get("identity") or entry.get("oldkeys") or entry.get("pk")
-    key_names: List[str] = []
-    key_values: List[object] = []
+    old_columns: List[ChangeColumn] = []
     if isinstance(key_source, dict):
-        key_names = list(key_source.get("keynames") or [])
-        key_values = list(key_source.get("keyvalues") or [])
+        key_names = key_source.get("keynames") or []
+        key_values = (key_source.get("keyvalues") or [])[: len(key_names)]
+        old_columns = [
+            ChangeColumn(name=name, value=value, type_oid=0, flags=_EMPTY_FLAGS)
+            for name, value in itertools.zip_longest(key_names, key_values)
+        ]
     elif isinstance(key_source, list):
         for item in key_source:
             if not isinstance(item, dict):
@@ -215,59 +334,34 @@ def _normalize_wal2json_action(entry: Dict[str, object]) -> Optional[Dict[str, o
             name = item.get("name")
             if name is None:
                 continue
-            key_names.append(name)
-            key_values.append(item.get("value"))
-    if key_names:
-        change["oldkeys"] = {"keynames": key_names, "keyvalues": key_values}
-    return change
-
-
-class Wal2JsonChangeDecoder:
-    def decode(self, message: ReplicationStreamMessage) -> List[ChangeRecord]:
-        payload = json.loads(message.data.decode("utf-8"))
-        changes = payload.get("change", [])
-        records: List[ChangeRecord] = []
-        for entry in changes:
-            schema = entry.get("schema")
-            table = entry.get("table")
-            relation = f"{schema}.{table}" if schema and table else table or ""
-            column_names = entry.get("columnnames") or []
-            column_values = entry.get("columnvalues") or []
-            columns = [
-                ChangeColumn(
-                    name=name,
-                    value=column_values[idx] if idx < len(column_values) else None,
-                    type_oid=0,
-                    flags={},
-                )
-                for idx, name in enumerate(column_names)
-            ]
-            oldkeys = entry.get("oldkeys") or {}
-            key_names = oldkeys.get("keynames") or []
-            key_values = oldkeys.get("keyvalues") or []
-            old_columns = [
+            old_columns.append(
                 ChangeColumn(
-                    name=key_names[idx],
-                    value=key_values[idx] if idx < len(key_values) else None,
-                    type_oid=0,
-                    flags={},
-                )
-                for idx in range(len(key_names))
-            ] or None
-            records.append(
-                ChangeRecord(
-                    kind=entry.get("kind", ""),
-                    relation=relation,
-                    columns=columns,
-                    old_columns=old_columns,
-                    lsn=message.lsn,
-                    commit_timestamp=message.commit_timestamp,
+                    name=name, value=item.get("value"), type_oid=0, flags=_EMPTY_FLAGS
                 )
             )
-        return records
+    schema = entry.get("schema")
+    table = entry.get("table")
+    return ChangeRecord(
+        kind=kind,
+        relation=f"{schema}.{table}" if schema and table else table or "",
+        columns=columns,
+        old_columns=old_columns or None,
+    )
+
 
+@dataclass(frozen=True)
+class _DecodedStreamMessage(ReplicationStreamMessage):
+    """Stream message carrying change records that are already decoded."""
 
-def _wal2json_stream_factory(dsn: str, slot_name: str):
+    records: Sequence[ChangeRecord] = ()
+
+
+class Wal2JsonChangeDecoder:
+    def decode(self, message: ReplicationStreamMessage) -> Sequence[ChangeRecord]:
+        return getattr(message, "records", ())
+
+
+def _wal2json_stream_factory(dsn: str, slot_name: str, *, max_changes: int = 1000):
     options_sql = ", ".join(
         [
             "'include-types', '1'",
@@ -281,7 +375,7 @@ def _wal2json_stream_factory(dsn: str, slot_name: str):
           FROM pg_logical_slot_get_changes(
                 %s,
                 %s,
-                NULL,
+                %s,
                 {options_sql}
           )
     """
@@ -289,57 +383,75 @@ def _wal2json_stream_factory(dsn: str, slot_name: str):
     def _factory(start_lsn: Optional[int]) -> Iterator[ReplicationStreamMessage]:
         start_pos = int_to_lsn(start_lsn) if start_lsn is not None else None
         conn = connect(dsn)  # type: ignore[arg-type]
-        conn.autocommit = True
-        cur = conn.cursor()
+        # Named cursors need an open transaction. The server still builds the
+        # whole get_changes result (and confirms the slot) before the first
+        # FETCH; the cursor only bounds client memory to itersize rows.
+        conn.autocommit = False
         try:
-            params = (slot_name, start_pos)
+            params = (slot_name, start_pos, max_changes)
             while True:
-                cur.execute(query, params)
-                rows = cur.fetchall()
-                if not rows:
-                    break
-                params = (slot_name, None)
-                pending_changes: List[Dict[str, object]] = []
-                commit_lsn: Optional[str] = None
-                for change_lsn, _, raw_data in rows:
-                    try:
-                        entry = json.loads(raw_data)
-                    except json.JSONDecodeError:
-                        continue
-                    action = entry.get("action")
-                    if action == "B":
-                        pending_changes = []
-                        commit_lsn = None
-                        continue
-                    if action == "C":
-                        commit_lsn = str(change_lsn)
-                        if pending_changes:
-                            payload = json.dumps({"change": pending_changes}).encode(
-                                "utf-8"
-                            )
-                            yield ReplicationStreamMessage(
-                                lsn=_lsn_to_int(commit_lsn),
-                                data=payload,
-                                commit_timestamp=time.time(),
-                            )
+                got_any = False
+                pending_changes: List[ChangeRecord] = []
+                with conn.cursor(name=f"wal2json_{slot_name}") as cur:
+                    cur.itersize = 1000
+                    cur.execute(query, params)
+                    for change_lsn, _, raw_data in cur:
+                        got_any = True
+                        peeked = _WAL2JSON_ACTION_RE.match(raw_data)
+                        action = peeked.group(1) if peeked else None
+                        if action not in ("B", "C"):
+                            try:
+                                entry = _json_loads(raw_data)
+                            except json.JSONDecodeError:
+                                continue
+                            action = entry.get("action")
+                        if action == "B":
                             pending_changes = []
-                        continue
-                    normalized = _normalize_wal2json_action(entry)
-                    if normalized:
-                        pending_changes.append(normalized)
+                            continue
+                        if action == "C":
+                            if pending_changes:
+                                commit_lsn = _lsn_to_int(str(change_lsn))
+                                commit_ts = time.time()
+                                yield _DecodedStreamMessage(
+                                    lsn=commit_lsn,
+                                    data=b"",
+                                    commit_timestamp=commit_ts,
+                                    records=[
+                                        replace(
+                                            record,
+                                            lsn=commit_lsn,
+                                            commit_timestamp=commit_ts,
+                                        )
+                                        for record in pending_changes
+                                    ],
+                                )
+                                pending_changes = []
+                            continue
+                        kind = _WAL2JSON_KINDS.get(action)
+                        if kind is not None:
+                            pending_changes.append(
+                                _normalize_wal2json_action(entry, kind)
+                            )
+                conn.commit()
+                if not got_any:
+                    break
+                params = (slot_name, None, max_changes)
         finally:
             try:
-                cur.close()
-            finally:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
+                conn.rollback()
+            except Exception:
+                pass
+            try:
+                conn.close()
+            except Exception:
+                pass
 
     return _factory
 
 
-def test_cdc_pipeline_emits_debounced_diff(cdc_environment: _CDCEnv) -> None:
+def test_cdc_pipeline_emits_debounced_diff(
+    cdc_environment: _CDCEnv, metadata_provider: PostgresMetadataProvider
+) -> None:
     if connect is None or dict_row is None:
         pytest.skip("psycopg not installed")
 
@@ -383,18 +495,10 @@ def test_cdc_pipeline_emits_debounced_diff(cdc_environment: _CDCEnv) -> None:
     diff_log: List[Dict[str, object]] = []
     metrics = CDCListenerMetrics(namespace="test")
     clock = ManualClock()
-    metadata_provider = PostgresMetadataProvider(
-        host=env.host,
-        port=env.port,
-        user=env.db_user,
-        password=env.db_password,
-        database=env.db_name,
-        schema="uns_meta",
-    )
 
     service = CDCListenerService(
         slot_name=env.slot_name,
-        stream_factory=_wal2json_stream_factory(env.dsn, env.slot_name),
+        stream_factory=_wal2json_stream_factory(env.dsn, env.slot_name, max_changes=50),
         decoder=Wal2JsonChangeDecoder(),
         metadata_provider=metadata_provider,
         diff_sink=diff_log.append,
@@ -481,4 +585,3 @@ def test_cdc_pipeline_emits_debounced_diff(cdc_environment: _CDCEnv) -> None:
         assert metrics_snapshot["payloads_total"] == 1
     finally:
         service.stop()
-        metadata_provider.close()
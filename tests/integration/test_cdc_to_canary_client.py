@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
 from typing import Iterable, List, Sequence, Tuple
 
 import pytest
@@ -17,6 +19,8 @@ pytestmark = pytest.mark.integration
 
 
 class ManualClock:
+    __slots__ = ("_value",)
+
     def __init__(self, start: float = 0.0) -> None:
         self._value = start
 
@@ -81,14 +85,9 @@ def _build_debounced_payloads(
 
 
 def _unique_request_starts(records: Sequence[dict[str, object]]) -> List[float]:
-    starts: List[float] = []
-    last_paths: Tuple[str, ...] | None = None
-    for entry in records:
-        paths = entry["paths"]
-        if paths != last_paths:
-            starts.append(entry["start"])
-            last_paths = paths  # type: ignore[assignment]
-    return starts
+    return [
+        next(group)["start"] for _, group in groupby(records, key=itemgetter("paths"))
+    ]
 
 
 def test_cdc_diff_flow_feeds_rate_limited_canary_client() -> None:
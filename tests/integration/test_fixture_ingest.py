@@ -1,24 +1,29 @@
 import json
 import os
 import uuid
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Tuple
 
 import pytest
 
-try:
-    from uns_metadata_sync.db import connect, sql
-except ImportError:  # pragma: no cover - optional dependency
-    connect = None
-    sql = None
+try:  # Optional faster parser; the fixture parses identically with json
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None  # type: ignore[assignment]
 
-from uns_metadata_sync.db.repository import (
+# Skip at collection so the db/repository import graph is never loaded
+# without the driver.
+pytest.importorskip("psycopg2")
+
+from uns_metadata_sync.db import connect, sql  # noqa: E402
+from uns_metadata_sync.db.repository import (  # noqa: E402
     DevicePayload,
     MetadataRepository,
     MetricPayload,
     MetricPropertyPayload,
 )
-from uns_metadata_sync.migrations.runner import apply_migrations
-from uns_metadata_sync.path_normalizer import (
+from uns_metadata_sync.path_normalizer import (  # noqa: E402
     normalize_device_path,
     normalize_metric_path,
 )
@@ -32,29 +37,111 @@ FIXTURE_PATH = (
     / "messages_spBv1.0_Secil_DBIRTH_Portugal_Cement.json"
 )
 
+GROUP = "Secil"
+EDGE = "Maceira-Ignition-Edge"
+DEVICE = "Kiln-K1"
+
+_METRIC_VALUE_FIELDS = (
+    "booleanValue",
+    "intValue",
+    "longValue",
+    "floatValue",
+    "doubleValue",
+    "stringValue",
+)
+_PROPERTY_VALUE_FIELDS = (
+    "stringValue",
+    "booleanValue",
+    "intValue",
+    "longValue",
+    "floatValue",
+    "doubleValue",
+)
+# Exact-type dispatch; ints need the range check and subclasses fall through.
+_DB_TYPE_BY_PY_TYPE = {bool: "boolean", float: "double", str: "string"}
+_METRIC_FIELD_RANKS = {field: rank for rank, field in enumerate(_METRIC_VALUE_FIELDS)}
+_PROPERTY_FIELD_RANKS = {
+    field: rank for rank, field in enumerate(_PROPERTY_VALUE_FIELDS)
+}
+
+
+@pytest.fixture(scope="session")
+def fixture_data():
+    """Parse the DBIRTH fixture once per session straight from bytes."""
+    raw = FIXTURE_PATH.read_bytes()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+@dataclass(frozen=True)
+class _PreparedBatch:
+    """Fixture metrics flattened into parallel columns (one entry per metric).
+
+    ``prop_rows`` holds ``(metric_name, key, db_type, value)`` tuples.
+    """
+
+    metric_count: int
+    names: Tuple[str, ...]
+    uns_paths: Tuple[str, ...]
+    datatypes: Tuple[str, ...]
+    prop_rows: Tuple[Tuple[str, str, str, Any], ...]
+
+
+@pytest.fixture(scope="session")
+def prepared_batch(fixture_data):
+    """Derive every per-metric column from the immutable fixture once."""
+    metrics = fixture_data.get("metrics", [])
+    names, uns_paths, datatypes, prop_rows = [], [], [], []
+    for metric_entry in metrics:
+        metric_name = metric_entry.get("name")
+        if not metric_name:
+            continue
+        datatype = metric_entry.get("datatype")
+        if not (isinstance(datatype, str) and datatype):
+            datatype = _value_type_to_db_type(_extract_metric_value(metric_entry))
+        names.append(metric_name)
+        uns_paths.append(
+            normalize_metric_path(
+                group=GROUP, edge_node=EDGE, device=DEVICE, metric_name=metric_name
+            )
+        )
+        datatypes.append(str(datatype))
+        props = _props_array_to_dict(metric_entry.get("properties"))
+        prop_rows.extend(
+            (metric_name, key, _value_type_to_db_type(value), value)
+            for key, value in props.items()
+        )
+    return _PreparedBatch(
+        metric_count=len(metrics),
+        names=tuple(names),
+        uns_paths=tuple(uns_paths),
+        datatypes=tuple(datatypes),
+        prop_rows=tuple(prop_rows),
+    )
+
 
 def _value_type_to_db_type(value):
-    if isinstance(value, bool):
-        return "boolean"
-    if isinstance(value, int) and not isinstance(value, bool):
+    db_type = _DB_TYPE_BY_PY_TYPE.get(type(value))
+    if db_type is not None:
+        return db_type
+    if isinstance(value, int):
         return "int" if -2147483648 <= value <= 2147483647 else "long"
     if isinstance(value, float):
         return "double"
     return "string"
 
 
+def _typed_field(entry, ranks):
+    # Set intersection with the entry keys runs in C; entries normally carry a
+    # single typed field, the rank only breaks ties deterministically.
+    hits = ranks.keys() & entry.keys()
+    if not hits:
+        return None
+    return min(hits, key=ranks.__getitem__)
+
+
 def _extract_metric_value(metric_entry):
-    for field in (
-        "booleanValue",
-        "intValue",
-        "longValue",
-        "floatValue",
-        "doubleValue",
-        "stringValue",
-    ):
-        if field in metric_entry:
-            return metric_entry[field]
-    return None
+    field = _typed_field(metric_entry, _METRIC_FIELD_RANKS)
+    return metric_entry[field] if field is not None else None
 
 
 def _props_array_to_dict(props):
@@ -64,31 +151,23 @@ def _props_array_to_dict(props):
     keys = props.get("keys") or []
     values = props.get("values") or []
     for key, value_entry in zip(keys, values):
-        for field in (
-            "stringValue",
-            "booleanValue",
-            "intValue",
-            "longValue",
-            "floatValue",
-            "doubleValue",
-        ):
-            if field in value_entry:
-                result[str(key)] = value_entry[field]
-                break
+        field = _typed_field(value_entry, _PROPERTY_FIELD_RANKS)
+        if field is not None:
+            result[str(key)] = value_entry[field]
     return result
 
 
-def _scalar_from_cursor(cursor):
-    row = cursor.fetchone()
+def _row_values(row):
     if not row:
-        return 0
+        return ()
     if hasattr(row, "values"):
-        return next(iter(row.values()))
-    return row[0]
+        return tuple(row.values())
+    return tuple(row)
 
 
-@pytest.mark.skipif(connect is None, reason="psycopg not installed")
-def test_fixture_ingest_populates_database():
+def test_fixture_ingest_populates_database(
+    admin_conn, migrated_template, prepared_batch
+):
     host = os.getenv("PGHOST", "localhost")
     port = int(os.getenv("PGPORT", "5432"))
     admin_user = os.getenv("PGUSER")
@@ -97,29 +176,20 @@ def test_fixture_ingest_populates_database():
     if not admin_user or admin_password is None:
         pytest.skip("PGUSER/PGPASSWORD must be set for integration test")
 
-    temp_db = f"uns_meta_fixture_{uuid.uuid4().hex[:8]}"
-
-    admin_conn = connect(
-        host=host,
-        port=port,
-        user=admin_user,
-        password=admin_password,
-        dbname="postgres",
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    temp_db = f"uns_meta_fixture_{worker}_{uuid.uuid4().hex[:8]}"
+    template = migrated_template(
+        host=host, port=port, user=admin_user, password=admin_password
     )
-    admin_conn.autocommit = True
-    try:
-        admin_conn.execute(
-            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-            (temp_db,),
-        )
-        admin_conn.execute(
-            sql.SQL("CREATE DATABASE {} OWNER {}").format(
-                sql.Identifier(temp_db),
-                sql.Identifier(admin_user),
-            )
+
+    admin = admin_conn(host=host, port=port, user=admin_user, password=admin_password)
+    admin.execute(
+        sql.SQL("CREATE DATABASE {} TEMPLATE {} OWNER {}").format(
+            sql.Identifier(temp_db),
+            sql.Identifier(template),
+            sql.Identifier(admin_user),
         )
-    finally:
-        admin_conn.close()
+    )
 
     try:
         with connect(
@@ -129,82 +199,73 @@ def test_fixture_ingest_populates_database():
             password=admin_password,
             dbname=temp_db,
         ) as conn:
-            apply_migrations(conn=conn)
             conn.execute("SET search_path TO uns_meta, public")
 
             repo = MetadataRepository(conn)
-            fixture_data = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
-
-            group = "Secil"
-            edge = "Maceira-Ignition-Edge"
-            device = "Kiln-K1"
 
             device_payload = DevicePayload(
-                group_id=group,
+                group_id=GROUP,
                 country="PT",
                 business_unit="Cement",
                 plant="OUT",
-                edge=edge,
-                device=device,
+                edge=EDGE,
+                device=DEVICE,
                 uns_path=normalize_device_path(
-                    group=group, edge_node=edge, device=device
+                    group=GROUP, edge_node=EDGE, device=DEVICE
                 ),
             )
 
-            dev_result = repo.upsert_device(device_payload)
-            device_id = dev_result.record["device_id"]
-
-            metrics = fixture_data.get("metrics", [])
-            total_properties = 0
-
-            for metric_entry in metrics:
-                metric_name = metric_entry.get("name")
-                if not metric_name:
-                    continue
-                value = _extract_metric_value(metric_entry)
-                datatype = metric_entry.get("datatype")
-                datatype_name = (
-                    datatype
-                    if isinstance(datatype, str) and datatype
-                    else _value_type_to_db_type(value)
-                )
-                metric_result = repo.upsert_metric(
-                    MetricPayload(
-                        device_id=device_id,
-                        name=metric_name,
-                        uns_path=normalize_metric_path(
-                            group=group,
-                            edge_node=edge,
-                            device=device,
-                            metric_name=metric_name,
-                        ),
-                        datatype=str(datatype_name),
-                    )
-                )
-                metric_id = metric_result.record["metric_id"]
-
-                props = _props_array_to_dict(metric_entry.get("properties"))
-                for key, prop_value in props.items():
-                    repo.upsert_metric_property(
-                        MetricPropertyPayload(
-                            metric_id=metric_id,
-                            key=key,
-                            type=_value_type_to_db_type(prop_value),
-                            value=prop_value,
+            # One transaction for the whole load: a single commit (and WAL
+            # flush) instead of one per statement; repo blocks nest as savepoints.
+            with conn.transaction():
+                dev_result = repo.upsert_device(device_payload)
+                device_id = dev_result.record["device_id"]
+
+                # One multi-row INSERT ... ON CONFLICT ... RETURNING for all
+                # metrics.
+                metric_ids = repo.upsert_metrics_bulk(
+                    [
+                        MetricPayload(
+                            device_id=device_id,
+                            name=name,
+                            uns_path=uns_path,
+                            datatype=datatype,
                         )
+                        for name, uns_path, datatype in zip(
+                            prepared_batch.names,
+                            prepared_batch.uns_paths,
+                            prepared_batch.datatypes,
+                        )
+                    ]
+                )
+
+                property_payloads = [
+                    MetricPropertyPayload(
+                        metric_id=metric_ids[metric_name],
+                        key=key,
+                        type=db_type,
+                        value=value,
                     )
-                    total_properties += 1
+                    for metric_name, key, db_type, value in prepared_batch.prop_rows
+                ]
+
+                # One COPY into a staging table plus a single merge, instead of
+                # a round-trip per property.
+                repo.copy_metric_properties(property_payloads)
 
-            cursor = conn.execute("SELECT COUNT(*) FROM uns_meta.devices")
-            device_count = _scalar_from_cursor(cursor)
-            cursor = conn.execute("SELECT COUNT(*) FROM uns_meta.metrics")
-            metric_count = _scalar_from_cursor(cursor)
-            cursor = conn.execute("SELECT COUNT(*) FROM uns_meta.metric_properties")
-            property_count = _scalar_from_cursor(cursor)
+            device_count, metric_count, property_count = _row_values(
+                conn.execute(
+                    """
+                    SELECT (SELECT COUNT(*) FROM uns_meta.devices) AS devices,
+                           (SELECT COUNT(*) FROM uns_meta.metrics) AS metrics,
+                           (SELECT COUNT(*) FROM uns_meta.metric_properties) AS properties
+                    """
+                ).fetchone()
+            )
 
             assert device_count == 1
-            assert metric_count == len(metrics)
-            assert property_count == total_properties
+            assert metric_count == prepared_batch.metric_count
+            assert property_count == len(property_payloads)
 
             # spot check a property value
             cursor = conn.execute(
@@ -224,18 +285,8 @@ def test_fixture_ingest_populates_database():
             )
             assert "G_UNS_Admin" in value_string
     finally:
-        with connect(
-            host=host,
-            port=port,
-            user=admin_user,
-            password=admin_password,
-            dbname="postgres",
-        ) as cleanup:
-            cleanup.autocommit = True
-            cleanup.execute(
-                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-                (temp_db,),
-            )
-            cleanup.execute(
-                sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(temp_db))
+        admin.execute(
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(
+                sql.Identifier(temp_db)
             )
+        )
@@ -1,20 +1,17 @@
 import os
 import time
+import uuid
 
 import pytest
 
-try:
-    from uns_metadata_sync.db import connect, errors, sql
-except ImportError:  # pragma: no cover - optional dependency
-    connect = None
-    errors = None
+# Skip at collection so the db import graph is never loaded without the driver.
+pytest.importorskip("psycopg2")
 
-from uns_metadata_sync.migrations.runner import apply_migrations
+from uns_metadata_sync.db import connect, errors, sql  # noqa: E402
 
 
 @pytest.mark.integration
-@pytest.mark.skipif(connect is None, reason="psycopg not installed")
-def test_schema_constraints_and_triggers():
+def test_schema_constraints_and_triggers(admin_conn, migrated_template):
     if os.getenv("DB_MODE", "mock").lower() != "local":
         pytest.skip("DB_MODE=mock - skipping live Postgres constraint test")
 
@@ -27,35 +24,22 @@ def test_schema_constraints_and_triggers():
     if not admin_user or admin_password is None:
         pytest.skip("PGUSER/PGPASSWORD must be set for constraint verification")
 
-    temp_db = f"uns_meta_contract_{int(time.time())}"
-
-    admin_conn = connect(
-        host=host,
-        port=port,
-        user=admin_user,
-        password=admin_password,
-        dbname="postgres",
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    temp_db = f"uns_meta_contract_{worker}_{uuid.uuid4().hex[:8]}"
+    template = migrated_template(
+        host=host, port=port, user=admin_user, password=admin_password
     )
-    admin_conn.autocommit = True
-    try:
-        admin_conn.execute(
-            sql.SQL("CREATE DATABASE {} OWNER {}").format(
-                sql.Identifier(temp_db), sql.Identifier(admin_user)
-            )
+
+    admin = admin_conn(host=host, port=port, user=admin_user, password=admin_password)
+    admin.execute(
+        sql.SQL("CREATE DATABASE {} TEMPLATE {} OWNER {}").format(
+            sql.Identifier(temp_db),
+            sql.Identifier(template),
+            sql.Identifier(admin_user),
         )
-    finally:
-        admin_conn.close()
+    )
 
     try:
-        with connect(
-            host=host,
-            port=port,
-            user=admin_user,
-            password=admin_password,
-            dbname=temp_db,
-        ) as conn:
-            apply_migrations(conn=conn)
-
         owner_conn = connect(
             host=host,
             port=port,
@@ -141,18 +125,8 @@ def test_schema_constraints_and_triggers():
         finally:
             owner_conn.close()
     finally:
-        with connect(
-            host=host,
-            port=port,
-            user=admin_user,
-            password=admin_password,
-            dbname="postgres",
-        ) as cleanup:
-            cleanup.autocommit = True
-            cleanup.execute(
-                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-                (temp_db,),
-            )
-            cleanup.execute(
-                sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(temp_db))
+        admin.execute(
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(
+                sql.Identifier(temp_db)
             )
+        )
@@ -12,7 +12,7 @@ from uns_metadata_sync.migrations.runner import apply_migrations, rollback_last
 
 
 @pytest.mark.integration
-def test_migration_rollback_cycle():
+def test_migration_rollback_cycle(admin_conn, migrated_template):
     if os.getenv("DB_MODE", "mock").lower() != "local":
         pytest.skip("DB_MODE=mock – skipping live Postgres rollback test")
 
@@ -27,36 +27,22 @@ def test_migration_rollback_cycle():
     if not admin_user or admin_password is None:
         pytest.skip("PGUSER/PGPASSWORD must be set for rollback verification")
 
-    temp_db = f"uns_meta_test_{uuid.uuid4().hex[:8]}"
-
-    admin_conn = connect(
-        host=host,
-        port=port,
-        user=admin_user,
-        password=admin_password,
-        dbname="postgres",
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    temp_db = f"uns_meta_test_{worker}_{uuid.uuid4().hex[:8]}"
+    template = migrated_template(
+        host=host, port=port, user=admin_user, password=admin_password
     )
-    admin_conn.autocommit = True
-    try:
-        admin_conn.execute(
-            sql.SQL("CREATE DATABASE {} OWNER {}").format(
-                sql.Identifier(temp_db), sql.Identifier(admin_user)
-            )
+
+    admin = admin_conn(host=host, port=port, user=admin_user, password=admin_password)
+    admin.execute(
+        sql.SQL("CREATE DATABASE {} TEMPLATE {} OWNER {}").format(
+            sql.Identifier(temp_db),
+            sql.Identifier(template),
+            sql.Identifier(admin_user),
         )
-    finally:
-        admin_conn.close()
+    )
 
     try:
-        with connect(
-            host=host,
-            port=port,
-            user=admin_user,
-            password=admin_password,
-            dbname=temp_db,
-        ) as apply_conn:
-            applied = apply_migrations(conn=apply_conn)
-            assert [migration.version for migration in applied] == ["000", "001"]
-
         with connect(
             host=host,
             port=port,
@@ -64,6 +50,13 @@ def test_migration_rollback_cycle():
             password=admin_password,
             dbname=temp_db,
         ) as db:
+            # The template already carries every migration.
+            assert apply_migrations(conn=db) == []
+            ledger = db.execute(
+                "SELECT version FROM public.schema_migrations ORDER BY version"
+            ).fetchall()
+            assert [row[0] for row in ledger] == ["000", "001"]
+
             devices_regclass = db.execute(
                 "SELECT to_regclass('uns_meta.devices')"
             ).fetchone()[0]
@@ -81,18 +74,8 @@ def test_migration_rollback_cycle():
             reapplied = apply_migrations(conn=db)
             assert reapplied and reapplied[-1].version == "001"
     finally:
-        with connect(
-            host=host,
-            port=port,
-            user=admin_user,
-            password=admin_password,
-            dbname="postgres",
-        ) as admin_cleanup:
-            admin_cleanup.autocommit = True
-            admin_cleanup.execute(
-                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-                (temp_db,),
-            )
-            admin_cleanup.execute(
-                sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(temp_db))
+        admin.execute(
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(
+                sql.Identifier(temp_db)
             )
+        )
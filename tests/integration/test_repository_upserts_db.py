@@ -3,63 +3,42 @@ import uuid
 
 import pytest
 
-try:
-    from uns_metadata_sync.db import connect
-except ImportError:  # pragma: no cover - optional dependency
-    connect = None
+# Skip at collection so the db/repository import graph is never loaded
+# without the driver.
+pytest.importorskip("psycopg2")
 
-from uns_metadata_sync.db.repository import (
+from uns_metadata_sync.db import connect  # noqa: E402
+from uns_metadata_sync.db.repository import (  # noqa: E402
     DevicePayload,
     MetadataRepository,
     MetricPayload,
     MetricPropertyPayload,
     RepositoryError,
 )
-from uns_metadata_sync.migrations.runner import apply_migrations
 
 
 pytestmark = pytest.mark.integration
 
 
-@pytest.fixture()
-def temp_db():
-    if connect is None:
-        pytest.skip("psycopg not installed")
-
+@pytest.fixture(scope="session")
+def temp_db(admin_conn, migrated_template):
     host = os.getenv("PGHOST", "localhost")
     port = int(os.getenv("PGPORT", "5432"))
     admin_user = os.getenv("PGUSER", "postgres")
     admin_password = os.getenv("PGPASSWORD", "postgres")
 
-    temp_db_name = f"uns_meta_repo_{uuid.uuid4().hex[:8]}"
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    temp_db_name = f"uns_meta_repo_{worker}_{uuid.uuid4().hex[:8]}"
+    template = migrated_template(
+        host=host, port=port, user=admin_user, password=admin_password
+    )
 
-    admin_conn = connect(
-        host=host,
-        port=port,
-        user=admin_user,
-        password=admin_password,
-        dbname="postgres",
+    admin = admin_conn(host=host, port=port, user=admin_user, password=admin_password)
+    admin.execute(
+        f"CREATE DATABASE {temp_db_name} TEMPLATE {template} OWNER {admin_user}"
     )
-    admin_conn.autocommit = True
-    try:
-        admin_conn.execute(
-            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-            (temp_db_name,),
-        )
-        admin_conn.execute(f"CREATE DATABASE {temp_db_name} OWNER {admin_user}")
-    finally:
-        admin_conn.close()
 
     try:
-        with connect(
-            host=host,
-            port=port,
-            user=admin_user,
-            password=admin_password,
-            dbname=temp_db_name,
-        ) as conn:
-            apply_migrations(conn=conn)
-
         yield {
             "host": host,
             "port": port,
@@ -68,22 +47,10 @@ def temp_db():
             "dbname": temp_db_name,
         }
     finally:
-        with connect(
-            host=host,
-            port=port,
-            user=admin_user,
-            password=admin_password,
-            dbname="postgres",
-        ) as cleanup:
-            cleanup.autocommit = True
-            cleanup.execute(
-                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s",
-                (temp_db_name,),
-            )
-            cleanup.execute(f"DROP DATABASE IF EXISTS {temp_db_name}")
-
-
-@pytest.fixture()
+        admin.execute(f"DROP DATABASE IF EXISTS {temp_db_name} WITH (FORCE)")
+
+
+@pytest.fixture(scope="session")
 def repository(temp_db):
     conn = connect(**temp_db)
     repo = MetadataRepository(conn)
@@ -93,6 +60,16 @@ def repository(temp_db):
         conn.close()
 
 
+@pytest.fixture(autouse=True)
+def _clean(repository):
+    """Reset the shared database so each test starts from empty tables."""
+    repository.conn.execute(
+        "TRUNCATE uns_meta.metric_properties, uns_meta.metrics, uns_meta.devices "
+        "RESTART IDENTITY CASCADE"
+    )
+    yield
+
+
 def _device_payload(**overrides):
     data = {
         "group_id": "SECIL.GROUP",
@@ -0,0 +1,64 @@
+"""Import-time stubs and shared fixtures for the unit tests."""
+
+from __future__ import annotations
+
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+DBIRTH_FIXTURE_PATH = (
+    Path(__file__).resolve().parents[1]
+    / "fixtures"
+    / "messages_spBv1.0_Secil_DBIRTH_Portugal_Cement.json"
+)
+
+
+def _install_paho_stub() -> None:
+    paho_module = types.ModuleType("paho")
+    mqtt_module = types.ModuleType("paho.mqtt")
+    mqtt_client_module = types.ModuleType("paho.mqtt.client")
+
+    class _DummyClient:  # pragma: no cover - placeholder only
+        def __init__(self, *args, **kwargs):
+            self.args = args
+            self.kwargs = kwargs
+
+    mqtt_client_module.Client = _DummyClient
+    mqtt_client_module.CallbackAPIVersion = types.SimpleNamespace(VERSION2="V2")
+    mqtt_client_module.MQTTv311 = 4
+
+    sys.modules["paho"] = paho_module
+    sys.modules["paho.mqtt"] = mqtt_module
+    sys.modules["paho.mqtt.client"] = mqtt_client_module
+    mqtt_module.client = mqtt_client_module
+
+
+def pytest_configure(config) -> None:
+    # Provide stubs for optional dependencies before any test module imports
+    # them; ``src`` is already on the path via ``pythonpath`` in pyproject.
+    if "paho" not in sys.modules:
+        _install_paho_stub()
+
+
+@pytest.fixture(scope="session")
+def dbirth_payload() -> dict:
+    """Parsed Secil DBIRTH sample, read once per session."""
+    return json.loads(DBIRTH_FIXTURE_PATH.read_bytes())
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_sparkplug_protobuf() -> None:
+    """Round-trip one Sparkplug payload so lazy protobuf setup runs up front.
+
+    Importing ``sparkplug_b_pb2`` registers the descriptors, but the message
+    classes finish their encoder/decoder setup on first use; doing that here
+    keeps the cost out of whichever test happens to run first on a worker.
+    """
+    from uns_metadata_sync import sparkplug_b_pb2 as sparkplug
+
+    metric = sparkplug.Payload.Metric(name="warmup", alias=1, int_value=0)
+    payload = sparkplug.Payload(metrics=[metric])
+    sparkplug.Payload.FromString(payload.SerializeToString())
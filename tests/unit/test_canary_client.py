@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
 
 import pytest
 import httpx
@@ -10,20 +12,62 @@ from uns_metadata_sync.canary.client import (
     CanaryClient,
     CanaryClientSettings,
     CanaryQueueFull,
+    TokenBucket,
+)
+from uns_metadata_sync.canary.payload import (
+    CanaryDiff,
+    CanaryPayloadMapper,
+    encode_payload,
 )
 
 
 @dataclass
 class FakeClock:
     value: float = 0.0
+    sleeps: List[float] = field(default_factory=list)
 
     def advance(self, amount: float) -> None:
         self.value += amount
 
+    def sleep(self, duration: float) -> None:
+        """Record the wait and tick the clock by exactly that amount."""
+        self.sleeps.append(duration)
+        self.advance(duration)
+
     def __call__(self) -> float:
         return self.value
 
 
+@pytest.fixture
+def frozen_clock(monkeypatch) -> Tuple[FakeClock, Callable[[float], None]]:
+    """Fake clock/sleep pair; any real ``time.sleep`` fails the test."""
+    monkeypatch.setattr(time, "sleep", lambda *_: pytest.fail("real sleep"))
+    clock = FakeClock()
+    return clock, clock.sleep
+
+
+@pytest.fixture
+def client_factory():
+    """Build unstarted clients and stop every one of them at teardown."""
+    built: List[CanaryClient] = []
+
+    def make(settings: CanaryClientSettings, **kwargs) -> CanaryClient:
+        kwargs.setdefault("auto_start", False)
+        client = CanaryClient(settings, **kwargs)
+        built.append(client)
+        return client
+
+    yield make
+    for client in built:
+        client.stop()
+
+
+_BAD_SESSION_REQUEST = httpx.Request("POST", "https://example/api/v1/storeData")
+_BAD_SESSION_RESPONSE = httpx.Response(
+    401, request=_BAD_SESSION_REQUEST, json={"error": "BadSessionToken"}
+)
+
+
 def _make_diff(suffix: str) -> dict[str, object]:
     return {
         "uns_path": f"Secil/Portugal/Cement/Kiln/Metric{suffix}",
@@ -31,14 +75,15 @@ def _make_diff(suffix: str) -> dict[str, object]:
     }
 
 
-@pytest.mark.unit
-def test_rate_limiter_enforces_rps_and_tracks_metrics() -> None:
-    clock = FakeClock()
-    sleeps: List[float] = []
+def _make_diffs(count: int, prefix: str = "M") -> List[dict[str, object]]:
+    return [_make_diff(f"{prefix}{index}") for index in range(count)]
 
-    def fake_sleep(duration: float) -> None:
-        sleeps.append(duration)
-        clock.advance(duration)
+
+def test_rate_limiter_enforces_rps_and_tracks_metrics(
+    client_factory, frozen_clock
+) -> None:
+    clock, fake_sleep = frozen_clock
+    sleeps = clock.sleeps
 
     send_times: List[float] = []
 
@@ -54,17 +99,14 @@ def test_rate_limiter_enforces_rps_and_tracks_metrics() -> None:
         retry_attempts=0,
         session_token="token",
     )
-    client = CanaryClient(
+    client = client_factory(
         settings,
         request_sender=sender,
         clock=clock,
         sleep=fake_sleep,
-        auto_start=False,
     )
 
-    client.enqueue(_make_diff("A"))
-    client.enqueue(_make_diff("B"))
-    client.enqueue(_make_diff("C"))
+    client.enqueue_many(_make_diffs(3))
 
     assert client.drain_once() is True
     assert client.drain_once() is True
@@ -73,13 +115,37 @@ def test_rate_limiter_enforces_rps_and_tracks_metrics() -> None:
     assert len(send_times) == 3
     assert send_times[1] == pytest.approx(0.0, abs=1e-6)
     assert send_times[2] == pytest.approx(0.5, rel=1e-2)
+    # The only waiting is the throttle before the third send.
+    assert sum(sleeps) == pytest.approx(0.5, rel=1e-2)
     assert client._metrics.throttled_total >= 1
     assert client._metrics.queue_depth == 0
-    client.stop()
 
 
-@pytest.mark.unit
-def test_queue_overflow_raises_and_counts_drop() -> None:
+def test_token_bucket_math() -> None:
+    clock = FakeClock()
+    # A power-of-two rate keeps the refill arithmetic exact in binary floats.
+    rate, burst, requests = 8.0, 4, 100
+    bucket = TokenBucket(rate_per_second=rate, capacity=burst, clock=clock)
+
+    waited = 0.0
+    for _ in range(requests):
+        while not bucket.consume():
+            wait = bucket.time_until_ready()
+            assert 0.0 < wait <= 1.0 / rate + 1e-9
+            waited += wait
+            clock.advance(wait)
+
+    # The burst is free; every further token costs exactly 1/rate seconds.
+    assert waited == pytest.approx((requests - burst) / rate)
+    assert clock.value == pytest.approx(waited)
+
+    # An idle period refills to capacity and no further.
+    clock.advance(10 * burst / rate)
+    assert all(bucket.consume() for _ in range(burst))
+    assert bucket.consume() is False
+
+
+def test_queue_overflow_raises_and_counts_drop(client_factory) -> None:
     settings = CanaryClientSettings(
         base_url="https://example/api/v2",
         queue_capacity=2,
@@ -89,7 +155,12 @@ def test_queue_overflow_raises_and_counts_drop() -> None:
         retry_attempts=0,
         session_token="token",
     )
-    client = CanaryClient(settings, request_sender=lambda batch: None, auto_start=False)
+    dropped: List[str] = []
+    client = client_factory(
+        settings,
+        request_sender=lambda batch: None,
+        backpressure_handler=lambda diff: dropped.append(diff.uns_path),
+    )
     client.enqueue(_make_diff("1"))
     client.enqueue(_make_diff("2"))
 
@@ -97,17 +168,33 @@ def test_queue_overflow_raises_and_counts_drop() -> None:
         client.enqueue(_make_diff("3"))
 
     assert client._metrics.queue_dropped_total == 1
-    client.stop()
+    assert dropped == ["Secil/Portugal/Cement/Kiln/Metric3"]
 
 
-@pytest.mark.unit
-def test_retry_policy_applies_exponential_backoff_with_jitter() -> None:
-    clock = FakeClock()
-    sleeps: List[float] = []
+def test_enqueue_many_fills_to_capacity_and_drops_overflow(client_factory) -> None:
+    settings = CanaryClientSettings(
+        base_url="https://example/api/v2",
+        queue_capacity=2,
+        rate_limit_rps=10,
+        burst_size=10,
+        max_batch_tags=1,
+        retry_attempts=0,
+        session_token="token",
+    )
+    client = client_factory(settings, request_sender=lambda batch: None)
+
+    with pytest.raises(CanaryQueueFull):
+        client.enqueue_many(_make_diffs(3))
+
+    assert client._metrics.queue_dropped_total == 1
+    assert client._metrics.queue_depth == 2
+
 
-    def fake_sleep(duration: float) -> None:
-        sleeps.append(duration)
-        clock.advance(duration)
+def test_retry_policy_applies_exponential_backoff_with_jitter(
+    client_factory, frozen_clock
+) -> None:
+    clock, fake_sleep = frozen_clock
+    sleeps = clock.sleeps
 
     attempts = {"count": 0}
 
@@ -129,12 +216,11 @@ def test_retry_policy_applies_exponential_backoff_with_jitter() -> None:
         jitter=lambda limit: limit,
         session_token="token",
     )
-    client = CanaryClient(
+    client = client_factory(
         settings,
         request_sender=sender,
         clock=clock,
         sleep=fake_sleep,
-        auto_start=False,
     )
 
     client.enqueue(_make_diff("R"))
@@ -148,17 +234,13 @@ def test_retry_policy_applies_exponential_backoff_with_jitter() -> None:
     assert len(sleeps) >= 2
     assert sleeps[0] == pytest.approx(0.2)
     assert sleeps[1] == pytest.approx(0.4)
-    client.stop()
 
 
-@pytest.mark.unit
-def test_circuit_breaker_transitions_and_dead_letter_invoked() -> None:
-    clock = FakeClock()
-    sleeps: List[float] = []
-
-    def fake_sleep(duration: float) -> None:
-        sleeps.append(duration)
-        clock.advance(duration)
+def test_circuit_breaker_transitions_and_dead_letter_invoked(
+    client_factory, frozen_clock
+) -> None:
+    clock, fake_sleep = frozen_clock
+    sleeps = clock.sleeps
 
     failures = {"count": 0}
 
@@ -183,13 +265,12 @@ def test_circuit_breaker_transitions_and_dead_letter_invoked() -> None:
         circuit_reset_seconds=5,
         session_token="token",
     )
-    client = CanaryClient(
+    client = client_factory(
         settings,
         request_sender=sender,
         dead_letter_handler=dead_letter_handler,
         clock=clock,
         sleep=fake_sleep,
-        auto_start=False,
     )
 
     client.enqueue(_make_diff("1"))
@@ -208,7 +289,6 @@ def test_circuit_breaker_transitions_and_dead_letter_invoked() -> None:
     assert len(dead_letters) == 2
     assert any(abs(sleep - 5.0) <= 0.05 for sleep in sleeps)
     assert client._metrics.circuit_open_total >= 1
-    client.stop()
 
 
 class StubSessionManager:
@@ -230,8 +310,10 @@ class StubSessionManager:
         self.mark_calls += 1
 
 
-@pytest.mark.unit
-def test_session_token_reacquired_after_bad_session_error() -> None:
+def test_session_token_reacquired_after_bad_session_error(
+    client_factory, frozen_clock
+) -> None:
+    clock, fake_sleep = frozen_clock
     attempts = {"count": 0}
     tokens_seen: List[str] = []
     session_manager = StubSessionManager()
@@ -247,22 +329,22 @@ def test_session_token_reacquired_after_bad_session_error() -> None:
         attempts["count"] += 1
         tokens_seen.append(client._get_session_token())
         if attempts["count"] == 1:
-            request = httpx.Request("POST", "https://example/api/v1/storeData")
-            response = httpx.Response(
-                401, request=request, json={"error": "BadSessionToken"}
+            raise httpx.HTTPStatusError(
+                "bad token",
+                request=_BAD_SESSION_REQUEST,
+                response=_BAD_SESSION_RESPONSE,
             )
-            raise httpx.HTTPStatusError("bad token", request=request, response=response)
 
-    client = CanaryClient(
+    client = client_factory(
         settings,
         session_manager=session_manager,
         request_sender=sender,
-        auto_start=False,
+        clock=clock,
+        sleep=fake_sleep,
     )
 
     client.enqueue(_make_diff("S"))
     assert client.drain_once() is True
-    client.stop()
 
     assert attempts["count"] == 2
     assert session_manager.invalidated == 1
@@ -270,3 +352,26 @@ def test_session_token_reacquired_after_bad_session_error() -> None:
     assert tokens_seen == ["token-1", "token-2"]
     assert client._metrics.retry_total == 1
     assert client._metrics.failure_total == 0
+
+
+def test_http_send_posts_the_sized_payload_bytes(client_factory) -> None:
+    bodies: List[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(request.content)
+        return httpx.Response(200, request=request)
+
+    settings = CanaryClientSettings(
+        base_url="https://example/api/v2", session_token="token"
+    )
+    stamp = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    mapper = CanaryPayloadMapper(timestamp_provider=lambda: stamp)
+    client = client_factory(settings, mapper=mapper)
+    client._http_client.close()
+    client._http_client = httpx.Client(transport=httpx.MockTransport(handler))
+    diff = CanaryDiff.from_mapping(_make_diff("Scale"))
+
+    client._http_send([diff])
+
+    expected = mapper.build_payload(session_token="token", diffs=[diff])
+    assert bodies == [encode_payload(expected)]
@@ -8,14 +8,18 @@ from uns_metadata_sync.canary.payload import (
     CanaryDiff,
     CanaryPayloadMapper,
     PayloadTooLargeError,
+    encode_payload,
 )
 
 
+_TS = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+_ISO = "2025-01-01T12:00:00.000000Z"
+
+
 def _fixed_timestamp() -> datetime:
-    return datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    return _TS
 
 
-@pytest.mark.unit
 def test_canary_payload_mapper_maps_properties() -> None:
     mapper = CanaryPayloadMapper(
         max_payload_bytes=4096,
@@ -35,17 +39,16 @@ def test_canary_payload_mapper_maps_properties() -> None:
     assert len(entries) == 2
     first = entries[0]
     assert first[0] == "engUnit"
-    assert first[1] == "2025-01-01T12:00:00.000000Z"
+    assert first[1] == _ISO
     assert first[2] == "\u00b0C"
     assert first[3] == 192
     second = entries[1]
     assert second[0] == "displayHigh"
-    assert second[1] == "2025-01-01T12:00:00.000000Z"
+    assert second[1] == _ISO
     assert second[2] == 1800
     assert second[3] == 192
 
 
-@pytest.mark.unit
 def test_canary_payload_mapper_handles_optional_nulls() -> None:
     mapper = CanaryPayloadMapper(
         max_payload_bytes=4096,
@@ -63,7 +66,6 @@ def test_canary_payload_mapper_handles_optional_nulls() -> None:
     assert values["enabled"] == "true"
 
 
-@pytest.mark.unit
 def test_canary_payload_mapper_enforces_size_limit() -> None:
     mapper = CanaryPayloadMapper(
         max_payload_bytes=120,
@@ -80,3 +82,81 @@ def test_canary_payload_mapper_enforces_size_limit() -> None:
     message = str(excinfo.value)
     assert "Secil.Portugal.Cement.Kiln.Excessive" in message
     assert "exceeds" in message
+
+
+def test_canary_payload_mapper_reports_full_size_and_all_metrics() -> None:
+    diffs = [
+        CanaryDiff(uns_path="Secil/Kiln/Small", properties={"engUnit": "C"}),
+        CanaryDiff(uns_path="Secil/Kiln/Excessive", properties={"notes": "x" * 200}),
+    ]
+    full_size = len(
+        encode_payload(
+            CanaryPayloadMapper(
+                max_payload_bytes=4096, timestamp_provider=_fixed_timestamp
+            ).build_payload(session_token="token", diffs=diffs)
+        )
+    )
+    mapper = CanaryPayloadMapper(
+        max_payload_bytes=120,
+        timestamp_provider=_fixed_timestamp,
+    )
+
+    with pytest.raises(PayloadTooLargeError) as excinfo:
+        mapper.build_payload(session_token="token", diffs=diffs)
+
+    assert str(excinfo.value) == (
+        f"canary payload size {full_size} bytes exceeds limit 120 "
+        "(metrics: Secil.Kiln.Excessive, Secil.Kiln.Small)"
+    )
+
+
+def test_canary_payload_mapper_sizes_only_the_latest_diff_per_metric() -> None:
+    mapper = CanaryPayloadMapper(
+        max_payload_bytes=200,
+        timestamp_provider=_fixed_timestamp,
+    )
+    diffs = [
+        CanaryDiff(uns_path="Secil/Kiln/Notes", properties={"notes": "x" * 400}),
+        CanaryDiff(uns_path="Secil/Kiln/Notes", properties={"notes": "short"}),
+    ]
+
+    payload = mapper.build_payload(session_token="token", diffs=diffs)
+
+    assert payload["properties"] == {
+        "Secil.Kiln.Notes": [["notes", _ISO, "short", 192]]
+    }
+
+
+def test_canary_payload_mapper_limit_matches_request_body_size() -> None:
+    diffs = [
+        CanaryDiff(uns_path="Secil/Kiln/Scale", properties={"factor": 1e16}),
+        CanaryDiff(
+            uns_path="Secil/Kiln/Temperature",
+            properties={"engUnit": "\u00b0C", "range": [0.5, "m\u00e1x"]},
+        ),
+    ]
+
+    def build(limit: int) -> dict:
+        mapper = CanaryPayloadMapper(
+            max_payload_bytes=limit, timestamp_provider=_fixed_timestamp
+        )
+        return mapper.build_payload(session_token="token", diffs=diffs)
+
+    body = encode_payload(build(4096))
+    assert b"1e+16" in body
+
+    # The running size is exact: the body fits its own length and nothing less.
+    assert encode_payload(build(len(body))) == body
+    with pytest.raises(PayloadTooLargeError):
+        build(len(body) - 1)
+
+
+def test_canary_payload_mapper_rejects_non_finite_numbers() -> None:
+    mapper = CanaryPayloadMapper(
+        max_payload_bytes=4096,
+        timestamp_provider=_fixed_timestamp,
+    )
+    diff = CanaryDiff(uns_path="Secil/Kiln/Ratio", properties={"gain": float("nan")})
+
+    with pytest.raises(ValueError):
+        mapper.build_payload(session_token="token", diffs=[diff])
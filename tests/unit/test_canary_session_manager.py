@@ -18,21 +18,39 @@ class ManualClock:
         return self._value
 
 
+def _ok(_body) -> dict:
+    return {"result": "ok"}
+
+
+def _token(value: str):
+    def respond(_body) -> dict:
+        return {"sessionToken": value}
+
+    return respond
+
+
+def _routed(routes, seen: list[str]):
+    """Build an ``http_call`` that dispatches on the request path."""
+
+    def http_call(path: str, body) -> dict:
+        seen.append(path)
+        route = routes.get(path)
+        if route is None:
+            pytest.fail(f"unexpected path {path}")
+        return route(body)
+
+    return http_call
+
+
 def test_session_manager_acquire_and_keepalive() -> None:
     clock = ManualClock()
     events: list[str] = []
 
-    def handler(request: httpx.Request) -> httpx.Response:
-        events.append(request.url.path)
-        if request.url.path.endswith("/getSessionToken"):
-            return httpx.Response(200, json={"result": {"sessionToken": "token-1"}})
-        if request.url.path.endswith("/keepAlive"):
-            return httpx.Response(200, json={"result": "ok"})
-        if request.url.path.endswith("/revokeSessionToken"):
-            return httpx.Response(200, json={"result": "ok"})
-        pytest.fail(f"unexpected path {request.url.path}")
-
-    client = httpx.Client(transport=httpx.MockTransport(handler))
+    routes = {
+        "/getSessionToken": _token("token-1"),
+        "/keepAlive": _ok,
+        "/revokeSessionToken": _ok,
+    }
     manager = SAFSessionManager(
         base_url="https://example/api/v1",
         api_token="api-token",
@@ -41,7 +59,7 @@ def test_session_manager_acquire_and_keepalive() -> None:
         session_timeout_ms=120000,
         keepalive_idle_seconds=1,
         keepalive_jitter_seconds=0,
-        http_client=client,
+        http_call=_routed(routes, events),
         clock=clock,
     )
 
@@ -64,18 +82,15 @@ def test_session_manager_reacquires_after_keepalive_failure() -> None:
     calls: list[str] = []
     keepalive_fail = True
 
-    def handler(request: httpx.Request) -> httpx.Response:
+    def get_session_token(body) -> dict:
+        return _token("token-1" if keepalive_fail else "token-2")(body)
+
+    def keep_alive(_body) -> dict:
         nonlocal keepalive_fail
-        calls.append(request.url.path)
-        if request.url.path.endswith("/getSessionToken"):
-            token_value = "token-2" if keepalive_fail is False else "token-1"
-            return httpx.Response(200, json={"result": {"sessionToken": token_value}})
-        if request.url.path.endswith("/keepAlive"):
-            keepalive_fail = False
-            return httpx.Response(500, json={"error": "BadSessionToken"})
-        pytest.fail(f"unexpected path {request.url.path}")
+        keepalive_fail = False
+        raise RuntimeError("keepAlive failed: BadSessionToken")
 
-    client = httpx.Client(transport=httpx.MockTransport(handler))
+    routes = {"/getSessionToken": get_session_token, "/keepAlive": keep_alive}
     manager = SAFSessionManager(
         base_url="https://example/api/v1",
         api_token="api-token",
@@ -84,7 +99,7 @@ def test_session_manager_reacquires_after_keepalive_failure() -> None:
         session_timeout_ms=120000,
         keepalive_idle_seconds=1,
         keepalive_jitter_seconds=0,
-        http_client=client,
+        http_call=_routed(routes, calls),
         clock=clock,
     )
 
@@ -98,3 +113,66 @@ def test_session_manager_reacquires_after_keepalive_failure() -> None:
     # Next acquisition should call getSessionToken again
     assert manager.get_token() == "token-2"
     manager.close()
+
+
+def test_session_manager_default_http_call_posts_json_via_httpx() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"sessionToken": "token-1"})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    manager = SAFSessionManager(
+        base_url="https://example/api/v1/",
+        api_token="api-token",
+        client_id="client-1",
+        historians=["hist"],
+        session_timeout_ms=120000,
+        keepalive_idle_seconds=1,
+        keepalive_jitter_seconds=0,
+        http_client=client,
+        clock=ManualClock(),
+    )
+
+    assert manager.get_token() == "token-1"
+    assert [str(request.url) for request in requests] == [
+        "https://example/api/v1/getSessionToken"
+    ]
+    assert requests[0].headers["Content-Type"] == "application/json"
+    manager.close()
+    assert not client.is_closed
+    client.close()
+
+
+@pytest.mark.parametrize("keepalive_body", [b"", b"OK"], ids=["empty", "text"])
+def test_session_manager_default_http_call_ignores_keepalive_body(
+    keepalive_body: bytes,
+) -> None:
+    clock = ManualClock()
+    paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path.endswith("/getSessionToken"):
+            return httpx.Response(200, json={"sessionToken": "token-1"})
+        return httpx.Response(200, content=keepalive_body)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    manager = SAFSessionManager(
+        base_url="https://example/api/v1",
+        api_token="api-token",
+        client_id="client-1",
+        historians=["hist"],
+        session_timeout_ms=120000,
+        keepalive_idle_seconds=1,
+        keepalive_jitter_seconds=0,
+        http_client=client,
+        clock=clock,
+    )
+
+    assert manager.get_token() == "token-1"
+    clock.advance(2.0)
+    assert manager.get_token() == "token-1"
+    assert paths == ["/api/v1/getSessionToken", "/api/v1/keepAlive"]
+    client.close()
@@ -1,3 +1,5 @@
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable, Optional
 
@@ -28,58 +30,73 @@ class _NullMetadataProvider:
         return None
 
 
-def _base_settings(tmp_path: Path, **overrides) -> Settings:
-    base = {
-        "broker": "broker",
-        "port": 1883,
-        "username": "user",
-        "password": "pass",
-        "topic_all": "topic/all",
-        "topic_nbirth_all": "topic/nbirth",
-        "topic_dbirth_all": "topic/dbirth",
-        "alias_cache_path": tmp_path / "alias_cache.json",
-        "write_jsonl": False,
-        "jsonl_pattern": str(tmp_path / "messages_{topic}.jsonl"),
-        "auto_request_rebirth": True,
-        "rebirth_throttle_seconds": 30,
-        "client_id": "client",
-        "tls_insecure": False,
-        "db_mode": "local",
-        "db_host": "localhost",
-        "db_port": 5432,
-        "db_name": "uns_metadata",
-        "db_user": "postgres",
-        "db_password": "pass",
-        "db_schema": "uns_meta",
-        "cdc_enabled": True,
-        "cdc_slot": "uns_meta_slot",
-        "cdc_publication": "uns_meta_pub",
-        "cdc_window_seconds": 180,
-        "cdc_flush_interval_seconds": 5.0,
-        "cdc_buffer_cap": 1000,
-        "cdc_idle_sleep_seconds": 1.0,
-        "cdc_max_batch_messages": 500,
-        "pg_replication_user": "postgres",
-        "pg_replication_password": "pass",
-        "pg_replication_host": "localhost",
-        "pg_replication_port": 5432,
-        "pg_replication_database": "uns_metadata",
-        "pg_replication_sslmode": "prefer",
-        "cdc_checkpoint_backend": "file",
-        "cdc_resume_path": tmp_path / "resume_tokens.json",
-        "cdc_resume_fsync": False,
+@lru_cache(maxsize=None)
+def _prototype_settings() -> Settings:
+    # Paths are placeholders; _base_settings swaps in the module scratch dir.
+    base_dir = Path("/tmp")
+    return Settings(
+        broker="broker",
+        port=1883,
+        username="user",
+        password="pass",
+        topic_all="topic/all",
+        topic_nbirth_all="topic/nbirth",
+        topic_dbirth_all="topic/dbirth",
+        alias_cache_path=base_dir / "alias_cache.json",
+        write_jsonl=False,
+        jsonl_pattern=str(base_dir / "messages_{topic}.jsonl"),
+        auto_request_rebirth=True,
+        rebirth_throttle_seconds=30,
+        client_id="client",
+        tls_insecure=False,
+        db_mode="local",
+        db_host="localhost",
+        db_port=5432,
+        db_name="uns_metadata",
+        db_user="postgres",
+        db_password="pass",
+        db_schema="uns_meta",
+        cdc_enabled=True,
+        cdc_slot="uns_meta_slot",
+        cdc_publication="uns_meta_pub",
+        cdc_window_seconds=180,
+        cdc_flush_interval_seconds=5.0,
+        cdc_buffer_cap=1000,
+        cdc_idle_sleep_seconds=1.0,
+        cdc_max_batch_messages=500,
+        pg_replication_user="postgres",
+        pg_replication_password="pass",
+        pg_replication_host="localhost",
+        pg_replication_port=5432,
+        pg_replication_database="uns_metadata",
+        pg_replication_sslmode="prefer",
+        cdc_checkpoint_backend="file",
+        cdc_resume_path=base_dir / "resume_tokens.json",
+        cdc_resume_fsync=False,
+    )
+
+
+@pytest.fixture(scope="module")
+def settings_dir(tmp_path_factory) -> Path:
+    """One scratch directory for the module; the factory tests never write to it."""
+    return tmp_path_factory.mktemp("cdc_listener_factory")
+
+
+def _base_settings(base_dir: Path, **overrides) -> Settings:
+    paths = {
+        "alias_cache_path": base_dir / "alias_cache.json",
+        "jsonl_pattern": str(base_dir / "messages_{topic}.jsonl"),
+        "cdc_resume_path": base_dir / "resume_tokens.json",
     }
-    base.update(overrides)
-    return Settings(**base)
+    return replace(_prototype_settings(), **{**paths, **overrides})
 
 
 def _empty_stream(_lsn: Optional[int]):
     return iter([])  # type: ignore[return-value]
 
 
-@pytest.mark.unit
-def test_build_listener_uses_persistent_store(tmp_path):
-    settings = _base_settings(tmp_path)
+def test_build_listener_uses_persistent_store(settings_dir):
+    settings = _base_settings(settings_dir)
     listener = build_cdc_listener(
         settings,
         diff_sink=lambda payload: None,
@@ -93,9 +110,8 @@ def test_build_listener_uses_persistent_store(tmp_path):
     assert listener._client.slot_name == settings.cdc_slot
 
 
-@pytest.mark.unit
-def test_build_listener_uses_memory_store_when_configured(tmp_path):
-    settings = _base_settings(tmp_path, cdc_checkpoint_backend="memory")
+def test_build_listener_uses_memory_store_when_configured(settings_dir):
+    settings = _base_settings(settings_dir, cdc_checkpoint_backend="memory")
     listener = build_cdc_listener(
         settings,
         diff_sink=lambda payload: None,
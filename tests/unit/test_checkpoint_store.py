@@ -137,3 +137,64 @@ def test_logical_replication_resumes_after_restart(tmp_path):
     resumed_client.process()
     assert stream.starts == [None, 110]
     assert resumed_store.load("slot") == 200
+
+
+@pytest.mark.unit
+def test_persistent_store_coalesces_saves_until_threshold(tmp_path):
+    store_path = tmp_path / "resume.json"
+    store = PersistentCheckpointStore(store_path, flush_every=3)
+
+    store.save("slot", 10)
+    store.save("slot", 20)
+    assert not store_path.exists()
+    assert store.load("slot") == 20
+
+    store.save("slot", 30)
+    assert json.loads(store_path.read_text()) == {"slot": 30}
+
+    store.save("slot", 40)
+    store.close()
+    assert PersistentCheckpointStore(store_path).load("slot") == 40
+
+
+@pytest.mark.unit
+def test_persistent_store_flushes_after_interval(tmp_path):
+    now = [0.0]
+    store_path = tmp_path / "resume.json"
+    store = PersistentCheckpointStore(
+        store_path, flush_every=100, flush_interval=5.0, clock=lambda: now[0]
+    )
+
+    store.save("slot", 10)
+    now[0] = 4.0
+    store.save("slot", 20)
+    assert not store_path.exists()
+
+    now[0] = 5.0
+    store.save("slot", 30)
+    assert json.loads(store_path.read_text()) == {"slot": 30}
+
+
+@pytest.mark.unit
+def test_logical_replication_flushes_coalesced_checkpoint_when_drained(tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    store = PersistentCheckpointStore(checkpoint_path, flush_every=100)
+    stream = _RecordingStream(
+        [
+            [
+                ReplicationStreamMessage(lsn=100, data=b"{}", commit_timestamp=1.0),
+                ReplicationStreamMessage(lsn=110, data=b"{}", commit_timestamp=2.0),
+            ]
+        ]
+    )
+    client = LogicalReplicationClient(
+        slot_name="slot",
+        stream_factory=stream.factory,
+        decoder=_SequentialDecoder([[_build_change(100)], [_build_change(110)]]),
+        checkpoint_store=store,
+        checkpoint_interval=1,
+    )
+
+    client.process()
+
+    assert json.loads(checkpoint_path.read_text()) == {"slot": 110}
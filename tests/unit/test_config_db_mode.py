@@ -1,7 +1,10 @@
+import inspect
+import re
 from pathlib import Path
 
 import pytest
 
+from uns_metadata_sync import config
 from uns_metadata_sync.config import load_settings
 
 
@@ -10,6 +13,9 @@ def _patch_dotenv(monkeypatch):
     monkeypatch.setattr(
         "uns_metadata_sync.config.load_dotenv", lambda *_args, **_kwargs: True
     )
+    load_settings.cache_clear()
+    yield
+    load_settings.cache_clear()
 
 
 def _seed_minimal_env(monkeypatch, db_mode=None):
@@ -96,3 +102,22 @@ def test_checkpoint_backend_env_overrides(monkeypatch, tmp_path):
     assert settings.cdc_checkpoint_backend == "memory"
     assert settings.cdc_resume_path == tmp_path / "custom.json"
     assert settings.cdc_resume_fsync is True
+
+
+@pytest.mark.unit
+def test_load_settings_reuses_instance_until_env_changes(monkeypatch):
+    _seed_minimal_env(monkeypatch)
+    first = load_settings()
+    assert load_settings() is first
+
+    monkeypatch.setenv("PGPORT", "6543")
+    changed = load_settings()
+    assert changed is not first
+    assert changed.db_port == 6543
+
+
+@pytest.mark.unit
+def test_settings_cache_key_covers_every_env_var():
+    source = inspect.getsource(config)
+    read = set(re.findall(r'getenv\(\s*"([A-Z0-9_]+)"', source))
+    assert read == set(config._ENV_KEYS)
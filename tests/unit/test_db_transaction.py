@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import types
+from typing import List
+
+import psycopg2
+import pytest
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INTRANS,
+)
+
+from uns_metadata_sync.db import _Transaction
+
+
+class _FakeCursor:
+    def __init__(self, statements: List[str]):
+        self._statements = statements
+
+    def __enter__(self) -> "_FakeCursor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def execute(self, statement: str) -> None:
+        self._statements.append(statement)
+
+
+class _FakeConnection:
+    """Just the connection surface that ``_Transaction`` touches."""
+
+    def __init__(self, *, autocommit: bool = True, status=TRANSACTION_STATUS_IDLE):
+        self.autocommit = autocommit
+        self.closed = False
+        self.info = types.SimpleNamespace(transaction_status=status)
+        self.statements: List[str] = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.commit_error = None
+        self._transaction_depth = 0
+
+    def transaction(self) -> _Transaction:
+        return _Transaction(self)
+
+    def cursor(self, row_factory=None) -> _FakeCursor:
+        return _FakeCursor(self.statements)
+
+    def commit(self) -> None:
+        if self.commit_error is not None:
+            raise self.commit_error
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+class _Boom(Exception):
+    pass
+
+
+def test_outer_block_commits_once_and_restores_autocommit():
+    conn = _FakeConnection()
+
+    with conn.transaction():
+        assert conn.autocommit is False
+
+    assert conn.commits == 1
+    assert conn.rollbacks == 0
+    assert conn.autocommit is True
+    assert conn._transaction_depth == 0
+
+
+def test_outer_block_restores_disabled_autocommit():
+    conn = _FakeConnection(autocommit=False)
+
+    with conn.transaction():
+        pass
+
+    assert conn.autocommit is False
+
+
+def test_nested_block_releases_savepoint():
+    conn = _FakeConnection()
+
+    with conn.transaction():
+        with conn.transaction():
+            assert conn._transaction_depth == 2
+
+    assert conn.statements == ["SAVEPOINT _tx_sp_1", "RELEASE SAVEPOINT _tx_sp_1"]
+    assert conn.commits == 1
+    assert conn._transaction_depth == 0
+
+
+def test_nested_block_rolls_back_to_savepoint_and_outer_commits():
+    conn = _FakeConnection()
+
+    with conn.transaction():
+        with pytest.raises(_Boom):
+            with conn.transaction():
+                raise _Boom()
+
+    assert conn.statements == [
+        "SAVEPOINT _tx_sp_1",
+        "ROLLBACK TO SAVEPOINT _tx_sp_1",
+    ]
+    assert conn.commits == 1
+    assert conn.rollbacks == 0
+
+
+def test_outer_block_rolls_back_on_exception():
+    conn = _FakeConnection()
+
+    with pytest.raises(_Boom):
+        with conn.transaction():
+            raise _Boom()
+
+    assert conn.commits == 0
+    assert conn.rollbacks == 1
+    assert conn.autocommit is True
+    assert conn._transaction_depth == 0
+
+
+def test_outer_block_closes_leftover_autocommit_read():
+    # execute() leaves row-returning statements open in autocommit mode and
+    # commits them before the next statement; the block does the same.
+    conn = _FakeConnection(status=TRANSACTION_STATUS_INTRANS)
+
+    with conn.transaction():
+        assert conn.commits == 1
+
+    assert conn.commits == 2
+    assert conn.autocommit is True
+
+
+def test_outer_block_refuses_to_start_inside_caller_transaction():
+    conn = _FakeConnection(autocommit=False, status=TRANSACTION_STATUS_INTRANS)
+
+    with pytest.raises(psycopg2.ProgrammingError):
+        with conn.transaction():
+            pytest.fail("block body must not run")
+
+    assert conn.commits == 0
+    assert conn.autocommit is False
+    assert conn._transaction_depth == 0
+
+
+def test_commit_interface_error_propagates_and_restores_autocommit():
+    conn = _FakeConnection()
+    conn.commit_error = psycopg2.InterfaceError("connection already closed")
+
+    with pytest.raises(psycopg2.InterfaceError):
+        with conn.transaction():
+            pass
+
+    assert conn.autocommit is True
+    assert conn._transaction_depth == 0
@@ -1,7 +1,6 @@
 import logging
 
-import pytest
-
+from uns_metadata_sync.cdc import debounce
 from uns_metadata_sync.cdc.debounce import DebounceBuffer, DebounceMetrics
 
 
@@ -17,7 +16,6 @@ class ManualClock:
         return self._current
 
 
-@pytest.mark.unit
 def test_debounce_collapses_events_within_window():
     metrics = DebounceMetrics()
     clock = ManualClock()
@@ -51,7 +49,6 @@ def test_debounce_collapses_events_within_window():
     assert buffer.pending_keys() == []
 
 
-@pytest.mark.unit
 def test_buffer_cap_triggers_drops_and_logs(caplog):
     caplog.set_level(logging.WARNING)
     metrics = DebounceMetrics()
@@ -72,7 +69,6 @@ def test_buffer_cap_triggers_drops_and_logs(caplog):
     assert sorted(buffer.pending_keys()) == ["metric-2", "metric-3"]
 
 
-@pytest.mark.unit
 def test_memory_footprint_bounded_by_cap():
     metrics = DebounceMetrics()
     clock = ManualClock()
@@ -88,3 +84,41 @@ def test_memory_footprint_bounded_by_cap():
     assert len(buffer.pending_keys()) == 5
     assert metrics.gauges["buffer_depth"] == 5
     assert metrics.counters["dropped"] == 15
+
+
+def test_debounce_flush_is_sublinear(monkeypatch):
+    clock = ManualClock()
+    buffer = DebounceBuffer(window_seconds=1, max_entries=20_000, clock=clock)
+    buffer.add("metric-expired", {"value": 0}, timestamp=clock())
+    clock.advance(0.5)
+    for idx in range(10_000):
+        buffer.add(f"metric-{idx}", {"value": idx}, timestamp=clock())
+
+    pops = 0
+    heappop = debounce.heapq.heappop
+
+    def counting_heappop(heap):
+        nonlocal pops
+        pops += 1
+        return heappop(heap)
+
+    monkeypatch.setattr(debounce.heapq, "heappop", counting_heappop)
+    payloads = buffer.flush_due(now=1.0)
+
+    assert [payload["metric"] for payload in payloads] == ["metric-expired"]
+    assert pops == 1
+    assert len(buffer.pending_keys()) == 10_000
+
+
+def test_buffer_cap_drops_least_recently_updated(caplog):
+    caplog.set_level(logging.WARNING)
+    clock = ManualClock()
+    buffer = DebounceBuffer(window_seconds=300, max_entries=2, clock=clock)
+
+    buffer.add("metric-1", {"a": 1}, timestamp=clock())
+    buffer.add("metric-2", {"b": 2}, timestamp=clock.advance(1))
+    buffer.add("metric-1", {"a": 3}, timestamp=clock.advance(1))
+    buffer.add("metric-3", {"c": 4}, timestamp=clock.advance(1))
+
+    assert "dropping metric metric-2" in caplog.text
+    assert buffer.pending_keys() == ["metric-1", "metric-3"]
@@ -145,3 +145,15 @@ def test_pop_returns_snapshot_and_clears_entry():
     assert snapshot["uns_path"].endswith("T5")
     assert "displayHigh" in snapshot["changes"]
     assert accumulator.snapshot()[0]["uns_path"].endswith("T6")
+
+
+@pytest.mark.unit
+def test_diff_event_interns_uns_path():
+    path = "".join(["Secil/Portugal/Cement/", "Maceira/Kiln/T1"])
+    rebuilt = "".join(["Secil/Portugal/Cement/Maceira/", "Kiln/T1"])
+    first = make_event("evt-1", path, 1, "cdc", {}, "2025-09-01T12:00:00Z")
+    second = make_event("evt-2", rebuilt, 2, "cdc", {}, "2025-09-01T12:01:00Z")
+
+    assert path is not rebuilt
+    assert first.uns_path is second.uns_path
+    assert not hasattr(first, "__dict__")
@@ -62,15 +62,10 @@ class _Counter:
 
 
 @pytest.mark.unit
-def test_apply_writes_version_and_lineage_entries() -> None:
+def test_apply_writes_version_and_lineage_in_one_statement() -> None:
     diff = {"updated": {"display_name": {"old": "Old", "new": "New"}}}
 
-    conn = _FakeConnection(
-        responses=[
-            [{"version_id": 11}],
-            [{"lineage_id": 7}],
-        ]
-    )
+    conn = _FakeConnection(responses=[[{"version_id": 11, "lineage_id": 7}]])
     counter = _Counter()
 
     writer = LineageVersionWriter(conn, lineage_counter=counter)
@@ -84,18 +79,14 @@ def test_apply_writes_version_and_lineage_entries() -> None:
     )
 
     assert conn.transaction_calls == 1
-    assert len(conn.executed) == 2
-
-    version_query, version_params = conn.executed[0]
-    assert version_query.startswith("INSERT INTO uns_meta.metric_versions")
-    assert version_params[0] == 101
-    assert version_params[1] == "planner"
-    assert isinstance(version_params[2], Json)
-    assert version_params[2].obj == diff
-
-    lineage_query, lineage_params = conn.executed[1]
-    assert lineage_query.startswith("INSERT INTO uns_meta.metric_path_lineage")
-    assert lineage_params == (
+    assert len(conn.executed) == 1
+
+    query, params = conn.executed[0]
+    assert query.startswith("WITH version_row AS")
+    assert params[:2] == (101, "planner")
+    assert isinstance(params[2], Json)
+    assert params[2].obj == diff
+    assert params[3:] == (
         101,
         "Group/Edge/Device/Metric-Old",
         "Group/Edge/Device/Metric",
@@ -104,6 +95,24 @@ def test_apply_writes_version_and_lineage_entries() -> None:
     assert counter.count == 1
 
 
+@pytest.mark.unit
+def test_combined_apply_does_not_increment_counter_on_lineage_conflict() -> None:
+    conn = _FakeConnection(responses=[[(12, None)]])
+    counter = _Counter()
+    writer = LineageVersionWriter(conn, lineage_counter=counter)
+
+    writer.apply(
+        metric_id=101,
+        new_uns_path="Group/Edge/Device/Metric",
+        diff={"added": {"unit": "C"}},
+        previous_uns_path="Group/Edge/Device/Metric-Old",
+        changed_by="planner",
+    )
+
+    assert len(conn.executed) == 1
+    assert counter.count == 0
+
+
 @pytest.mark.unit
 def test_apply_skips_lineage_when_paths_match() -> None:
     conn = _FakeConnection(
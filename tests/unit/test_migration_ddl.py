@@ -3,31 +3,37 @@ from importlib.resources import files
 
 import pytest
 
-
-@pytest.mark.unit
-def test_release_schema_contains_all_key_objects():
-    sql = (
+_EXPECTED_RELEASE_CLAUSES = (
+    "CREATE TABLE IF NOT EXISTS uns_meta.devices",
+    "CONSTRAINT uq_devices_spb_identity",
+    "CREATE TABLE IF NOT EXISTS uns_meta.metrics",
+    "GENERATED ALWAYS AS (replace(uns_path, '/', '.')) STORED",
+    "CREATE TYPE uns_meta.spb_property_type AS ENUM",
+    "CONSTRAINT chk_metric_properties_type_value",
+    "CREATE TABLE IF NOT EXISTS uns_meta.metric_versions",
+    "CREATE TABLE IF NOT EXISTS uns_meta.metric_path_lineage",
+    "CREATE PUBLICATION uns_meta_pub",
+)
+# One alternation lets a single pass over the SQL find every expected clause.
+_RELEASE_CLAUSE_RE = re.compile("|".join(map(re.escape, _EXPECTED_RELEASE_CLAUSES)))
+_INT_BRANCH_RE = re.compile(r"type = 'int'")
+
+
+@pytest.fixture(scope="session")
+def release_schema_sql() -> str:
+    return (
         files("uns_metadata_sync.migrations.sql") / "001_release_1_1_schema.up.sql"
     ).read_text()
 
-    expected_clauses = [
-        "CREATE TABLE IF NOT EXISTS uns_meta.devices",
-        "CONSTRAINT uq_devices_spb_identity",
-        "CREATE TABLE IF NOT EXISTS uns_meta.metrics",
-        "GENERATED ALWAYS AS (replace(uns_path, '/', '.')) STORED",
-        "CREATE TYPE uns_meta.spb_property_type AS ENUM",
-        "CONSTRAINT chk_metric_properties_type_value",
-        "CREATE TABLE IF NOT EXISTS uns_meta.metric_versions",
-        "CREATE TABLE IF NOT EXISTS uns_meta.metric_path_lineage",
-        "CREATE PUBLICATION uns_meta_pub",
-    ]
-
-    for clause in expected_clauses:
-        assert clause in sql
+
+@pytest.mark.unit
+def test_release_schema_contains_all_key_objects(release_schema_sql):
+    found = {match.group() for match in _RELEASE_CLAUSE_RE.finditer(release_schema_sql)}
+    assert set(_EXPECTED_RELEASE_CLAUSES) - found == set()
 
     # Ensure the properties CHECK constraint enforces exclusivity for all enum branches.
-    assert len(re.findall(r"type = 'int'", sql)) == 1
-    assert "value_bool   IS NOT NULL" in sql
+    assert len(_INT_BRANCH_RE.findall(release_schema_sql)) == 1
+    assert "value_bool   IS NOT NULL" in release_schema_sql
 
 
 @pytest.mark.unit
@@ -1,7 +1,10 @@
+import functools
+
 import pytest
 
 from uns_metadata_sync.migrations.runner import (
     SCHEMA_MIGRATIONS_TABLE,
+    Migration,
     apply_migrations,
     load_migrations,
     rollback_last,
@@ -20,10 +23,6 @@ class FakeCursor:
 
 
 class FakeTransaction:
-    def __init__(self, connection, **kwargs):
-        self._connection = connection
-        self.kwargs = kwargs
-
     def __enter__(self):
         return self
 
@@ -31,6 +30,10 @@ class FakeTransaction:
         return False
 
 
+# Stateless, so every FakeConnection.transaction() call can share it.
+_TRANSACTION = FakeTransaction()
+
+
 class FakeConnection:
     def __init__(self):
         self.has_ledger = False
@@ -39,65 +42,102 @@ class FakeConnection:
 
     def execute(self, sql, params=None):
         self.executed_sql.append((sql, params))
-        normalized = " ".join(sql.split())
-        if normalized.startswith("SELECT to_regclass"):
-            value = SCHEMA_MIGRATIONS_TABLE if self.has_ledger else None
-            return FakeCursor([(value,)])
-        if normalized.startswith(
-            f"SELECT version, checksum FROM {SCHEMA_MIGRATIONS_TABLE} ORDER BY (version)::int DESC"
-        ):
-            if not self.applied:
-                return FakeCursor([])
-            version, checksum = self.applied[-1]
-            return FakeCursor([(version, checksum)])
-        if normalized.startswith(
-            f"SELECT version, checksum FROM {SCHEMA_MIGRATIONS_TABLE} ORDER BY applied_at DESC"
-        ):
-            if not self.applied:
-                return FakeCursor([])
-            version, checksum = self.applied[-1]
-            return FakeCursor([(version, checksum)])
-        if normalized.startswith(
-            f"SELECT version, checksum FROM {SCHEMA_MIGRATIONS_TABLE} ORDER BY version"
-        ):
-            return FakeCursor(list(self.applied))
-        if normalized.startswith(f"INSERT INTO {SCHEMA_MIGRATIONS_TABLE}"):
-            version, checksum = params
-            self.applied.append((version, checksum))
-            self.has_ledger = True
-            return FakeCursor([])
-        if normalized.startswith(f"DELETE FROM {SCHEMA_MIGRATIONS_TABLE}"):
-            version = params[0]
-            self.applied = [row for row in self.applied if row[0] != version]
-            if not self.applied:
-                self.has_ledger = False
-            return FakeCursor([])
+        normalized, handler = _dispatch(sql)
+        if handler is not None:
+            return handler(self, params)
         if "CREATE TABLE IF NOT EXISTS public.schema_migrations" in normalized:
             self.has_ledger = True
         if "DROP TABLE IF EXISTS public.schema_migrations" in normalized:
             self.has_ledger = False
         return FakeCursor([])
 
+    def _select_regclass(self, _params):
+        value = SCHEMA_MIGRATIONS_TABLE if self.has_ledger else None
+        return FakeCursor([(value,)])
+
+    def _select_latest(self, _params):
+        if not self.applied:
+            return FakeCursor([])
+        version, checksum = self.applied[-1]
+        return FakeCursor([(version, checksum)])
+
+    def _select_all(self, _params):
+        return FakeCursor(list(self.applied))
+
+    def _insert(self, params):
+        version, checksum = params
+        self.applied.append((version, checksum))
+        self.has_ledger = True
+        return FakeCursor([])
+
+    def _delete(self, params):
+        version = params[0]
+        # version is the ledger's primary key, so at most one row matches;
+        # rollbacks remove the newest entry, so search from the end.
+        for index in range(len(self.applied) - 1, -1, -1):
+            if self.applied[index][0] == version:
+                del self.applied[index]
+                break
+        if not self.applied:
+            self.has_ledger = False
+        return FakeCursor([])
+
     def transaction(self, *args, **kwargs):
-        return FakeTransaction(self, **kwargs)
+        return _TRANSACTION
 
     def close(self):
         pass
 
 
+_SELECT_LEDGER = f"SELECT version, checksum FROM {SCHEMA_MIGRATIONS_TABLE} ORDER BY"
+_PREFIX_HANDLERS = (
+    ("SELECT to_regclass", FakeConnection._select_regclass),
+    (f"{_SELECT_LEDGER} (version)::int DESC", FakeConnection._select_latest),
+    (f"{_SELECT_LEDGER} applied_at DESC", FakeConnection._select_latest),
+    (f"{_SELECT_LEDGER} version", FakeConnection._select_all),
+    (f"INSERT INTO {SCHEMA_MIGRATIONS_TABLE}", FakeConnection._insert),
+    (f"DELETE FROM {SCHEMA_MIGRATIONS_TABLE}", FakeConnection._delete),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _dispatch(sql):
+    """Normalize ``sql`` and resolve its handler once per distinct statement."""
+    normalized = " ".join(sql.split())
+    for prefix, handler in _PREFIX_HANDLERS:
+        if normalized.startswith(prefix):
+            return normalized, handler
+    return normalized, None
+
+
+@pytest.fixture(scope="session")
+def cached_migrations() -> tuple[Migration, ...]:
+    return tuple(load_migrations())
+
+
 @pytest.mark.unit
-def test_load_migrations_orders_versions():
-    migrations = load_migrations()
-    versions = [migration.version for migration in migrations]
+def test_load_migrations_orders_versions(cached_migrations):
+    versions = [migration.version for migration in cached_migrations]
     assert versions == sorted(versions)
-    assert any(migration.name.startswith("release_1_1") for migration in migrations)
+    assert any(
+        migration.name.startswith("release_1_1") for migration in cached_migrations
+    )
+
+
+@pytest.mark.unit
+def test_load_migrations_reuses_parsed_scripts(cached_migrations):
+    first = load_migrations()
+    first.clear()
+
+    assert tuple(load_migrations()) == cached_migrations
+    assert load_migrations()[0] is cached_migrations[0]
 
 
 @pytest.mark.unit
-def test_apply_migrations_creates_records_in_order():
+def test_apply_migrations_creates_records_in_order(cached_migrations):
     connection = FakeConnection()
 
-    executed = apply_migrations(conn=connection)
+    executed = apply_migrations(conn=connection, migrations=cached_migrations)
 
     assert [migration.version for migration in executed] == ["000", "001"]
     assert connection.applied == [
@@ -105,16 +145,16 @@ def test_apply_migrations_creates_records_in_order():
     ]
 
     # Running again should be a no-op.
-    executed_again = apply_migrations(conn=connection)
+    executed_again = apply_migrations(conn=connection, migrations=cached_migrations)
     assert executed_again == []
 
 
 @pytest.mark.unit
-def test_rollback_last_removes_latest_entry():
+def test_rollback_last_removes_latest_entry(cached_migrations):
     connection = FakeConnection()
-    apply_migrations(conn=connection)
+    apply_migrations(conn=connection, migrations=cached_migrations)
 
-    rolled_back = rollback_last(conn=connection)
+    rolled_back = rollback_last(conn=connection, migrations=cached_migrations)
 
     assert rolled_back is not None
     assert rolled_back.version == "001"
@@ -122,9 +162,11 @@ def test_rollback_last_removes_latest_entry():
 
 
 @pytest.mark.unit
-def test_apply_migrations_dry_run_only_reports():
+def test_apply_migrations_dry_run_only_reports(cached_migrations):
     connection = FakeConnection()
 
-    executed = apply_migrations(conn=connection, dry_run=True)
+    executed = apply_migrations(
+        conn=connection, dry_run=True, migrations=cached_migrations
+    )
     assert [migration.version for migration in executed] == ["000", "001"]
     assert connection.applied == []
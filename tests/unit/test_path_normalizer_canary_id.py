@@ -1,15 +1,7 @@
 import pytest
-import sys
 import unittest
-from pathlib import Path
 from uns_metadata_sync import canary_id, path_normalizer
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-SRC_PATH = PROJECT_ROOT / "src"
-
-if str(SRC_PATH) not in sys.path:
-    sys.path.insert(0, str(SRC_PATH))
-
 
 class MetricPathToCanaryIdTests(unittest.TestCase):
     @pytest.mark.unit
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterator, List, Optional, Sequence
+from collections import deque
+from dataclasses import replace
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
 from uns_metadata_sync.db import OperationalError
 import pytest
@@ -13,22 +15,27 @@ from uns_metadata_sync.db.repository import (
     RepositoryError,
 )
 
+# Position of each typed value column in a metric property parameter row.
+_VALUE_COL_INDEX = {
+    "int": 3,
+    "long": 4,
+    "float": 5,
+    "double": 6,
+    "string": 7,
+    "boolean": 8,
+}
+
 
 class _FakeCursor:
     def __init__(self, rows: List[dict[str, Any]]):
-        self._rows = rows
-        self._index = 0
+        self._rows = deque(rows)
 
     def fetchone(self) -> Optional[dict[str, Any]]:
-        if self._index < len(self._rows):
-            row = self._rows[self._index]
-            self._index += 1
-            return row
-        return None
+        return self._rows.popleft() if self._rows else None
 
     def fetchall(self) -> List[dict[str, Any]]:
-        remaining = self._rows[self._index :]
-        self._index = len(self._rows)
+        remaining = list(self._rows)
+        self._rows.clear()
         return remaining
 
 
@@ -40,14 +47,18 @@ class _FakeTransaction:
         return False
 
 
+# Stateless, so every fake connection can hand out the same instance.
+_TX_SINGLETON = _FakeTransaction()
+
+
 class _FakeConnection:
-    def __init__(self, responses: Iterator[Any]):
-        self._responses = responses
-        self.executed = []
+    def __init__(self, responses: Iterable[Any]):
+        self._responses = iter(responses)
+        self.executed = deque()
         self.row_factory = None
 
     def transaction(self) -> _FakeTransaction:
-        return _FakeTransaction()
+        return _TX_SINGLETON
 
     def execute(self, query: str, params: Any) -> _FakeCursor:
         self.executed.append((query.strip().splitlines()[0], params))
@@ -57,7 +68,7 @@ class _FakeConnection:
         return _FakeCursor(response)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def device_payload() -> DevicePayload:
     return DevicePayload(
         group_id="SECIL.GROUP",
@@ -106,9 +117,7 @@ def test_device_upsert_inserts_updates_and_noops(device_payload: DevicePayload)
     assert repo.upsert_device(device_payload).status == "inserted"
     assert repo.upsert_device(device_payload).status == "noop"
 
-    updated_payload = DevicePayload(
-        **{**device_payload.__dict__, "business_unit": "Aggregates"}
-    )
+    updated_payload = replace(device_payload, business_unit="Aggregates")
     result = repo.upsert_device(updated_payload)
     assert result.status == "updated"
     assert result.record["business_unit"] == "Aggregates"
@@ -125,7 +134,7 @@ def test_device_upsert_wraps_psycopg_errors(device_payload: DevicePayload) -> No
     assert "device upsert failed" in str(excinfo.value)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def metric_payload() -> MetricPayload:
     return MetricPayload(
         device_id=1,
@@ -171,7 +180,7 @@ def test_metric_upsert_handles_insert_update_and_noop(
     assert repo.upsert_metric(metric_payload).status == "inserted"
     assert repo.upsert_metric(metric_payload).status == "noop"
 
-    updated_payload = MetricPayload(**{**metric_payload.__dict__, "datatype": "string"})
+    updated_payload = replace(metric_payload, datatype="string")
     result = repo.upsert_metric(updated_payload)
     assert result.status == "updated"
     assert result.record["datatype"] == "string"
@@ -200,7 +209,7 @@ def test_upsert_metrics_bulk_inserts_and_updates(metric_payload: MetricPayload)
     class _BulkConnection:
         def __init__(self, responses: Iterator[Any]):
             self._responses = responses
-            self.executed = []
+            self.executed = deque()
             self.row_factory = None
 
         def cursor(self, row_factory=None) -> _BulkCursor:
@@ -226,16 +235,16 @@ def test_upsert_metrics_bulk_inserts_and_updates(metric_payload: MetricPayload)
 
     id_map = repo.upsert_metrics_bulk(payloads)
 
-    assert len(conn.executed) == 2
+    assert len(conn.executed) == 1
     insert_query, insert_params = conn.executed[0]
     assert "INSERT INTO uns_meta.metrics" in insert_query
-    assert len(insert_params) == 8
-
-    select_query, select_params = conn.executed[1]
-    assert "SELECT name, metric_id FROM uns_meta.metrics" in select_query
-    assert select_params[0] == 1
-    assert "temperature" in select_params
-    assert "pressure" in select_params
+    assert "RETURNING name, metric_id" in insert_query
+    assert insert_params == (
+        [1, 1],
+        ["temperature", "pressure"],
+        [metric_payload.uns_path, "SECIL.GROUP/EDGE-01/DEVICE-01/pressure"],
+        [metric_payload.datatype, "float"],
+    )
     assert id_map == {"temperature": 10, "pressure": 11}
 
 
@@ -245,6 +254,17 @@ def test_upsert_metrics_bulk_empty_list() -> None:
     assert repo.upsert_metrics_bulk([]) == {}
 
 
+@pytest.mark.unit
+def test_upsert_metrics_bulk_rejects_mixed_devices(
+    metric_payload: MetricPayload,
+) -> None:
+    other_device = replace(metric_payload, device_id=metric_payload.device_id + 1)
+    repo = MetadataRepository(_FakeConnection(iter([])))
+
+    with pytest.raises(ValueError, match="one device_id"):
+        repo.upsert_metrics_bulk([metric_payload, other_device])
+
+
 @pytest.mark.unit
 def test_upsert_metrics_bulk_wraps_psycopg_errors(
     metric_payload: MetricPayload,
@@ -264,7 +284,7 @@ def test_upsert_metrics_bulk_wraps_psycopg_errors(
     assert "metric bulk upsert failed" in str(excinfo.value)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def metric_property_payload() -> MetricPropertyPayload:
     return MetricPropertyPayload(
         metric_id=10, key="engineering_unit", type="string", value="C"
@@ -379,8 +399,8 @@ def test_metric_property_bulk_upsert_batches() -> None:
             self.row_factory = None
             self.transaction_calls = 0
             self.select_responses = select_responses
-            self.select_queries: List[tuple[str, Any]] = []
-            self.insert_calls: List[tuple[str, List[Any]]] = []
+            self.select_queries: deque[tuple[str, Any]] = deque()
+            self.insert_calls: deque[tuple[str, List[Any]]] = deque()
 
         def transaction(self):
             return _BulkTransaction(self)
@@ -442,10 +462,10 @@ def test_metric_property_bulk_upsert_skips_unchanged_rows() -> None:
     class _Connection:
         def __init__(self):
             self.row_factory = None
-            self.calls: List[List[Any]] = []
+            self.calls: deque[List[Any]] = deque()
 
         def transaction(self):
-            return _FakeTransaction()
+            return _TX_SINGLETON
 
         def cursor(self, row_factory=None):
             conn = self
@@ -500,7 +520,7 @@ def test_metric_property_bulk_upsert_updates_only_changes() -> None:
 
     class _BulkCursor:
         def __init__(self):
-            self.calls: List[List[Any]] = []
+            self.calls: deque[List[Any]] = deque()
             self.rowcount = 0
 
         def __enter__(self):
@@ -513,32 +533,11 @@ def test_metric_property_bulk_upsert_updates_only_changes() -> None:
             params = list(vars) if vars else []
             self.calls.append(params)
             changed = 0
-            for i in range(0, len(params), 9):
-                (
-                    _metric_id,
-                    key,
-                    value_type,
-                    value_int,
-                    value_long,
-                    value_float,
-                    value_double,
-                    value_string,
-                    value_bool,
-                ) = params[i : i + 9]
-                if value_type == "string":
-                    new_value = value_string
-                elif value_type == "int":
-                    new_value = value_int
-                elif value_type == "long":
-                    new_value = value_long
-                elif value_type == "float":
-                    new_value = value_float
-                elif value_type == "double":
-                    new_value = value_double
-                elif value_type == "boolean":
-                    new_value = value_bool
-                else:
-                    new_value = None
+            # Group the flat parameter list into 9-column rows in one pass.
+            for row in zip(*[iter(params)] * 9):
+                key, value_type = row[1], row[2]
+                value_index = _VALUE_COL_INDEX.get(value_type)
+                new_value = row[value_index] if value_index is not None else None
 
                 previous = existing_state.get(key)
                 if previous != (value_type, new_value):
@@ -553,7 +552,7 @@ def test_metric_property_bulk_upsert_updates_only_changes() -> None:
             self.cursor_obj = _BulkCursor()
 
         def transaction(self):
-            return _FakeTransaction()
+            return _TX_SINGLETON
 
         def cursor(self, row_factory=None):
             return self.cursor_obj
@@ -588,3 +587,71 @@ def test_metric_property_bulk_upsert_updates_only_changes() -> None:
 def test_metric_property_bulk_upsert_empty_list() -> None:
     repo = MetadataRepository(_FakeConnection(iter([])))
     assert repo.upsert_metric_properties_bulk([]) == 0
+
+
+@pytest.mark.unit
+def test_copy_metric_properties_stages_rows_and_merges_once() -> None:
+    class _CopyCursor:
+        def __init__(self, conn):
+            self.conn = conn
+            self.rowcount = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb) -> bool:
+            return False
+
+        def execute(self, query: str, vars: Optional[Sequence[Any]] = None) -> None:
+            self.conn.statements.append(query)
+            if query.startswith("INSERT"):
+                self.rowcount = len(self.conn.copied)
+
+        def copy_expert(self, query: str, file) -> None:
+            self.conn.statements.append(query)
+            self.conn.copied.extend(file.read().splitlines())
+
+    class _Connection:
+        def __init__(self):
+            self.row_factory = None
+            self.statements: List[str] = []
+            self.copied: List[str] = []
+
+        def transaction(self):
+            return _TX_SINGLETON
+
+        def cursor(self, row_factory=None):
+            assert row_factory is None
+            return _CopyCursor(self)
+
+    conn = _Connection()
+    repo = MetadataRepository(conn)
+
+    payloads = [
+        MetricPropertyPayload(metric_id=1, key="unit", type="string", value="a\tb"),
+        MetricPropertyPayload(metric_id=1, key="precision", type="int", value=4),
+        MetricPropertyPayload(metric_id=1, key="display", type="boolean", value=True),
+        MetricPropertyPayload(metric_id=1, key="precision", type="int", value=5),
+    ]
+
+    affected = repo.copy_metric_properties(payloads)
+
+    assert affected == 3
+    assert len(conn.statements) == 3
+    assert "CREATE TEMP TABLE IF NOT EXISTS metric_properties_stage" in (
+        conn.statements[0]
+    )
+    assert conn.statements[1].startswith("COPY metric_properties_stage")
+    assert "INSERT INTO uns_meta.metric_properties AS mp" in conn.statements[2]
+    assert "WHERE mp.type IS DISTINCT FROM EXCLUDED.type" in conn.statements[2]
+    assert conn.copied == [
+        "1\tunit\tstring\t\\N\t\\N\t\\N\t\\N\ta\\tb\t\\N",
+        "1\tprecision\tint\t5\t\\N\t\\N\t\\N\t\\N\t\\N",
+        "1\tdisplay\tboolean\t\\N\t\\N\t\\N\t\\N\t\\N\tt",
+    ]
+
+
+@pytest.mark.unit
+def test_copy_metric_properties_empty_list() -> None:
+    repo = MetadataRepository(_FakeConnection(iter([])))
+    assert repo.copy_metric_properties([]) == 0
@@ -1,50 +1,29 @@
 import json
+import os
 import threading
 import pytest
-import sys
 import types
-import unittest
 import uns_metadata_sync.service as service
+from collections import deque
+from dataclasses import replace
+from functools import lru_cache, partial
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from unittest.mock import patch
+from typing import Callable, NamedTuple
 from uns_metadata_sync import sparkplug_b_pb2 as sparkplug
 from uns_metadata_sync.config import Settings
+from uns_metadata_sync.db.repository import RepositoryError
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-SRC_PATH = PROJECT_ROOT / "src"
-if str(SRC_PATH) not in sys.path:
-    sys.path.insert(0, str(SRC_PATH))
-
-if "paho" not in sys.modules:
-    paho_module = types.ModuleType("paho")
-    mqtt_module = types.ModuleType("paho.mqtt")
-    mqtt_client_module = types.ModuleType("paho.mqtt.client")
-
-    class _DummyClient:
-        def __init__(self, *args, **kwargs):
-            self.args = args
-            self.kwargs = kwargs
-
-    mqtt_client_module.Client = _DummyClient
-    mqtt_client_module.CallbackAPIVersion = types.SimpleNamespace(VERSION2="V2")
-    mqtt_client_module.MQTTv311 = 4
-
-    sys.modules["paho"] = paho_module
-    sys.modules["paho.mqtt"] = mqtt_module
-    sys.modules["paho.mqtt.client"] = mqtt_client_module
-    mqtt_module.client = mqtt_client_module
-
-if "dotenv" not in sys.modules:
-    sys.modules["dotenv"] = types.SimpleNamespace(
-        load_dotenv=lambda *args, **kwargs: None
-    )
 
+class MqttMsg(NamedTuple):
+    topic: str
+    payload: bytes
 
-if "dotenv" not in sys.modules:
-    sys.modules["dotenv"] = types.SimpleNamespace(
-        load_dotenv=lambda *args, **kwargs: None
-    )
+
+class PubResult(NamedTuple):
+    rc: int
+
+
+_PUBLISH_OK = PubResult(rc=0)
 
 
 class StubClient:
@@ -79,7 +58,7 @@ class StubClient:
 
     def publish(self, topic, payload=b""):
         self.published.append((topic, payload))
-        return types.SimpleNamespace(rc=0)
+        return _PUBLISH_OK
 
     def connect(self, host, port, keepalive=60):
         self.connect_args = (host, port, keepalive)
@@ -88,489 +67,611 @@ class StubClient:
         self.loop_forever_called = True
 
 
-def make_settings(base_path: Path, **overrides) -> Settings:
-    base = {
-        "broker": "broker.example",
-        "port": 8883,
-        "username": "user",
-        "password": "pass",
-        "topic_all": "spBv1.0/Secil/DBIRTH/#",
-        "topic_nbirth_all": "spBv1.0/+/NBIRTH/#",
-        "topic_dbirth_all": "spBv1.0/+/DBIRTH/#",
+# Paths below os.devnull never exist and cannot be created, so tests that do
+# not ask for ``tmp_path`` fail loudly if they ever touch the filesystem.
+NO_DISK_PATH = Path(os.devnull)
+
+
+def _path_fields(base_path: Path) -> dict:
+    return {
         "alias_cache_path": base_path / "alias_cache.json",
-        "write_jsonl": False,
         "jsonl_pattern": str(base_path / "messages_{topic}.jsonl"),
-        "auto_request_rebirth": True,
-        "rebirth_throttle_seconds": 60,
-        "client_id": "client-123",
-        "tls_insecure": False,
-        "db_mode": "mock",
-        "db_host": "localhost",
-        "db_port": 5432,
-        "db_name": "uns_metadata",
-        "db_user": "postgres",
-        "db_password": "postgres",
-        "db_schema": "uns_meta",
-        "cdc_enabled": False,
-        "cdc_slot": "uns_meta_slot",
-        "cdc_publication": "uns_meta_pub",
-        "cdc_window_seconds": 180,
-        "cdc_flush_interval_seconds": 5.0,
-        "cdc_buffer_cap": 1000,
-        "cdc_idle_sleep_seconds": 1.0,
-        "cdc_max_batch_messages": 500,
-        "pg_replication_user": "postgres",
-        "pg_replication_password": "postgres",
-        "pg_replication_host": "localhost",
-        "pg_replication_port": 5432,
-        "pg_replication_database": "uns_metadata",
-        "pg_replication_sslmode": "prefer",
-        "cdc_checkpoint_backend": "memory",
         "cdc_resume_path": base_path / "cdc_resume.json",
-        "cdc_resume_fsync": False,
     }
-    base.update(overrides)
-    return Settings(**base)
+
+
+_BASE_FIELDS = {
+    "broker": "broker.example",
+    "port": 8883,
+    "username": "user",
+    "password": "pass",
+    "topic_all": "spBv1.0/Secil/DBIRTH/#",
+    "topic_nbirth_all": "spBv1.0/+/NBIRTH/#",
+    "topic_dbirth_all": "spBv1.0/+/DBIRTH/#",
+    "write_jsonl": False,
+    "auto_request_rebirth": True,
+    "rebirth_throttle_seconds": 60,
+    "client_id": "client-123",
+    "tls_insecure": False,
+    "db_mode": "mock",
+    "db_host": "localhost",
+    "db_port": 5432,
+    "db_name": "uns_metadata",
+    "db_user": "postgres",
+    "db_password": "postgres",
+    "db_schema": "uns_meta",
+    "cdc_enabled": False,
+    "cdc_slot": "uns_meta_slot",
+    "cdc_publication": "uns_meta_pub",
+    "cdc_window_seconds": 180,
+    "cdc_flush_interval_seconds": 5.0,
+    "cdc_buffer_cap": 1000,
+    "cdc_idle_sleep_seconds": 1.0,
+    "cdc_max_batch_messages": 500,
+    "pg_replication_user": "postgres",
+    "pg_replication_password": "postgres",
+    "pg_replication_host": "localhost",
+    "pg_replication_port": 5432,
+    "pg_replication_database": "uns_metadata",
+    "pg_replication_sslmode": "prefer",
+    "cdc_checkpoint_backend": "memory",
+    "cdc_resume_fsync": False,
+}
+
+# Settings is frozen, so one baseline is shared and tests only pay for the
+# fields they override.
+BASE_SETTINGS = Settings(**_BASE_FIELDS, **_path_fields(NO_DISK_PATH))
+_EXPECTED_SUBSCRIPTIONS = [
+    (BASE_SETTINGS.topic_all, 0),
+    (BASE_SETTINGS.topic_nbirth_all, 0),
+    (BASE_SETTINGS.topic_dbirth_all, 0),
+]
+
+
+def make_settings(base_path: Path = NO_DISK_PATH, **overrides) -> Settings:
+    if base_path != NO_DISK_PATH:
+        overrides = {**_path_fields(base_path), **overrides}
+    if not overrides:
+        return BASE_SETTINGS
+    return replace(BASE_SETTINGS, **overrides)
 
 
 def build_metric_with_property(
     name: str, alias: int, datatype: int, prop_key: str, prop_value: str
 ):
+    PropertySet = sparkplug.Payload.PropertySet
+    return sparkplug.Payload.Metric(
+        name=name,
+        alias=alias,
+        datatype=datatype,
+        properties=PropertySet(
+            keys=[prop_key],
+            values=[sparkplug.Payload.PropertyValue(string_value=prop_value)],
+        ),
+    )
+
+
+@lru_cache(maxsize=128)
+def birth_bytes_with_property(
+    name: str, alias: int, datatype: int, prop_key: str, prop_value: str
+) -> bytes:
+    """Serialized one-metric birth; parse it to get a Payload to mutate."""
+    metric = build_metric_with_property(name, alias, datatype, prop_key, prop_value)
+    return sparkplug.Payload(metrics=[metric]).SerializePartialToString()
+
+
+def _build_flow_rate_data() -> bytes:
+    metric = sparkplug.Payload.Metric(
+        alias=11, int_value=42, datatype=1, timestamp=123456789
+    )
+    return sparkplug.Payload(metrics=[metric]).SerializePartialToString()
+
+
+def _build_kiln_birth() -> bytes:
+    metric = sparkplug.Payload.Metric(
+        name="Area 1/Equipment-Alpha/Metric°", alias=5, datatype=1
+    )
+    return sparkplug.Payload(metrics=[metric]).SerializePartialToString()
+
+
+# Serialized once per session; tests parse a fresh Payload when they need one.
+FLOW_RATE_BIRTH_BYTES = birth_bytes_with_property("flow_rate", 11, 2, "unit", "L/min")
+FLOW_RATE_DATA_BYTES = _build_flow_rate_data()
+KILN_BIRTH_BYTES = _build_kiln_birth()
+
+
+@lru_cache(maxsize=None)
+def build_dataset_metric(name: str, alias: int) -> sparkplug.Payload.Metric:
+    """Return a shared dataset metric; callers must treat it as read-only."""
+    DataSet = sparkplug.Payload.DataSet
+    Row, Value = DataSet.Row, DataSet.DataSetValue
+    dataset = DataSet(
+        columns=["pressure", "temperature"],
+        rows=[
+            Row(elements=[Value(int_value=10), Value(float_value=21.5)]),
+            Row(elements=[Value(int_value=12), Value(float_value=22.1)]),
+        ],
+    )
+    return sparkplug.Payload.Metric(name=name, alias=alias, dataset_value=dataset)
+
+
+class _NoopTxn:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return None
+
+
+class _NoopConn:
+    __slots__ = ()
+
+    def transaction(self):
+        return _NoopTxn()
+
+
+class SpyRepository:
+    __slots__ = ("device_payloads", "metric_payloads", "property_payloads", "conn")
+
+    def __init__(self):
+        self.device_payloads = deque()
+        self.metric_payloads = deque()
+        self.property_payloads = deque()
+        self.conn = _NoopConn()
+
+    @staticmethod
+    def _result(status: str, record: dict):
+        return types.SimpleNamespace(status=status, record=record)
+
+    def upsert_device(self, payload):
+        self.device_payloads.append(payload)
+        return self._result("inserted", {"device_id": 1})
+
+    def upsert_metrics_bulk(self, payloads, *, batch_size=1000):
+        self.metric_payloads.extend(payloads)
+        return {p.name: i for i, p in enumerate(payloads, 101)}
+
+    def copy_metric_properties(self, payloads, *, manage_transaction=True):
+        self.property_payloads.extend(payloads)
+        return len(payloads)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def stub_mqtt_client():
+    # Patched once for the whole module; StubClient keeps no shared state.
+    with pytest.MonkeyPatch.context() as patcher:
+        patcher.setattr(service.mqtt, "Client", StubClient)
+        yield
+
+
+@pytest.fixture
+def subscriber(stub_mqtt_client):
+    return service.SparkplugSubscriber(make_settings())
+
+
+@pytest.fixture
+def settings_factory(tmp_path) -> Callable[..., Settings]:
+    return partial(make_settings, tmp_path)
+
+
+@pytest.fixture
+def spy_repo() -> SpyRepository:
+    return SpyRepository()
+
+
+@pytest.mark.unit
+def test_build_client_configures_tls_and_credentials(subscriber):
+    client = subscriber.client
+
+    assert client.username_pw == (
+        subscriber.settings.username,
+        subscriber.settings.password,
+    )
+    assert client.tls_set_context_called
+    assert client.tls_insecure_flag is subscriber.settings.tls_insecure
+    assert client.kwargs["client_id"] == subscriber.settings.client_id
+    assert (
+        client.kwargs["callback_api_version"]
+        == service.mqtt.CallbackAPIVersion.VERSION2
+    )
+    assert client.kwargs["protocol"] == service.mqtt.MQTTv311
+    assert client.on_connect.__self__ is subscriber
+    assert client.on_connect.__func__ is subscriber.on_connect.__func__
+    assert client.on_message.__self__ is subscriber
+    assert client.on_message.__func__ is subscriber.on_message.__func__
+
+
+@pytest.mark.unit
+def test_connect_invokes_underlying_client():
+    subscriber = service.SparkplugSubscriber(
+        make_settings(broker="mqtt.internal", port=8884)
+    )
+
+    subscriber.connect()
+
+    assert subscriber.client.connect_args == (
+        subscriber.settings.broker,
+        subscriber.settings.port,
+        60,
+    )
+
+
+@pytest.mark.unit
+def test_on_connect_subscribes_to_expected_topics(subscriber):
+    subscriber.on_connect(subscriber.client, None, None, 0)
+
+    assert subscriber.client.subscriptions == [_EXPECTED_SUBSCRIPTIONS]
+
+
+@pytest.mark.unit
+def test_ingest_birth_records_alias_and_resolves_name(subscriber):
+    payload = sparkplug.Payload.FromString(
+        birth_bytes_with_property("pump_state", 7, 1, "unit", "kW")
+    )
+
+    subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", payload)
+
+    alias_key = ("Secil", "EdgeNode", "DeviceA")
+    assert alias_key in subscriber.alias_maps
+    assert subscriber.alias_maps[alias_key][7] == {
+        "name": "pump_state",
+        "datatype": 1,
+        "props": {"unit": "kW"},
+    }
+
+    alias_metric = sparkplug.Payload.Metric()
+    alias_metric.alias = 7
+
+    resolved = subscriber._resolve_name(
+        subscriber.client, "Secil", "EdgeNode", "DeviceA", alias_metric
+    )
+    assert resolved == "pump_state"
+
+
+@pytest.mark.unit
+def test_resolve_name_prefers_device_alias_over_node_alias(subscriber):
+    node_payload = sparkplug.Payload()
+    node_metric = node_payload.metrics.add()
+    node_metric.name = "node_temp"
+    node_metric.alias = 5
+    subscriber._ingest_birth("Secil", "EdgeNode", None, node_payload)
+
+    device_payload = sparkplug.Payload()
+    device_metric = device_payload.metrics.add()
+    device_metric.name = "device_temp"
+    device_metric.alias = 5
+    subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", device_payload)
+
     metric = sparkplug.Payload.Metric()
-    metric.name = name
-    metric.alias = alias
-    metric.datatype = datatype
+    metric.alias = 5
+
+    resolved = subscriber._resolve_name(
+        subscriber.client, "Secil", "EdgeNode", "DeviceA", metric
+    )
+    assert resolved == "device_temp"
+
+
+@pytest.mark.unit
+def test_resolve_name_falls_back_to_node_alias_when_device_missing(subscriber):
+    node_payload = sparkplug.Payload()
+    node_metric = node_payload.metrics.add()
+    node_metric.name = "node_pressure"
+    node_metric.alias = 8
+    subscriber._ingest_birth("Secil", "EdgeNode", None, node_payload)
+
+    metric = sparkplug.Payload.Metric()
+    metric.alias = 8
+
+    resolved = subscriber._resolve_name(
+        subscriber.client, "Secil", "EdgeNode", "DeviceB", metric
+    )
+    assert resolved == "node_pressure"
+
+
+@pytest.mark.unit
+def test_ingest_birth_preserves_nested_property_sets(subscriber):
+    payload = sparkplug.Payload()
+    metric = payload.metrics.add()
+    metric.name = "pump_status"
+    metric.alias = 3
+    metric.datatype = 12
+
     props = metric.properties
-    props.keys.append(prop_key)
-    prop_entry = props.values.add()
-    prop_entry.string_value = prop_value
-    return metric
+    props.keys.extend(["unit", "limits", "modes"])
+
+    unit_value = props.values.add()
+    unit_value.string_value = "kW"
+
+    limits_value = props.values.add()
+    limits_set = limits_value.propertyset_value
+    limits_set.keys.extend(["min", "max"])
+    limits_set.values.add().int_value = 1
+    limits_set.values.add().double_value = 9.5
+
+    modes_value = props.values.add()
+    modes_list = modes_value.propertysets_value
+    auto_set = modes_list.propertyset.add()
+    auto_set.keys.append("mode")
+    auto_set.values.add().string_value = "AUTO"
+    manual_set = modes_list.propertyset.add()
+    manual_set.keys.append("mode")
+    manual_set.values.add().string_value = "MANUAL"
+
+    subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", payload)
+
+    alias_key = ("Secil", "EdgeNode", "DeviceA")
+    alias_entry = subscriber.alias_maps[alias_key][3]
+    assert alias_entry == {
+        "name": "pump_status",
+        "datatype": 12,
+        "props": {
+            "unit": "kW",
+            "limits": {"min": 1, "max": 9.5},
+            "modes": [{"mode": "AUTO"}, {"mode": "MANUAL"}],
+        },
+    }
 
 
-def build_dataset_metric(name: str, alias: int) -> sparkplug.Payload.Metric:
+@pytest.mark.unit
+def test_props_to_dict_tolerates_key_value_mismatch(caplog):
+    props = sparkplug.Payload.PropertySet()
+    props.keys.extend(["unit", "orphan"])
+    props.values.add().string_value = "kW"
+
+    with caplog.at_level("WARNING", logger="uns_metadata_sync.service"):
+        parsed = service.SparkplugSubscriber._props_to_dict(props)
+
+    assert any(record.name == "uns_metadata_sync.service" for record in caplog.records)
+    assert parsed == {"unit": "kW"}
+    assert service.SparkplugSubscriber._props_to_dict(None) == {}
+
+
+@pytest.mark.unit
+def test_metric_value_handles_dataset_payload():
+    dataset_metric = build_dataset_metric("combo_dataset", 2)
+
+    parsed = service.SparkplugSubscriber._metric_value(dataset_metric)
+
+    assert parsed["columns"] == ["pressure", "temperature"]
+    assert len(parsed["rows"]) == 2
+    assert parsed["rows"][0][0] == 10
+    assert parsed["rows"][0][1] == pytest.approx(21.5)
+    assert parsed["rows"][1][0] == 12
+    assert parsed["rows"][1][1] == pytest.approx(22.1, abs=1e-3)
+
+
+@pytest.mark.unit
+def test_resolve_name_requests_rebirth_with_throttle(monkeypatch, subscriber):
+    time_values = [1_000.0]
+    monkeypatch.setattr(service.time, "time", lambda: time_values[0])
+
     metric = sparkplug.Payload.Metric()
-    metric.name = name
-    metric.alias = alias
-    dataset = metric.dataset_value
-    dataset.columns.extend(["pressure", "temperature"])
-    first_row = dataset.rows.add()
-    first_row.elements.add().int_value = 10
-    first_row.elements.add().float_value = 21.5
-    second_row = dataset.rows.add()
-    second_row.elements.add().int_value = 12
-    second_row.elements.add().float_value = 22.1
-    return metric
-
-
-class SparkplugSubscriberTests(unittest.TestCase):
-    def setUp(self):
-        self.tempdir = TemporaryDirectory()
-        self.addCleanup(self.tempdir.cleanup)
-        self.tmp_path = Path(self.tempdir.name)
-        self.created_clients = []
-        self.mqtt_patcher = patch.object(
-            service.mqtt, "Client", side_effect=self._client_factory
-        )
-        self.mqtt_patcher.start()
-        self.addCleanup(self.mqtt_patcher.stop)
-
-    def _client_factory(self, *args, **kwargs):
-        client = StubClient(*args, **kwargs)
-        self.created_clients.append(client)
-        return client
-
-    def _make_settings(self, **overrides) -> Settings:
-        return make_settings(self.tmp_path, **overrides)
-
-    class SpyRepository:
+    metric.alias = 9
+
+    first = subscriber._resolve_name(
+        subscriber.client, "Secil", "EdgeNode", "DeviceA", metric
+    )
+    assert first == "alias:9"
+    assert subscriber.client.published == [
+        ("spBv1.0/Secil/EdgeNode/command/rebirth", b"")
+    ]
+
+    time_values[0] += 10
+    second = subscriber._resolve_name(
+        subscriber.client, "Secil", "EdgeNode", "DeviceA", metric
+    )
+    assert second == "alias:9"
+    assert len(subscriber.client.published) == 1
+
+    time_values[0] += 61
+    subscriber._resolve_name(subscriber.client, "Secil", "EdgeNode", "DeviceA", metric)
+    assert len(subscriber.client.published) == 2
+
+
+@pytest.mark.unit
+def test_on_message_decodes_payload_and_resolves_alias(monkeypatch, subscriber):
+    birth_payload = sparkplug.Payload.FromString(FLOW_RATE_BIRTH_BYTES)
+    subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", birth_payload)
+
+    captured = []
+
+    def capture_jsonl(instance, topic, frame):
+        captured.append((topic, frame))
+
+    monkeypatch.setattr(service.SparkplugSubscriber, "_write_jsonl", capture_jsonl)
+
+    mqtt_message = MqttMsg(
+        topic="spBv1.0/Secil/DBIRTH/EdgeNode/DeviceA",
+        payload=FLOW_RATE_DATA_BYTES,
+    )
+
+    subscriber.on_message(subscriber.client, None, mqtt_message)
+
+    assert captured, "Expected _write_jsonl to be invoked"
+    topic, frame = captured[0]
+    assert topic == mqtt_message.topic
+    metric_frame = frame["metrics"][0]
+    assert metric_frame["name"] == "flow_rate"
+    assert metric_frame["value"] == 42
+    assert metric_frame["datatype"] == 1
+    assert metric_frame["ts"] == 123456789
+    assert metric_frame["props"] == {}
+
+
+@pytest.mark.unit
+def test_on_message_skips_republished_identical_birth(subscriber):
+    captured = []
+
+    def capture_frame(topic, _frame):
+        captured.append(topic)
+        return True
+
+    subscriber._write_jsonl = capture_frame  # type: ignore[assignment]
+
+    message = MqttMsg(
+        topic="spBv1.0/Secil/DBIRTH/EdgeNode/DeviceA",
+        payload=FLOW_RATE_BIRTH_BYTES,
+    )
+
+    subscriber.on_message(subscriber.client, None, message)
+    subscriber.on_message(subscriber.client, None, message)
+    assert len(captured) == 1
+
+    birth_payload = sparkplug.Payload.FromString(FLOW_RATE_BIRTH_BYTES)
+    birth_payload.metrics[0].alias = 12
+    message = message._replace(payload=birth_payload.SerializePartialToString())
+    subscriber.on_message(subscriber.client, None, message)
+    assert len(captured) == 2
+
+
+@pytest.mark.unit
+def test_on_message_reprocesses_birth_after_repository_error():
+    class FlakyRepository(SpyRepository):
+        __slots__ = ("failures",)
+
         def __init__(self):
-            self.device_payloads = []
-            self.metric_payloads = []
-            self.property_payloads = []
-            self.conn = self._make_mock_conn()
-
-        def _make_mock_conn(self):
-            conn = unittest.mock.MagicMock()
-            conn.transaction.return_value = unittest.mock.MagicMock(
-                __enter__=unittest.mock.MagicMock(),
-                __exit__=unittest.mock.MagicMock(return_value=None),
-            )
-            return conn
-
-        @staticmethod
-        def _result(status: str, record: dict):
-            return types.SimpleNamespace(status=status, record=record)
+            super().__init__()
+            self.failures = 1
 
         def upsert_device(self, payload):
-            self.device_payloads.append(payload)
-            return self._result("inserted", {"device_id": 1})
-
-        def upsert_metrics_bulk(self, payloads, *, batch_size=1000):
-            self.metric_payloads.extend(payloads)
-            return {p.name: i for i, p in enumerate(payloads, 101)}
-
-        def upsert_metric_properties_bulk(
-            self, payloads, *, batch_size=1000, manage_transaction=True
-        ):
-            self.property_payloads.extend(payloads)
-            return len(payloads)
-
-    @pytest.mark.unit
-    def test_build_client_configures_tls_and_credentials(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings())
-        client = subscriber.client
-
-        self.assertEqual(
-            client.username_pw,
-            (subscriber.settings.username, subscriber.settings.password),
-        )
-        self.assertTrue(client.tls_set_context_called)
-        self.assertIs(client.tls_insecure_flag, subscriber.settings.tls_insecure)
-        self.assertEqual(client.kwargs["client_id"], subscriber.settings.client_id)
-        self.assertEqual(
-            client.kwargs["callback_api_version"],
-            service.mqtt.CallbackAPIVersion.VERSION2,
-        )
-        self.assertEqual(client.kwargs["protocol"], service.mqtt.MQTTv311)
-        self.assertIs(client.on_connect.__self__, subscriber)
-        self.assertIs(client.on_connect.__func__, subscriber.on_connect.__func__)
-        self.assertIs(client.on_message.__self__, subscriber)
-        self.assertIs(client.on_message.__func__, subscriber.on_message.__func__)
-
-    @pytest.mark.unit
-    def test_connect_invokes_underlying_client(self):
-        subscriber = service.SparkplugSubscriber(
-            self._make_settings(broker="mqtt.internal", port=8884)
-        )
-
-        subscriber.connect()
-
-        self.assertEqual(
-            subscriber.client.connect_args,
-            (subscriber.settings.broker, subscriber.settings.port, 60),
-        )
-
-    @pytest.mark.unit
-    def test_on_connect_subscribes_to_expected_topics(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings())
-
-        subscriber.on_connect(subscriber.client, None, None, 0)
-
-        expected = [
-            [
-                (subscriber.settings.topic_all, 0),
-                (subscriber.settings.topic_nbirth_all, 0),
-                (subscriber.settings.topic_dbirth_all, 0),
-            ]
+            if self.failures:
+                self.failures -= 1
+                raise RepositoryError("database unavailable")
+            return super().upsert_device(payload)
+
+    repo = FlakyRepository()
+    subscriber = service.SparkplugSubscriber(
+        make_settings(db_mode="local"), repository=repo
+    )
+    Metric = sparkplug.Payload.Metric
+    birth = sparkplug.Payload(
+        metrics=[
+            Metric(name="country", alias=1, datatype=12, string_value="PT"),
+            Metric(name="business_unit", alias=2, datatype=12, string_value="Cement"),
+            Metric(name="plant", alias=3, datatype=12, string_value="PlantA"),
         ]
-        self.assertEqual(subscriber.client.subscriptions, expected)
-
-    @pytest.mark.unit
-    def test_ingest_birth_records_alias_and_resolves_name(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings())
-
-        payload = sparkplug.Payload()
-        payload.metrics.extend(
-            [build_metric_with_property("pump_state", 7, 1, "unit", "kW")]
-        )
-
-        subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", payload)
-
-        alias_key = ("Secil", "EdgeNode", "DeviceA")
-        self.assertIn(alias_key, subscriber.alias_maps)
-        self.assertEqual(
-            subscriber.alias_maps[alias_key][7],
-            {"name": "pump_state", "datatype": 1, "props": {"unit": "kW"}},
-        )
-
-        alias_metric = sparkplug.Payload.Metric()
-        alias_metric.alias = 7
-
-        resolved = subscriber._resolve_name(
-            subscriber.client, "Secil", "EdgeNode", "DeviceA", alias_metric
-        )
-        self.assertEqual(resolved, "pump_state")
-
-    @pytest.mark.unit
-    def test_resolve_name_prefers_device_alias_over_node_alias(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings())
-
-        node_payload = sparkplug.Payload()
-        node_metric = node_payload.metrics.add()
-        node_metric.name = "node_temp"
-        node_metric.alias = 5
-        subscriber._ingest_birth("Secil", "EdgeNode", None, node_payload)
-
-        device_payload = sparkplug.Payload()
-        device_metric = device_payload.metrics.add()
-        device_metric.name = "device_temp"
-        device_metric.alias = 5
-        subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", device_payload)
-
-        metric = sparkplug.Payload.Metric()
-        metric.alias = 5
-
-        resolved = subscriber._resolve_name(
-            subscriber.client, "Secil", "EdgeNode", "DeviceA", metric
-        )
-        self.assertEqual(resolved, "device_temp")
-
-    @pytest.mark.unit
-    def test_resolve_name_falls_back_to_node_alias_when_device_missing(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings())
-
-        node_payload = sparkplug.Payload()
-        node_metric = node_payload.metrics.add()
-        node_metric.name = "node_pressure"
-        node_metric.alias = 8
-        subscriber._ingest_birth("Secil", "EdgeNode", None, node_payload)
-
-        metric = sparkplug.Payload.Metric()
-        metric.alias = 8
-
-        resolved = subscriber._resolve_name(
-            subscriber.client, "Secil", "EdgeNode", "DeviceB", metric
-        )
-        self.assertEqual(resolved, "node_pressure")
-
-    @pytest.mark.unit
-    def test_ingest_birth_preserves_nested_property_sets(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings())
-
-        payload = sparkplug.Payload()
-        metric = payload.metrics.add()
-        metric.name = "pump_status"
-        metric.alias = 3
-        metric.datatype = 12
-
-        props = metric.properties
-        props.keys.extend(["unit", "limits", "modes"])
-
-        unit_value = props.values.add()
-        unit_value.string_value = "kW"
-
-        limits_value = props.values.add()
-        limits_set = limits_value.propertyset_value
-        limits_set.keys.extend(["min", "max"])
-        limits_set.values.add().int_value = 1
-        limits_set.values.add().double_value = 9.5
-
-        modes_value = props.values.add()
-        modes_list = modes_value.propertysets_value
-        auto_set = modes_list.propertyset.add()
-        auto_set.keys.append("mode")
-        auto_set.values.add().string_value = "AUTO"
-        manual_set = modes_list.propertyset.add()
-        manual_set.keys.append("mode")
-        manual_set.values.add().string_value = "MANUAL"
-
-        subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", payload)
-
-        alias_key = ("Secil", "EdgeNode", "DeviceA")
-        alias_entry = subscriber.alias_maps[alias_key][3]
-        self.assertEqual(
-            alias_entry,
-            {
-                "name": "pump_status",
-                "datatype": 12,
-                "props": {
-                    "unit": "kW",
-                    "limits": {"min": 1, "max": 9.5},
-                    "modes": [{"mode": "AUTO"}, {"mode": "MANUAL"}],
-                },
-            },
-        )
-
-    @pytest.mark.unit
-    def test_metric_value_handles_dataset_payload(self):
-        dataset_metric = build_dataset_metric("combo_dataset", 2)
-
-        parsed = service.SparkplugSubscriber._metric_value(dataset_metric)
-
-        self.assertEqual(parsed["columns"], ["pressure", "temperature"])
-        self.assertEqual(len(parsed["rows"]), 2)
-        self.assertEqual(parsed["rows"][0][0], 10)
-        self.assertAlmostEqual(parsed["rows"][0][1], 21.5)
-        self.assertEqual(parsed["rows"][1][0], 12)
-        self.assertAlmostEqual(parsed["rows"][1][1], 22.1, places=3)
-
-    @pytest.mark.unit
-    def test_resolve_name_requests_rebirth_with_throttle(self):
-        subscriber = service.SparkplugSubscriber(
-            self._make_settings(rebirth_throttle_seconds=60)
-        )
-
-        time_values = [1_000.0]
-
-        def fake_time():
-            return time_values[0]
-
-        with patch.object(service.time, "time", side_effect=fake_time):
-            metric = sparkplug.Payload.Metric()
-            metric.alias = 9
-
-            first = subscriber._resolve_name(
-                subscriber.client, "Secil", "EdgeNode", "DeviceA", metric
-            )
-            self.assertEqual(first, "alias:9")
-            self.assertEqual(
-                subscriber.client.published,
-                [("spBv1.0/Secil/EdgeNode/command/rebirth", b"")],
-            )
-
-            time_values[0] += 10
-            second = subscriber._resolve_name(
-                subscriber.client, "Secil", "EdgeNode", "DeviceA", metric
-            )
-            self.assertEqual(second, "alias:9")
-            self.assertEqual(len(subscriber.client.published), 1)
-
-            time_values[0] += 61
-            subscriber._resolve_name(
-                subscriber.client, "Secil", "EdgeNode", "DeviceA", metric
-            )
-            self.assertEqual(len(subscriber.client.published), 2)
-
-    @pytest.mark.unit
-    def test_on_message_decodes_payload_and_resolves_alias(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings())
-
-        birth_payload = sparkplug.Payload()
-        birth_payload.metrics.extend(
-            [build_metric_with_property("flow_rate", 11, 2, "unit", "L/min")]
-        )
-        subscriber._ingest_birth("Secil", "EdgeNode", "DeviceA", birth_payload)
-
-        captured = []
-
-        def capture_jsonl(instance, topic, frame):
-            captured.append((topic, frame))
-
-        with patch.object(
-            service.SparkplugSubscriber, "_write_jsonl", new=capture_jsonl
-        ):
-            message_payload = sparkplug.Payload()
-            metric = message_payload.metrics.add()
-            metric.alias = 11
-            metric.int_value = 42
-            metric.datatype = 1
-            metric.timestamp = 123456789
-
-            mqtt_message = types.SimpleNamespace(
-                topic="spBv1.0/Secil/DBIRTH/EdgeNode/DeviceA",
-                payload=message_payload.SerializeToString(),
-            )
-
-            subscriber.on_message(subscriber.client, None, mqtt_message)
-
-        self.assertTrue(captured, "Expected _write_jsonl to be invoked")
-        topic, frame = captured[0]
-        self.assertEqual(topic, mqtt_message.topic)
-        metric_frame = frame["metrics"][0]
-        self.assertEqual(metric_frame["name"], "flow_rate")
-        self.assertEqual(metric_frame["value"], 42)
-        self.assertEqual(metric_frame["datatype"], 1)
-        self.assertEqual(metric_frame["ts"], 123456789)
-        self.assertEqual(metric_frame["props"], {})
-
-    @pytest.mark.unit
-    def test_on_message_populates_uns_paths(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings(write_jsonl=True))
-
-        captured_frames = []
-
-        def capture_frame(_topic, frame):
-            captured_frames.append(frame)
-
-        subscriber._write_jsonl = capture_frame  # type: ignore[assignment]
-
-        payload = sparkplug.Payload()
-        metric = payload.metrics.add()
-        metric.name = "Area 1/Equipment-Alpha/Metric°"
-        metric.alias = 5
-        metric.datatype = 1
-
-        message = types.SimpleNamespace(
-            topic="spBv1.0/Secil/DBIRTH/Maceira-Ignition-Edge/Kiln-K1",
-            payload=payload.SerializeToString(),
-        )
-
-        subscriber.on_message(subscriber.client, None, message)
-
-        self.assertEqual(len(captured_frames), 1)
-        frame = captured_frames[0]
-
-        self.assertEqual(
-            frame["device_uns_path"], "Secil/Maceira-Ignition-Edge/Kiln-K1"
-        )
-
-        metric_entry = frame["metrics"][0]
-        self.assertEqual(
-            metric_entry["uns_path"],
-            "Secil/Maceira-Ignition-Edge/Kiln-K1/Area 1/Equipment-Alpha/Metric",
-        )
-        self.assertEqual(
-            metric_entry["canary_id"],
-            "Secil.Maceira-Ignition-Edge.Kiln-K1.Area 1.Equipment-Alpha.Metric",
-        )
-
-    @pytest.mark.unit
-    def test_persist_frame_writes_device_metric_and_properties(self):
-        repo = self.SpyRepository()
-        subscriber = service.SparkplugSubscriber(
-            self._make_settings(db_mode="local"), repository=repo
-        )
-        metrics = [
-            {"name": "country", "value": "PT"},
-            {"name": "business_unit", "value": "Cement"},
+    )
+    message = MqttMsg(
+        topic="spBv1.0/Secil/DBIRTH/EdgeNode/DeviceA",
+        payload=birth.SerializePartialToString(),
+    )
+
+    subscriber.on_message(subscriber.client, None, message)
+    assert not repo.device_payloads
+
+    subscriber.on_message(subscriber.client, None, message)
+    assert len(repo.device_payloads) == 1
+
+    subscriber.on_message(subscriber.client, None, message)
+    assert len(repo.device_payloads) == 1
+
+
+@pytest.mark.unit
+def test_on_message_populates_uns_paths(settings_factory):
+    subscriber = service.SparkplugSubscriber(settings_factory(write_jsonl=True))
+
+    captured_frames = []
+
+    def capture_frame(_topic, frame):
+        captured_frames.append(frame)
+
+    subscriber._write_jsonl = capture_frame  # type: ignore[assignment]
+
+    message = MqttMsg(
+        topic="spBv1.0/Secil/DBIRTH/Maceira-Ignition-Edge/Kiln-K1",
+        payload=KILN_BIRTH_BYTES,
+    )
+
+    subscriber.on_message(subscriber.client, None, message)
+
+    assert len(captured_frames) == 1
+    frame = captured_frames[0]
+
+    assert frame["device_uns_path"] == "Secil/Maceira-Ignition-Edge/Kiln-K1"
+
+    metric_entry = frame["metrics"][0]
+    assert (
+        metric_entry["uns_path"]
+        == "Secil/Maceira-Ignition-Edge/Kiln-K1/Area 1/Equipment-Alpha/Metric"
+    )
+    assert (
+        metric_entry["canary_id"]
+        == "Secil.Maceira-Ignition-Edge.Kiln-K1.Area 1.Equipment-Alpha.Metric"
+    )
+
+
+@pytest.mark.unit
+def test_persist_frame_writes_device_metric_and_properties(spy_repo):
+    subscriber = service.SparkplugSubscriber(
+        make_settings(db_mode="local"), repository=spy_repo
+    )
+    metrics = [
+        {"name": "country", "value": "PT"},
+        {"name": "business_unit", "value": "Cement"},
+        {"name": "plant", "value": "PlantA"},
+        {
+            "name": "temperature",
+            "value": 42.0,
+            "datatype": "double",
+            "uns_path": "SECIL.GROUP/EDGE-01/DEVICE-01/temperature",
+            "props": {"engineering_unit": "C"},
+        },
+    ]
+    frame = {
+        "device_uns_path": "SECIL.GROUP/EDGE-01/DEVICE-01",
+        "metrics": metrics,
+    }
+
+    subscriber._persist_frame("SECIL.GROUP", "EDGE-01", "DEVICE-01", frame)
+
+    assert len(spy_repo.device_payloads) == 1
+    device_payload = spy_repo.device_payloads[0]
+    assert device_payload.group_id == "SECIL.GROUP"
+    assert device_payload.business_unit == "Cement"
+    assert device_payload.country == "PT"
+
+    assert len(spy_repo.metric_payloads) == 1
+    metric_payload = spy_repo.metric_payloads[0]
+    assert metric_payload.datatype == "double"
+    assert metric_payload.uns_path == "SECIL.GROUP/EDGE-01/DEVICE-01/temperature"
+
+    assert len(spy_repo.property_payloads) == 1
+    prop_payload = spy_repo.property_payloads[0]
+    assert prop_payload.type == "string"
+    assert prop_payload.value == "C"
+
+
+@pytest.mark.unit
+def test_persist_frame_skips_when_dimension_missing(spy_repo):
+    subscriber = service.SparkplugSubscriber(
+        make_settings(db_mode="local"), repository=spy_repo
+    )
+    frame = {
+        "device_uns_path": "SECIL.GROUP/EDGE-01/DEVICE-01",
+        "metrics": [
+            {"name": "Country", "value": "PT"},
+            {"name": "business_unit", "value": "  "},
             {"name": "plant", "value": "PlantA"},
-            {
-                "name": "temperature",
-                "value": 42.0,
-                "datatype": "double",
-                "uns_path": "SECIL.GROUP/EDGE-01/DEVICE-01/temperature",
-                "props": {"engineering_unit": "C"},
-            },
-        ]
-        frame = {
-            "device_uns_path": "SECIL.GROUP/EDGE-01/DEVICE-01",
-            "metrics": metrics,
-        }
-
-        subscriber._persist_frame("SECIL.GROUP", "EDGE-01", "DEVICE-01", frame)
-
-        self.assertEqual(len(repo.device_payloads), 1)
-        device_payload = repo.device_payloads[0]
-        self.assertEqual(device_payload.group_id, "SECIL.GROUP")
-        self.assertEqual(device_payload.business_unit, "Cement")
-        self.assertEqual(device_payload.country, "PT")
-
-        self.assertEqual(len(repo.metric_payloads), 1)
-        metric_payload = repo.metric_payloads[0]
-        self.assertEqual(metric_payload.datatype, "double")
-        self.assertEqual(
-            metric_payload.uns_path, "SECIL.GROUP/EDGE-01/DEVICE-01/temperature"
-        )
-
-        self.assertEqual(len(repo.property_payloads), 1)
-        prop_payload = repo.property_payloads[0]
-        self.assertEqual(prop_payload.type, "string")
-        self.assertEqual(prop_payload.value, "C")
-
-    @pytest.mark.unit
-    def test_persist_frame_skips_when_repository_missing(self):
-        subscriber = service.SparkplugSubscriber(self._make_settings(db_mode="mock"))
-        frame = {"device_uns_path": "SECIL.GROUP/EDGE-01/DEVICE-01", "metrics": []}
-        # Should not raise even without repository / DB
-        subscriber._persist_frame("SECIL.GROUP", "EDGE-01", "DEVICE-01", frame)
+        ],
+    }
+
+    subscriber._persist_frame("SECIL.GROUP", "EDGE-01", "DEVICE-01", frame)
+
+    assert not spy_repo.device_payloads
+
+
+@pytest.mark.unit
+def test_persist_frame_skips_when_repository_missing(subscriber):
+    frame = {"device_uns_path": "SECIL.GROUP/EDGE-01/DEVICE-01", "metrics": []}
+    # Should not raise even without repository / DB
+    subscriber._persist_frame("SECIL.GROUP", "EDGE-01", "DEVICE-01", frame)
 
 
 @pytest.mark.unit
 def test_service_runtime_skips_cdc_when_disabled(tmp_path, monkeypatch):
     settings = make_settings(tmp_path, cdc_enabled=False)
-    monkeypatch.setattr(
-        service.mqtt, "Client", lambda *args, **kwargs: StubClient(*args, **kwargs)
-    )
 
     def _unexpected(*_args, **_kwargs):
         pytest.fail("CDC listener should not start")
@@ -590,9 +691,6 @@ def test_service_runtime_emits_diffs_and_stops(tmp_path, monkeypatch):
         write_jsonl=True,
         jsonl_pattern=str(tmp_path / "messages_{topic}.jsonl"),
     )
-    monkeypatch.setattr(
-        service.mqtt, "Client", lambda *args, **kwargs: StubClient(*args, **kwargs)
-    )
 
     class StubListener:
         def __init__(self):
@@ -625,7 +723,3 @@ def test_service_runtime_emits_diffs_and_stops(tmp_path, monkeypatch):
 
     runtime.stop()
     assert stub.stop_calls == 1
-
-
-if __name__ == "__main__":
-    unittest.main()